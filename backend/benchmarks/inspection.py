@@ -0,0 +1,112 @@
+"""
+Benchmark for inspecting video files (as done by `flux index add`).
+
+Compares the previous inspection (file signature, full ffprobe-output,
+and accurately seeked thumbnail) with the current one (extension
+fast-path, restricted ffprobe-output, and keyframe thumbnail) and
+reports the number of bytes read (including by `ffprobe` and `ffmpeg`,
+based on `rchar` in `/proc/self/io`; Linux only) and the duration per
+file. Run with
+```
+python benchmarks/inspection.py <directory with video files>
+```
+"""
+
+import sys
+import subprocess
+import json
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+import filetype
+
+from flux.cli.index.add import AddToIndex, VideoFile
+
+
+def read_bytes() -> int:
+    """
+    Returns number of bytes read by this process and its (terminated)
+    child processes.
+    """
+    for line in Path("/proc/self/io").read_text(encoding="utf-8").splitlines():
+        if line.startswith("rchar:"):
+            return int(line.split()[1])
+    raise RuntimeError("Missing 'rchar' in '/proc/self/io'.")
+
+
+def inspect_previous(file: Path, thumbnail: Path) -> None:
+    """Previous inspection of `file`."""
+    ft = filetype.guess(file)
+    if ft is None or ft.mime is None or not ft.mime.startswith("video/"):
+        return
+    metadata = json.loads(
+        subprocess.run(
+            [
+                "ffprobe",
+                "-v",
+                "error",
+                "-print_format",
+                "json",
+                "-show_format",
+                "-show_streams",
+                str(file),
+            ],
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+    )
+    seek_seconds = int(0.1 * float(metadata["format"]["duration"]))
+    subprocess.run(
+        [
+            "ffmpeg",
+            "-v",
+            "error",
+            "-ss",
+            f"00:0{(seek_seconds // 60) % 10}:{int(seek_seconds % 60)}",
+            "-i",
+            str(file),
+            "-frames:v",
+            "1",
+            "-vf",
+            "scale=720:-1",
+            str(thumbnail),
+        ],
+        check=True,
+        capture_output=True,
+    )
+
+
+def inspect_current(file: Path, thumbnail: Path) -> None:
+    """Current inspection of `file`."""
+    video = AddToIndex.process_video_file(file, "video")
+    if isinstance(video, VideoFile):
+        AddToIndex.generate_thumbnail(video, thumbnail)
+
+
+def main(directory: Path) -> None:
+    """Run benchmark."""
+    files = sorted(p for p in directory.glob("**/*") if p.is_file())
+    if not files:
+        print(f"No files in '{directory}'.")
+        return
+    with TemporaryDirectory() as tmp:
+        for name, inspect in [
+            ("previous", inspect_previous),
+            ("current", inspect_current),
+        ]:
+            bytes_read = read_bytes()
+            start = perf_counter()
+            for i, file in enumerate(files):
+                inspect(file, Path(tmp) / f"{name}-{i}.jpg")
+            duration = (perf_counter() - start) / len(files) * 1e3
+            bytes_read = (read_bytes() - bytes_read) / len(files)
+            print(
+                f"{name:>8}: {bytes_read / 2**10:10.1f} KiB/file, "
+                + f"{duration:8.2f} ms/file"
+            )
+
+
+if __name__ == "__main__":
+    main(Path(sys.argv[1]))
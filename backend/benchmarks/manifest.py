@@ -0,0 +1,108 @@
+"""
+Benchmark for adding records from a manifest (`flux index add
+--manifest`).
+
+Generates a manifest of a collection with 100000 videos and 1000
+movies (with precomputed thumbnails; all tracks refer to the same
+file) and reports the duration of the import into a temporary index.
+Run with
+```
+python benchmarks/manifest.py [<number of videos>]
+```
+"""
+
+import sys
+import json
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+from flux.config import FluxConfig
+from flux.db import pool
+from flux.cli.index.create import create_index
+from flux.cli.index.add import AddToIndex
+
+
+METADATA = {
+    "format": {
+        "duration": "10.0",
+        "format_name": "mov,mp4,m4a,3gp,3g2,mj2",
+        "bit_rate": "1000",
+    },
+    "streams": [
+        {
+            "codec_type": "video",
+            "codec_name": "h264",
+            "width": 1920,
+            "height": 1080,
+        }
+    ],
+}
+
+
+def write_manifest(tmp: Path, n: int) -> Path:
+    """Writes manifest and returns its path."""
+    video = tmp / "video.mp4"
+    video.write_bytes(b"\x00")
+    thumbnail = tmp / "thumbnail.jpg"
+    thumbnail.write_bytes(b"\x00" * 2**14)
+    manifest = tmp / "manifest.jsonl"
+    with open(manifest, "w", encoding="utf-8") as file:
+        file.write(
+            json.dumps(
+                {
+                    "type": "collection",
+                    "path": str(tmp),
+                    "videos": [
+                        {
+                            "path": str(video),
+                            "name": f"video {i}",
+                            "thumbnail": str(thumbnail),
+                            "metadata": METADATA,
+                        }
+                        for i in range(n)
+                    ],
+                }
+            )
+            + "\n"
+        )
+        for i in range(1000):
+            file.write(
+                json.dumps(
+                    {
+                        "type": "movie",
+                        "path": str(video),
+                        "name": f"movie {i}",
+                        "videos": [
+                            {
+                                "path": str(video),
+                                "thumbnail": str(thumbnail),
+                                "metadata": METADATA,
+                            }
+                        ],
+                    }
+                )
+                + "\n"
+            )
+    return manifest
+
+
+def main(n: int) -> None:
+    """Run benchmark."""
+    with TemporaryDirectory() as tmp:
+        manifest = write_manifest(Path(tmp), n)
+        index = Path(tmp) / "index"
+        create_index(index, False)
+        start = perf_counter()
+        AddToIndex.import_manifest(index, manifest)
+        duration = perf_counter() - start
+        print(
+            f"{n + 1000} videos: {duration:8.2f} s "
+            + f"({(n + 1000) / duration:.0f} videos/s)"
+        )
+        pool.close()
+        assert (index / FluxConfig.INDEX_DB_FILE).is_file()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
@@ -0,0 +1,138 @@
+"""
+Benchmark for loading record info (`GET /api/v0/index/record/<id>`).
+
+Loads a movie, a series with 1000 episodes, and a collection with
+10000 videos from a temporary index and reports the average duration
+and the number of issued statements per record. Run with
+```
+python benchmarks/record_info.py [<number of repetitions>]
+```
+"""
+
+import sys
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from uuid import uuid4
+
+from flux.config import FluxConfig
+from flux.db import Transaction, pool
+from flux.db.tracks import INSERT_TRACK, get_track_row
+from flux.db import common as db_common
+from flux.api.v0.index import get_record_info
+
+
+METADATA = {
+    "format": {
+        "duration": "10.0",
+        "format_name": "mov,mp4,m4a,3gp,3g2,mj2",
+        "format_long_name": "QuickTime / MOV",
+        "bit_rate": "1000",
+    },
+    "streams": [
+        {
+            "codec_type": "video",
+            "codec_name": "h264",
+            "width": 1920,
+            "height": 1080,
+        }
+    ],
+}
+
+
+def seed(index_db: Path) -> dict[str, str]:
+    """Seeds database and returns record ids by name."""
+    rows = {
+        "thumbnails": [("thumbnail", "thumbnail.jpg")],
+        "records": [],
+        "seasons": [],
+        "videos": [],
+        "tracks": [],
+    }
+
+    def add_video(video_id, record_id, season_id, position):
+        rows["videos"].append(
+            (video_id, record_id, season_id, "thumbnail", "", "", position)
+        )
+        rows["tracks"].append(
+            get_track_row(
+                str(uuid4()), video_id, f"/videos/{video_id}.mp4", METADATA
+            )
+        )
+
+    ids = {}
+    # movie
+    ids["movie"] = str(uuid4())
+    rows["records"].append(
+        (ids["movie"], "thumbnail", "movie", "movie", "", 0, None)
+    )
+    add_video(ids["movie"], ids["movie"], None, 0)
+
+    # series (20 seasons with 50 episodes each)
+    ids["series (1000 episodes)"] = record_id = str(uuid4())
+    rows["records"].append(
+        (record_id, "thumbnail", "series", "series", "", 0, None)
+    )
+    for season_position in range(20):
+        season_id = str(uuid4())
+        rows["seasons"].append(
+            (season_id, record_id, f"s{season_position}", season_position)
+        )
+        for position in range(50):
+            add_video(str(uuid4()), record_id, season_id, position)
+
+    # collection
+    ids["collection (10000 videos)"] = record_id = str(uuid4())
+    rows["records"].append(
+        (record_id, "thumbnail", "collection", "collection", "", 0, None)
+    )
+    for position in range(10000):
+        add_video(str(uuid4()), record_id, None, position)
+
+    with Transaction(index_db, pooled=False) as t:
+        t.cursor.executescript(
+            FluxConfig.SCHEMA_LOCATION.read_text(encoding="utf-8")
+        )
+        for table, values in rows.items():
+            t.cursor.executemany(
+                (
+                    INSERT_TRACK
+                    if table == "tracks"
+                    else f"INSERT INTO {table} VALUES "
+                    + f"({', '.join('?' * len(values[0]))})"
+                ),
+                values,
+            )
+    return ids
+
+
+def main(n: int) -> None:
+    """Run benchmark."""
+    statements = []
+    connect = db_common.connect
+
+    def traced_connect(*args, **kwargs):
+        connection = connect(*args, **kwargs)
+        connection.set_trace_callback(statements.append)
+        return connection
+
+    db_common.connect = traced_connect
+    with TemporaryDirectory() as tmp:
+        FluxConfig.INDEX_LOCATION = Path(tmp)
+        ids = seed(Path(tmp) / FluxConfig.INDEX_DB_FILE)
+        for name, record_id in ids.items():
+            get_record_info(record_id)
+            statements.clear()
+            start = perf_counter()
+            for _ in range(n):
+                get_record_info(record_id)
+            duration = (perf_counter() - start) / n * 1e3
+            print(
+                f"{name:>26}: {duration:8.2f} ms/record, "
+                + f"{len(statements) / n:.0f} statements/record"
+            )
+        pool.close()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20)
@@ -0,0 +1,57 @@
+"""
+Benchmark for the per-query overhead of `flux.db.Transaction`.
+
+Compares unpooled (new connection per transaction) and pooled
+connections for a small read-query as issued by the API (session
+lookup). Run with
+```
+python benchmarks/transaction.py [<number of queries>]
+```
+"""
+
+import sys
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from uuid import uuid4
+
+from flux.config import FluxConfig
+from flux.db import Transaction, pool
+
+
+def run(index_db: Path, session_id: str, n: int, pooled: bool) -> float:
+    """Returns average duration per transaction in microseconds."""
+    start = perf_counter()
+    for _ in range(n):
+        with Transaction(index_db, readonly=True, pooled=pooled) as t:
+            t.cursor.execute(
+                "SELECT username FROM sessions WHERE id=?", (session_id,)
+            )
+    return (perf_counter() - start) / n * 1e6
+
+
+def main(n: int) -> None:
+    """Run benchmark."""
+    with TemporaryDirectory() as tmp:
+        index_db = Path(tmp) / FluxConfig.INDEX_DB_FILE
+        session_id = str(uuid4())
+        with Transaction(index_db, pooled=False) as t:
+            t.cursor.executescript(
+                FluxConfig.SCHEMA_LOCATION.read_text(encoding="utf-8")
+            )
+            t.cursor.execute("INSERT INTO users (name) VALUES ('user0')")
+            t.cursor.execute(
+                "INSERT INTO sessions (id, username) VALUES (?, 'user0')",
+                (session_id,),
+            )
+
+        for pooled in [False, True]:
+            print(
+                f"{'pooled' if pooled else 'unpooled':>8}: "
+                + f"{run(index_db, session_id, n, pooled):8.1f} µs/query"
+            )
+        pool.close()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10000)
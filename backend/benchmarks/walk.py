@@ -0,0 +1,149 @@
+"""
+Benchmark for collecting and inspecting the files of a record (as
+done by `flux index add` before probing).
+
+Generates a series (100 seasons with 100 episodes each) and a
+collection (100 nested directories with 400 files each) and compares
+the previous traversal (`Path.glob` and `Path.is_file`/`Path.is_dir`
+for every entry) with the current one (`flux.cli.index.walk`; a single
+`os.scandir` per directory). Reports the number of `stat`-calls
+(`os.stat` and `os.lstat`, including the ones by `pathlib`) and
+directory listings as well as the duration for determining the record
+type, collecting the files, and the file inspection of
+`AddToIndex.process_video_file` (without probing). Run with
+```
+python benchmarks/walk.py [<directory for test data>]
+```
+Use a directory on a network filesystem to observe the effect of
+metadata round-trips.
+"""
+
+import os
+import sys
+from collections import Counter
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+from flux.cli.index.add import AddToIndex
+
+
+CALLS: Counter = Counter()
+
+
+def count(name: str, func):
+    """Returns wrapper for `func` that counts calls as `name`."""
+
+    def wrapper(*args, **kwargs):
+        CALLS[name] += 1
+        return func(*args, **kwargs)
+
+    return wrapper
+
+
+def generate(directory: Path) -> tuple[Path, Path]:
+    """Generates test data and returns series and collection."""
+    series = directory / "series"
+    for season in range(100):
+        (series / f"season{season:03d}").mkdir(parents=True)
+        for episode in range(100):
+            (series / f"season{season:03d}" / f"e{episode:03d}.mp4").touch()
+    (series / "special.mp4").touch()
+    collection = directory / "collection"
+    for i in range(100):
+        (collection / f"{i // 10}" / f"{i % 10}").mkdir(parents=True)
+        for j in range(400):
+            (collection / f"{i // 10}" / f"{i % 10}" / f"{j}.mp4").touch()
+        (collection / f"{i // 10}" / "info.txt").touch()
+    return series, collection
+
+
+def heuristic_previous(target: Path):
+    """Previous `AddToIndex.get_target_heuristic`."""
+    if target.is_file():
+        return "movie"
+    files = [f for f in target.glob("*") if f.is_file()]
+    dirs = [f for f in target.glob("*") if f.is_dir()]
+    if len(files) == 0 and len(dirs) == 0:
+        return None
+    if len(dirs) == 0:
+        return "collection"
+    for dir_ in dirs:
+        if len([subdir for subdir in dir_.glob("*") if subdir.is_dir()]) > 0:
+            return "collection"
+    return "series"
+
+
+def collect_previous(type_: str, path: Path) -> list[Path]:
+    """Previous file collection of `flux index add`."""
+    if type_ == "collection":
+        return sorted(
+            filter(lambda p: p.is_file(), path.glob("**/*")), key=str
+        )
+    return [
+        file
+        for directory in sorted(
+            filter(lambda p: p.is_dir(), path.glob("*")),
+            key=lambda p: p.name,
+        )
+        for file in sorted(
+            filter(lambda p: p.is_file(), directory.glob("*")),
+            key=lambda p: p.name,
+        )
+    ] + sorted(
+        filter(lambda p: p.is_file(), path.glob("*")), key=lambda p: p.name
+    )
+
+
+def inspect_previous(file: Path) -> None:
+    """Previous inspection of `AddToIndex.process_video_file`."""
+    if file.is_file() and AddToIndex.is_video_file(file):
+        file.stat()
+
+
+def run_previous(target: Path) -> int:
+    """Run previous implementation."""
+    files = collect_previous(heuristic_previous(target), target)
+    for file in files:
+        inspect_previous(file)
+    return len(files)
+
+
+def run_current(target: Path) -> int:
+    """Run current implementation."""
+    files = AddToIndex.collect_files(
+        AddToIndex.get_target_heuristic(target), target
+    )
+    for _, file in files:
+        AddToIndex.process_video_file(file, "video")
+    return len(files)
+
+
+def main(directory: Path) -> None:
+    """Run benchmark."""
+    # skip probing
+    AddToIndex.get_metadata = staticmethod(lambda _: {})
+    os.stat = count("stat", os.stat)
+    os.lstat = count("lstat", os.lstat)
+    os.scandir = count("scandir", os.scandir)
+
+    with TemporaryDirectory(dir=directory) as tmp:
+        for target in generate(Path(tmp)):
+            for name, run in [
+                ("previous", run_previous),
+                ("current", run_current),
+            ]:
+                CALLS.clear()
+                start = perf_counter()
+                files = run(target)
+                duration = perf_counter() - start
+                print(
+                    f"{target.name:>10} {name:>8}: {files} files, "
+                    + f"{CALLS['stat'] + CALLS['lstat']:6d} stat-calls, "
+                    + f"{CALLS['scandir']:5d} listings, "
+                    + f"{duration:6.2f} s"
+                )
+
+
+if __name__ == "__main__":
+    main(Path(sys.argv[1]) if len(sys.argv) > 1 else Path.cwd())
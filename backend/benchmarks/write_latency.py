@@ -0,0 +1,169 @@
+"""
+Benchmark for the latency of API-writes during imports.
+
+Writes a collection of 20000 videos (as done by `flux index add`)
+while another thread continuously updates a playback (as done by the
+API during playback). Compares a single transaction per batch of
+files with chunked writes via `flux.db.BatchWriter` (without and with
+a pause of `FluxConfig.DB_WRITE_CHUNK_PAUSE` after every chunk) and
+reports the maximum duration for which the importer holds the write
+lock as well as the median and maximum latency of the
+playback-updates. Run with
+```
+python benchmarks/write_latency.py [<rows per chunk>]
+```
+"""
+
+import sys
+import threading
+from pathlib import Path
+from statistics import median
+from tempfile import TemporaryDirectory
+from time import perf_counter, sleep
+from uuid import uuid4
+
+from flux.config import FluxConfig
+from flux.db import Transaction, BatchWriter, pool, set_journal_mode
+from flux.db.tracks import INSERT_TRACK, get_track_row
+
+
+METADATA = {
+    "format": {"duration": "10.0", "format_name": "mp4"},
+    "streams": [{"codec_type": "video", "codec_name": "h264"}],
+}
+VIDEOS = 20000
+BATCH_SIZE = 5000
+
+
+def seed(index_db: Path) -> tuple[str, str]:
+    """Seeds database and returns ids of record and video."""
+    record_id = str(uuid4())
+    video_id = str(uuid4())
+    with Transaction(index_db, pooled=False) as t:
+        t.cursor.executescript(
+            FluxConfig.SCHEMA_LOCATION.read_text(encoding="utf-8")
+        )
+        t.cursor.execute("INSERT INTO users (name) VALUES ('user0')")
+        t.cursor.execute("INSERT INTO thumbnails VALUES ('t', 't.jpg')")
+        t.cursor.execute(
+            "INSERT INTO records VALUES (?, 't', 'movie', '', '', 0, NULL)",
+            (record_id,),
+        )
+        t.cursor.execute(
+            "INSERT INTO videos VALUES (?, ?, NULL, NULL, '', '', 0)",
+            (video_id, record_id),
+        )
+        t.cursor.execute(
+            "INSERT INTO playbacks VALUES ('user0', ?, ?, 0, 0)",
+            (record_id, video_id),
+        )
+    set_journal_mode(index_db, "WAL")
+    return record_id, video_id
+
+
+def get_rows(record_id: str, start: int) -> tuple[list, list]:
+    """Returns rows for videos and tracks of a batch."""
+    videos, tracks = [], []
+    for position in range(start, start + BATCH_SIZE):
+        video_id = str(uuid4())
+        videos.append((video_id, record_id, None, None, "", "", position))
+        tracks.append(
+            get_track_row(str(uuid4()), video_id, f"/{video_id}", METADATA)
+        )
+    return videos, tracks
+
+
+def write_single(index_db: Path, record_id: str) -> list[float]:
+    """Writes batches in one transaction each; returns hold times."""
+    hold_times = []
+    for start in range(0, VIDEOS, BATCH_SIZE):
+        videos, tracks = get_rows(record_id, start)
+        with Transaction(index_db) as t:
+            begin = perf_counter()
+            for video in videos:
+                t.cursor.execute(
+                    "INSERT INTO videos VALUES (?, ?, ?, ?, ?, ?, ?)", video
+                )
+            for track in tracks:
+                t.cursor.execute(INSERT_TRACK, track)
+        hold_times.append(perf_counter() - begin)
+    return hold_times
+
+
+def write_chunked(
+    index_db: Path, record_id: str, chunk_rows: int, chunk_pause: float
+) -> list[float]:
+    """Writes batches with `BatchWriter`; returns hold times."""
+    with BatchWriter(
+        index_db,
+        chunk_rows=chunk_rows,
+        chunk_duration=FluxConfig.DB_WRITE_CHUNK_DURATION,
+        chunk_pause=chunk_pause,
+    ) as writer:
+        for start in range(0, VIDEOS, BATCH_SIZE):
+            videos, tracks = get_rows(record_id, start)
+            for video, track in zip(videos, tracks):
+                writer.add(
+                    "INSERT INTO videos VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [video],
+                )
+                writer.add(INSERT_TRACK, [track])
+                writer.checkpoint()
+    return writer.hold_times
+
+
+def main(chunk_rows: int) -> None:
+    """Run benchmark."""
+    for name, write in [
+        ("single", write_single),
+        (
+            "chunked",
+            lambda db, record_id: write_chunked(db, record_id, chunk_rows, 0),
+        ),
+        (
+            "paced",
+            lambda db, record_id: write_chunked(
+                db, record_id, chunk_rows, FluxConfig.DB_WRITE_CHUNK_PAUSE
+            ),
+        ),
+    ]:
+        with TemporaryDirectory() as tmp:
+            index_db = Path(tmp) / FluxConfig.INDEX_DB_FILE
+            record_id, video_id = seed(index_db)
+            latencies = []
+            done = threading.Event()
+
+            def update_playback():
+                # pylint: disable=cell-var-from-loop
+                while not done.is_set():
+                    start = perf_counter()
+                    with Transaction(index_db) as t:
+                        t.cursor.execute(
+                            """
+                            UPDATE playbacks SET timestamp = timestamp + 1
+                            WHERE username = 'user0' AND video_id = ?
+                            """,
+                            (video_id,),
+                        )
+                    latencies.append(perf_counter() - start)
+                    sleep(0.001)
+
+            thread = threading.Thread(target=update_playback)
+            thread.start()
+            hold_times = write(index_db, record_id)
+            done.set()
+            thread.join()
+            print(
+                f"{name:>8}: lock held max {max(hold_times) * 1e3:8.2f} ms, "
+                + f"playback-update median {median(latencies) * 1e3:6.2f} "
+                + f"ms / max {max(latencies) * 1e3:8.2f} ms"
+            )
+        pool.close()
+
+
+if __name__ == "__main__":
+    main(
+        int(sys.argv[1])
+        if len(sys.argv) > 1
+        else FluxConfig.DB_WRITE_CHUNK_ROWS
+    )
@@ -1,11 +1,15 @@
 """Common definitions for flux APIs."""
 
-from typing import Optional, Mapping, Iterable, Callable, Any
+from typing import Optional, Mapping, Iterable, Callable, Any, Hashable
 from functools import wraps
+from collections import OrderedDict
+from threading import Lock
+from time import monotonic
 
 from flask import request, Response, jsonify
 
 from flux.db import Transaction
+from flux.db.sessions import get_sessions_revision
 from flux.config import FluxConfig
 from flux.exceptions import UnauthorizedException, NotFoundException
 
@@ -25,6 +29,128 @@ def header_auth(password: Optional[str]):
     return decorator
 
 
+class SessionCache:
+    """
+    Thread-safe in-memory cache for the association of session-ids and
+    usernames.
+
+    The cache is bounded to `maxsize` entries (least recently used
+    entries are dropped first) and entries expire after `ttl` seconds.
+
+    Every process (e.g., gunicorn-worker) has its own cache. Changes to
+    sessions in other processes are observed via a shared `revision`
+    (see `flux.db.sessions`) that is passed to `get` and `put`: if it
+    differs from the revision of the cached entries, all entries are
+    discarded. Revocations therefore take effect with the next request
+    in all processes. Only sessions that are deleted without advancing
+    the revision (e.g., by editing the database manually) stay valid
+    for up to `ttl` seconds.
+    """
+
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._entries: OrderedDict[str, tuple[str, float]] = OrderedDict()
+        self._revision: Optional[Hashable] = None
+        self._lock = Lock()
+
+    def _check_revision(self, revision: Optional[Hashable]) -> bool:
+        """
+        Discards all entries if `revision` differs from the revision of
+        the cached entries. Returns `True` if entries are still valid.
+        (Requires `_lock`.)
+        """
+        if revision == self._revision:
+            return True
+        self._entries.clear()
+        self._revision = revision
+        self.invalidations += 1
+        return False
+
+    def get(
+        self, session_id: str, revision: Optional[Hashable] = None
+    ) -> Optional[str]:
+        """
+        Returns cached username for `session_id` or `None` (see
+        `SessionCache` for `revision`).
+        """
+        with self._lock:
+            self._check_revision(revision)
+            entry = self._entries.get(session_id)
+            if entry is not None and entry[1] < monotonic():
+                del self._entries[session_id]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(session_id)
+            self.hits += 1
+            return entry[0]
+
+    def put(
+        self,
+        session_id: str,
+        username: str,
+        revision: Optional[Hashable] = None,
+    ) -> None:
+        """
+        Adds association of `session_id` and `username` to cache. The
+        `revision` has to be determined before loading the session
+        (entries are only added if it is still current).
+        """
+        if self.maxsize < 1:
+            return
+        with self._lock:
+            if not self._check_revision(revision):
+                return
+            self._entries[session_id] = (username, monotonic() + self.ttl)
+            self._entries.move_to_end(session_id)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, session_id: str) -> None:
+        """Removes `session_id` from cache."""
+        with self._lock:
+            self._entries.pop(session_id, None)
+
+    def invalidate_user(self, username: str) -> None:
+        """Removes all sessions of `username` from cache."""
+        with self._lock:
+            for session_id in [
+                session_id
+                for session_id, entry in self._entries.items()
+                if entry[0] == username
+            ]:
+                del self._entries[session_id]
+
+    def clear(self) -> None:
+        """Removes all entries and resets counters."""
+        with self._lock:
+            self._entries.clear()
+            self._revision = None
+            self.hits = 0
+            self.misses = 0
+            self.invalidations = 0
+
+    def stats(self) -> dict:
+        """Returns cache statistics."""
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "invalidations": self.invalidations,
+            }
+
+
+session_cache = SessionCache(
+    FluxConfig.SESSION_CACHE_SIZE, FluxConfig.SESSION_CACHE_TTL
+)
+
+
 def session_cookie_auth(delete_cookie_on_fail: bool = False):
     """
     Protect endpoint with auth via session-cookie.
@@ -39,14 +165,23 @@ def session_cookie_auth(delete_cookie_on_fail: bool = False):
             if FluxConfig.SESSION_COOKIE_NAME not in request.cookies:
                 raise UnauthorizedException("Missing session cookie.")
             session_id = request.cookies[FluxConfig.SESSION_COOKIE_NAME]
-            with Transaction(
-                FluxConfig.INDEX_LOCATION / FluxConfig.INDEX_DB_FILE,
-                readonly=True,
-            ) as t:
-                t.cursor.execute(
-                    "SELECT username FROM sessions WHERE id=?", (session_id,)
-                )
-            if len(t.data) == 0:
+            revision = get_sessions_revision(
+                FluxConfig.INDEX_LOCATION / FluxConfig.SESSIONS_REVISION_FILE
+            )
+            username = session_cache.get(session_id, revision)
+            if username is None:
+                with Transaction(
+                    FluxConfig.INDEX_LOCATION / FluxConfig.INDEX_DB_FILE,
+                    readonly=True,
+                ) as t:
+                    t.cursor.execute(
+                        "SELECT username FROM sessions WHERE id=?",
+                        (session_id,),
+                    )
+                if len(t.data) > 0:
+                    username = t.data[0][0]
+                    session_cache.put(session_id, username, revision)
+            if username is None:
                 # unknown session
                 r = jsonify(
                     wrap_response_json(
@@ -64,7 +199,7 @@ def session_cookie_auth(delete_cookie_on_fail: bool = False):
                 if delete_cookie_on_fail:
                     r.delete_cookie(FluxConfig.SESSION_COOKIE_NAME)
                 return r, 200
-            return route(session_id, t.data[0][0], **kwargs)
+            return route(session_id, username, **kwargs)
 
         return __
 
@@ -1,6 +1,6 @@
 """Definition of the flux-api"""
 
-import re
+from typing import Optional
 from pathlib import Path
 
 from flask import Flask, Response, request, send_from_directory
@@ -11,6 +11,49 @@ from flux import exceptions
 from .common import session_cookie_auth
 
 
+class FileRange:
+    """
+    Read-only file-like view on the byte range `[start, start + length)`
+    of a file.
+
+    The underlying file descriptor is positioned at `start` and exposed
+    via `fileno` so that wsgi-servers with `wsgi.file_wrapper`-support
+    can use `sendfile` (with Content-Length as byte count). Otherwise,
+    `read` never returns data past the end of the range.
+    """
+
+    def __init__(self, path: Path, start: int, length: int) -> None:
+        self.length = length
+        self._remaining = length
+        # pylint: disable=consider-using-with
+        self._file = open(path, "rb")
+        self._file.seek(start)
+
+    def fileno(self) -> int:
+        """Returns file descriptor of underlying file."""
+        return self._file.fileno()
+
+    def seek(self, offset: int, whence: int = 0) -> int:
+        """Seeks underlying file."""
+        return self._file.seek(offset, whence)
+
+    def tell(self) -> int:
+        """Returns position in underlying file."""
+        return self._file.tell()
+
+    def read(self, size: Optional[int] = -1) -> bytes:
+        """Reads at most `size` bytes from range."""
+        if size is None or size < 0 or size > self._remaining:
+            size = self._remaining
+        data = self._file.read(size)
+        self._remaining -= len(data)
+        return data
+
+    def close(self) -> None:
+        """Closes underlying file."""
+        self._file.close()
+
+
 def register_api(app: Flask):
     """Sets up api endpoints."""
 
@@ -41,9 +84,6 @@ def register_api(app: Flask):
             FluxConfig.INDEX_LOCATION / FluxConfig.THUMBNAILS, t.data[0][0]
         )
 
-    # local cache for association between trackId and filepath
-    track_cache: dict[str, Path] = {}
-
     @app.route("/video/<track_id>", methods=["GET"])
     @session_cookie_auth()
     def video(
@@ -54,46 +94,75 @@ def register_api(app: Flask):
         if "range" not in request.headers:
             return Response(status=400)
 
-        video_path = track_cache.get(track_id)
-        if video_path is None:
-            with Transaction(
-                FluxConfig.INDEX_LOCATION / FluxConfig.INDEX_DB_FILE,
-                readonly=True
-            ) as t:
-                t.cursor.execute(
-                    "SELECT path FROM tracks WHERE id=?",
-                    (track_id,),
-                )
-            if len(t.data) > 0 and t.data[0][0] is not None:
-                track_cache[track_id] = Path(t.data[0][0])
-                video_path = track_cache[track_id]
-
-        if video_path is None:
+        # the path is looked up for every request (a cache could not
+        # follow changes of the availability, e.g. by `flux index verify`)
+        with Transaction(
+            FluxConfig.INDEX_LOCATION / FluxConfig.INDEX_DB_FILE,
+            readonly=True
+        ) as t:
+            t.cursor.execute(
+                "SELECT path FROM tracks WHERE id=? AND available = 1",
+                (track_id,),
+            )
+        if len(t.data) == 0 or t.data[0][0] is None:
             raise exceptions.NotFoundException(f"Unknown track '{track_id}'.")
+        video_path = Path(t.data[0][0])
 
-        size = video_path.stat().st_size
-
-        chunk_size = 10**6  # ~1MB
-        # print(
-        #     request.headers["range"],
-        #     int(re.sub(r"\D", "", request.headers["range"])),
-        # )
-        start = int(re.sub(r"\D", "", request.headers["range"]))
-        end = min(start + chunk_size, size - 1)
-
-        content_lenght = end - start + 1
+        try:
+            size = video_path.stat().st_size
+        except OSError as exc_info:
+            # file has been (re-)moved without updating the index
+            raise exceptions.NotFoundException(
+                f"Unavailable track '{track_id}'."
+            ) from exc_info
+
+        # parse range (only single ranges are supported; this includes
+        # open-ended 'bytes=<start>-' and suffix-ranges 'bytes=-<length>')
+        range_ = (
+            None
+            if request.range is None
+            else request.range.range_for_length(size)
+        )
+        if range_ is None:
+            return Response(
+                status=416, headers={"Content-Range": f"bytes */{size}"}
+            )
+        start, stop = range_
+        if FluxConfig.VIDEO_RANGE_MAX_SIZE is not None:
+            stop = min(stop, start + FluxConfig.VIDEO_RANGE_MAX_SIZE)
 
-        def get_chunk(video_path, start, chunk_size):
-            with open(video_path, "rb") as f:
-                f.seek(start)
-                chunk = f.read(chunk_size)
-            return chunk
+        content_length = stop - start
 
         headers = {
-            "Content-Range": f"bytes {start}-{end}/{size}",
+            "Content-Range": f"bytes {start}-{stop - 1}/{size}",
             "Accept-Ranges": "bytes",
-            "Content-Length": content_lenght,
+            "Content-Length": content_length,
             "Content-Type": "application/octet-stream",
         }
 
-        return Response(get_chunk(video_path, start, chunk_size), 206, headers)
+        # let the wsgi-server pass the range from the page cache to the
+        # socket (via sendfile) if possible
+        file_wrapper = request.environ.get("wsgi.file_wrapper")
+        if file_wrapper is not None:
+            return Response(
+                file_wrapper(
+                    FileRange(video_path, start, content_length),
+                    FluxConfig.VIDEO_CHUNK_SIZE,
+                ),
+                206,
+                headers,
+                direct_passthrough=True,
+            )
+
+        def stream(file_range: FileRange):
+            try:
+                while chunk := file_range.read(FluxConfig.VIDEO_CHUNK_SIZE):
+                    yield chunk
+            finally:
+                file_range.close()
+
+        return Response(
+            stream(FileRange(video_path, start, content_length)),
+            206,
+            headers,
+        )
@@ -1 +1 @@
-from . import default, index, playback, user
+from . import default, index, jobs, playback, user
@@ -3,14 +3,16 @@
 from typing import Optional, Mapping
 import sys
 import re
-from json import loads
+from json import loads, dumps
 import base64
+from hashlib import sha256
 from uuid import uuid4
 import subprocess
 
 from flask import Flask, request, jsonify
 
 from flux.db import Transaction
+from flux.db.tracks import TRACK_METADATA_COLUMNS, decompress_metadata
 from flux.config import FluxConfig
 from flux import exceptions
 from flux.api import common
@@ -21,6 +23,26 @@ CONTENT_TYPES = [
     "movie",
     "collection",
 ]
+# columns of videos and tracks as required by `get_video_info`
+VIDEO_INFO_COLUMNS = ", ".join(
+    [
+        "videos.id",
+        "videos.name",
+        "videos.description",
+        "videos.thumbnail_id",
+        "tracks.id",
+    ]
+    + [f"tracks.{column}" for column in TRACK_METADATA_COLUMNS]
+)
+# sort orders for listing records as tuple of sort key, unique tie
+# breaker, and whether the order is descending (all combinations are
+# backed by indices, see schema)
+SORT_ORDERS = {
+    "relevance": ("search_matches.rank", "records.id", False),
+    "name": ("records.name COLLATE NOCASE", "records.id", False),
+    "added-at": ("records.added", "records.id", True),
+    "last-watched": ("playbacks.changed", "playbacks.record_id", True),
+}
 
 
 def validate_content_type(
@@ -59,6 +81,77 @@ def validate_range(
     return True, ""
 
 
+def validate_sort(
+    # pylint: disable=unused-argument
+    sort: Optional[str],
+    *,
+    name=None,
+) -> tuple[bool, str]:
+    """
+    Returns tuple
+    * validity
+    * message (in case of invalidity)
+    """
+    if sort is None:
+        return None
+    if sort not in SORT_ORDERS:
+        return False, f"Unknown sort order '{sort}'."
+    return True, ""
+
+
+def validate_limit(
+    # pylint: disable=unused-argument
+    limit: Optional[str],
+    *,
+    name=None,
+) -> tuple[bool, str]:
+    """
+    Returns tuple
+    * validity
+    * message (in case of invalidity)
+    """
+    if limit is None:
+        return None
+    if not re.fullmatch(r"[0-9]+", limit) or int(limit) == 0:
+        return False, f"Bad limit '{limit}'."
+    return True, ""
+
+
+def encode_cursor(cursor: Mapping) -> str:
+    """Returns opaque (url-safe) representation of `cursor`."""
+    return (
+        base64.urlsafe_b64encode(dumps(cursor).encode("utf-8"))
+        .decode("utf-8")
+        .rstrip("=")
+    )
+
+
+def decode_cursor(cursor: str) -> Optional[dict]:
+    """
+    Returns cursor from opaque representation or `None` if not valid.
+    """
+    try:
+        data = loads(
+            base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        )
+    except ValueError:
+        return None
+    if (
+        not isinstance(data, dict)
+        or not isinstance(data.get("filters"), str)
+        or not isinstance(data.get("count"), int)
+        or not isinstance(data.get("key"), list)
+        or len(data["key"]) != 2
+    ):
+        return None
+    return data
+
+
+def get_filters_hash(*filters) -> str:
+    """Returns hash identifying a set of `filters`."""
+    return sha256(dumps(filters).encode("utf-8")).hexdigest()[:16]
+
+
 def parse_range(range_: Optional[str]) -> Optional[tuple[int, int]]:
     """Returns either `None` or range-tuple."""
     if range_ is None:
@@ -67,252 +160,166 @@ def parse_range(range_: Optional[str]) -> Optional[tuple[int, int]]:
     return tuple(map(int, range_.split("-")))
 
 
-def parse_and_filter_track_metadata(
-    metadata: Optional[str | Mapping],
-) -> Optional[Mapping]:
-    """Parses and filters ffprobe-metadata."""
-    if metadata is None:
-        return None
-    if isinstance(metadata, str):
-        metadata = loads(metadata)
-    return {
-        "duration": metadata.get("format", {}).get("duration"),
-        "format_long_name": metadata.get("format", {}).get("format_long_name"),
-        "format_name": metadata.get("format", {}).get("format_name"),
-        "bit_rate": metadata.get("format", {}).get("bit_rate"),
-    }
+def get_search_matches_cte(search: str) -> tuple[str, tuple]:
+    """
+    Returns tuple of common table expression 'search_matches' (with
+    columns 'record_id' and 'rank'; smaller rank is better) for records
+    where the record's or any of its videos' name or description
+    contains `search` (case-insensitive) and the corresponding query
+    arguments.
+    """
+    if len(search) >= 3:
+        # full text search (trigram-index); matches in name are weighted
+        # higher than matches in description
+        condition = "{table} MATCH ?"
+        rank = "bm25({table}, 10.0, 1.0)"
+        args = ('"' + search.replace('"', '""') + '"',) * 2
+    else:
+        # patterns with less than three characters cannot be matched
+        # via trigrams
+        condition = (
+            r"({table}.name LIKE ? ESCAPE '\' "
+            + r"OR {table}.description LIKE ? ESCAPE '\')"
+        )
+        rank = "-1.0"
+        pattern = (
+            "%"
+            + search.replace("\\", "\\\\")
+            .replace("%", r"\%")
+            .replace("_", r"\_")
+            + "%"
+        )
+        args = (pattern,) * 4
+    return (
+        f"""
+        search_matches (record_id, rank) AS (
+            SELECT record_id, MIN(rank) FROM (
+                SELECT
+                    records.id AS record_id,
+                    {rank.format(table="records_search")} AS rank
+                FROM
+                    records_search
+                    JOIN records ON records.rowid = records_search.rowid
+                WHERE {condition.format(table="records_search")}
+                UNION ALL
+                -- prioritize matches in record over matches in videos
+                SELECT
+                    videos.record_id,
+                    0.5 * {rank.format(table="videos_search")}
+                FROM
+                    videos_search
+                    JOIN videos ON videos.rowid = videos_search.rowid
+                WHERE {condition.format(table="videos_search")}
+            )
+            GROUP BY record_id
+        )
+        """,
+        args,
+    )
+
+
+def get_video_info(row: tuple) -> dict:
+    """
+    Returns video-info from query result `row` (see
+    `VIDEO_INFO_COLUMNS`).
+    """
+    video = dict(
+        zip(("id", "name", "description", "thumbnailId", "trackId"), row)
+    )
+    video["metadata"] = dict(zip(TRACK_METADATA_COLUMNS, row[5:]))
+    return video
 
 
 def get_record_info(id_: str):
     """
     Load record and record-content data from database.
 
+    The entire record (including seasons, videos, and tracks) is loaded
+    with a single query and assembled in a single pass.
+
     Keyword arguments:
     id_ -- recordId or videoId.
     """
-
-    # * record: prioritize query with recordId
     with Transaction(
         FluxConfig.INDEX_LOCATION / FluxConfig.INDEX_DB_FILE, readonly=True
     ) as t:
+        # prioritize recordId over videoId
         t.cursor.execute(
-            """
-            SELECT id, type, name, description, thumbnail_id
-            FROM records
-            WHERE id=?
+            f"""
+            WITH record (id) AS (
+                SELECT id FROM records WHERE id = ?
+                UNION ALL
+                SELECT record_id FROM videos WHERE id = ?
+                LIMIT 1
+            )
+            SELECT
+                records.id,
+                records.type,
+                records.name,
+                records.description,
+                records.thumbnail_id,
+                seasons.id,
+                seasons.name,
+                {VIDEO_INFO_COLUMNS}
+            FROM
+                record
+                JOIN records ON records.id = record.id
+                LEFT JOIN videos ON videos.record_id = records.id
+                LEFT JOIN seasons ON seasons.id = videos.season_id
+                LEFT JOIN tracks
+                    ON tracks.video_id = videos.id AND tracks.available = 1
+            ORDER BY
+                videos.season_id IS NULL, seasons.position, videos.position
             """,
-            (id_,),
+            (id_, id_),
         )
 
-    # * if no matching recordId, try as videoId
-    if len(t.data) == 0:
-        with Transaction(
-            FluxConfig.INDEX_LOCATION / FluxConfig.INDEX_DB_FILE,
-            readonly=True,
-        ) as t:
-            t.cursor.execute(
-                """
-                SELECT
-                    records.id,
-                    records.type,
-                    records.name,
-                    records.description,
-                    records.thumbnail_id
-                FROM records
-                JOIN videos ON records.id = videos.record_id
-                WHERE videos.id = ?
-                """,
-                (id_,),
-            )
-
     if len(t.data) == 0:
         raise exceptions.NotFoundException(f"Unknown record or video '{id_}'.")
 
     record = dict(
         zip(
             ("id", "type", "name", "description", "thumbnailId"),
-            t.data[0],
+            t.data[0][:5],
         )
     )
     id_ = record["id"]
 
     match record["type"]:
         case "movie":
-            with Transaction(
-                FluxConfig.INDEX_LOCATION / FluxConfig.INDEX_DB_FILE,
-                readonly=True,
-            ) as t:
-                t.cursor.execute(
-                    """
-                    SELECT
-                        videos.id,
-                        tracks.id,
-                        tracks.metadata_json
-                    FROM
-                        videos
-                        JOIN tracks ON videos.id = tracks.video_id
-                    WHERE videos.record_id=?
-                    """,
-                    (id_,),
-                )
             if len(t.data) != 1:
                 raise ValueError(f"Missing or bad data for record '{id_}'")
-            record["content"] = dict(
-                zip(
-                    (
-                        "id",
-                        "trackId",
-                        "metadata",
-                        "name",
-                        "description",
-                        "thumbnailId",
-                    ),
-                    # the video-name/description/thumbnailId is omitted
-                    # in db (use record instead)
-                    t.data[0]
-                    + (
-                        record["name"],
-                        record["description"],
-                        record["thumbnailId"],
-                    ),
+            if t.data[0][11] is None:
+                raise exceptions.NotFoundException(
+                    f"Video of record '{id_}' is not available."
                 )
-            )
-            record["content"]["metadata"] = parse_and_filter_track_metadata(
-                record["content"]["metadata"]
-            )
+            record["content"] = get_video_info(t.data[0][7:]) | {
+                # the video-name/description/thumbnailId is omitted in db
+                # (use record instead)
+                "name": record["name"],
+                "description": record["description"],
+                "thumbnailId": record["thumbnailId"],
+            }
         case "series":
-            record["content"] = {}
-            with Transaction(
-                FluxConfig.INDEX_LOCATION / FluxConfig.INDEX_DB_FILE,
-                readonly=True,
-            ) as t:
-                # * seasons
-                record["content"]["seasons"] = []
-                t.cursor.execute(
-                    """
-                    SELECT id, name
-                    FROM seasons
-                    WHERE record_id=?
-                    ORDER BY position
-                    """,
-                    (id_,),
-                )
-                for row in t.cursor.fetchall():
-                    season = dict(zip({"id", "name"}, row))
+            record["content"] = {"seasons": [], "specials": []}
+            season = None
+            for row in t.data:
+                if row[11] is None:
+                    continue
+                video = get_video_info(row[7:])
+                if row[5] is None:
+                    record["content"]["specials"].append(video)
+                    continue
+                if season is None or season["id"] != row[5]:
+                    season = {"id": row[5], "name": row[6], "episodes": []}
                     record["content"]["seasons"].append(season)
-                    t.cursor.execute(
-                        """
-                        SELECT
-                            videos.id,
-                            videos.name,
-                            videos.description,
-                            videos.thumbnail_id,
-                            tracks.id,
-                            tracks.metadata_json
-                        FROM
-                            videos
-                            JOIN tracks ON videos.id = tracks.video_id
-                        WHERE videos.record_id=? AND videos.season_id=?
-                        ORDER BY videos.position
-                        """,
-                        (id_, row[0]),
-                    )
-                    season["episodes"] = []
-                    for row_ in t.cursor.fetchall():
-                        episode = dict(
-                            zip(
-                                (
-                                    "id",
-                                    "name",
-                                    "description",
-                                    "thumbnailId",
-                                    "trackId",
-                                    "metadata",
-                                ),
-                                row_,
-                            )
-                        )
-                        episode["metadata"] = parse_and_filter_track_metadata(
-                            episode["metadata"]
-                        )
-                        season["episodes"].append(episode)
-                # * specials
-                record["content"]["specials"] = []
-                t.cursor.execute(
-                    """
-                    SELECT
-                        videos.id,
-                        videos.name,
-                        videos.description,
-                        videos.thumbnail_id,
-                        tracks.id,
-                        tracks.metadata_json
-                    FROM
-                        videos
-                        JOIN tracks ON videos.id = tracks.video_id
-                    WHERE videos.record_id=? AND videos.season_id IS NULL
-                    ORDER BY videos.position
-                    """,
-                    (id_,),
-                )
-                for row in t.cursor.fetchall():
-                    special = dict(
-                        zip(
-                            (
-                                "id",
-                                "name",
-                                "description",
-                                "thumbnailId",
-                                "trackId",
-                                "metadata",
-                            ),
-                            row,
-                        )
-                    )
-                    special["metadata"] = parse_and_filter_track_metadata(
-                        special["metadata"]
-                    )
-                    record["content"]["specials"].append(special)
+                season["episodes"].append(video)
         case "collection":
-            record["content"] = []
-            with Transaction(
-                FluxConfig.INDEX_LOCATION / FluxConfig.INDEX_DB_FILE,
-                readonly=True,
-            ) as t:
-                t.cursor.execute(
-                    """
-                    SELECT
-                        videos.id,
-                        videos.name,
-                        videos.description,
-                        videos.thumbnail_id,
-                        tracks.id,
-                        tracks.metadata_json
-                    FROM
-                        videos
-                        JOIN tracks ON videos.id = tracks.video_id
-                    WHERE videos.record_id=?
-                    """,
-                    (id_,),
-                )
-            for row in t.data:
-                video = dict(
-                    zip(
-                        (
-                            "id",
-                            "name",
-                            "description",
-                            "thumbnailId",
-                            "trackId",
-                            "metadata",
-                        ),
-                        row,
-                    )
-                )
-                video["metadata"] = parse_and_filter_track_metadata(
-                    video["metadata"]
-                )
-                record["content"].append(video)
+            record["content"] = [
+                get_video_info(row[7:])
+                for row in t.data
+                if row[11] is not None
+            ]
         case _:
             raise ValueError(
                 f"Unknown record-type '{record['type']}' for record/video "
@@ -336,6 +343,9 @@ def register_api(app: Flask):
         type_ = request.args.get("type")
         range_ = request.args.get("range")
         continue_ = request.args.get("continue", "false") == "true"
+        sort = request.args.get("sort")
+        limit = request.args.get("limit")
+        cursor = request.args.get("cursor")
         if type_ is not None:
             valid, msg = common.run_validation(
                 [validate_content_type],
@@ -355,99 +365,190 @@ def register_api(app: Flask):
             if not valid:
                 raise exceptions.BadRequestException(msg)
             range_ = parse_range(range_)
+        if sort is not None:
+            valid, msg = common.run_validation(
+                [validate_sort],
+                sort,
+                required=False,
+                name="sort",
+            )
+            if not valid:
+                raise exceptions.BadRequestException(msg)
+            if sort == "relevance" and not search:
+                raise exceptions.BadRequestException(
+                    "Sort order 'relevance' requires search."
+                )
+        elif continue_:
+            sort = "last-watched"
+        elif search:
+            sort = "relevance"
+        else:
+            sort = "name"
+        if limit is not None:
+            valid, msg = common.run_validation(
+                [validate_limit],
+                limit,
+                required=False,
+                name="limit",
+            )
+            if not valid:
+                raise exceptions.BadRequestException(msg)
+            limit = int(limit)
+        if range_ is not None and (limit is not None or cursor is not None):
+            raise exceptions.BadRequestException(
+                "Range cannot be combined with limit or cursor."
+            )
+        filters_hash = get_filters_hash(search or None, type_, continue_, sort)
+        if cursor is not None:
+            cursor = decode_cursor(cursor)
+            if cursor is None or cursor["filters"] != filters_hash:
+                raise exceptions.BadRequestException("Bad cursor.")
+
+        # records can only be ordered by last playback if there is one
+        if sort == "last-watched":
+            continue_ = True
 
         # construct query filters
-        filters = []
+        ctes = []
+        cte_args = ()
+        joins = []
+        # records whose files are all unavailable are not listed
+        filters = [
+            """(
+                EXISTS (
+                    SELECT 1
+                    FROM videos
+                    JOIN tracks ON tracks.video_id = videos.id
+                    WHERE videos.record_id = records.id
+                        AND tracks.available = 1
+                )
+                OR NOT EXISTS (
+                    SELECT 1 FROM videos WHERE videos.record_id = records.id
+                )
+            )"""
+        ]
         filter_args = ()
-        if search is not None:
-            search = search.replace("%", r"\%").replace("_", r"\_")
-            if continue_:
-                filters += [
-                    r"(records.name LIKE ? ESCAPE '\' OR records.description LIKE ? ESCAPE '\')",
-                ]
-            else:
-                filters += [
-                    r"(name LIKE ? ESCAPE '\' OR description LIKE ? ESCAPE '\')",
-                ]
-            filter_args += (f"%{search}%", f"%{search}%")
+        if search:
+            cte, cte_args = get_search_matches_cte(search)
+            ctes += [cte]
+            joins += [
+                "JOIN search_matches ON records.id = search_matches.record_id"
+            ]
         if type_ is not None:
-            if continue_:
-                filters += ["records.type = ?"]
-            else:
-                filters += ["type = ?"]
+            filters += ["records.type = ?"]
             filter_args += (type_,)
 
         if continue_:
+            joins += ["JOIN playbacks ON records.id = playbacks.record_id"]
             filters += ["playbacks.username = ?"]
             filter_args += (username,)
 
-        # run queries
-        # * total number of records
-        with Transaction(
-            FluxConfig.INDEX_LOCATION / FluxConfig.INDEX_DB_FILE, readonly=True
-        ) as t:
-            t.cursor.execute(
-                (
-                    f"""
-                    SELECT COUNT(*)
-                    FROM records {
-                        "JOIN playbacks ON records.id = playbacks.record_id"
-                        if continue_ else
-                        ""
-                    }
-                    {'WHERE' if filters else ''} {' AND '.join(filters)}
-                    """
-                ),
-                filter_args,
+        query_prefix = f"WITH {', '.join(ctes)}" if ctes else ""
+
+        # * order and keyset pagination (continue after the position
+        # given by the cursor)
+        key, tiebreaker, descending = SORT_ORDERS[sort]
+        order_by = (
+            f"{key} {'DESC' if descending else 'ASC'}, "
+            + f"{tiebreaker} {'DESC' if descending else 'ASC'}"
+        )
+        keyset_filters = []
+        keyset_args = ()
+        if cursor is not None:
+            keyset_filters += [
+                f"{key} {'<=' if descending else '>='} ? AND ("
+                + f"{key} {'<' if descending else '>'} ? "
+                + f"OR {tiebreaker} {'<' if descending else '>'} ?)"
+            ]
+            keyset_args += (
+                cursor["key"][0],
+                cursor["key"][0],
+                cursor["key"][1],
             )
-        count = t.data[0][0]
 
-        # * collect records
+        def get_where(filters):
+            return f"WHERE {' AND '.join(filters)}" if filters else ""
+
+        # * limit (fetch an additional record to detect the last page)
         range_filter = ""
         range_filter_args = ()
         if range_ is not None:
+            limit = max(range_[1] - range_[0], 0)
             range_filter += "LIMIT ? OFFSET ?"
-            range_filter_args += (range_[1] - range_[0], range_[0])
-
-        # * order
-        order_by = "playbacks.changed DESC" if continue_ else "id"
+            range_filter_args += (limit + 1, range_[0])
+        elif limit is not None:
+            range_filter += "LIMIT ?"
+            range_filter_args += (limit + 1,)
 
+        # run queries
         with Transaction(
             FluxConfig.INDEX_LOCATION / FluxConfig.INDEX_DB_FILE, readonly=True
         ) as t:
+            # * collect records
             t.cursor.execute(
-                (
+                f"""
+                {query_prefix}
+                SELECT
+                    records.id,
+                    records.type,
+                    records.name,
+                    records.description,
+                    records.thumbnail_id,
+                    {key},
+                    {tiebreaker}
+                FROM records {' '.join(joins)}
+                {get_where(filters + keyset_filters)}
+                ORDER BY {order_by}
+                {range_filter}
+                """,
+                cte_args + filter_args + keyset_args + range_filter_args,
+            )
+            rows = t.cursor.fetchall()
+
+            # * total number of records (only once per set of filters,
+            # afterwards it is part of the cursor)
+            if cursor is None:
+                t.cursor.execute(
                     f"""
-                    SELECT
-                        records.id,
-                        records.type,
-                        records.name,
-                        records.description,
-                        records.thumbnail_id
-                    FROM records {
-                        "JOIN playbacks ON records.id = playbacks.record_id"
-                        if continue_ else
-                        ""
+                    {query_prefix}
+                    SELECT COUNT(*)
+                    FROM records {' '.join(joins)}
+                    {get_where(filters)}
+                    """,
+                    cte_args + filter_args,
+                )
+                count = t.cursor.fetchone()[0]
+            else:
+                count = cursor["count"]
+
+        next_ = None
+        if limit is not None and len(rows) > limit:
+            rows = rows[:limit]
+            # empty ranges (e.g. 'range=0-0') have no position to
+            # continue from
+            if rows:
+                next_ = encode_cursor(
+                    {
+                        "filters": filters_hash,
+                        "count": count,
+                        "key": list(rows[-1][5:]),
                     }
-                    {'WHERE' if filters else ''} {' AND '.join(filters)}
-                    ORDER BY {order_by}
-                    {range_filter}
-                    """
-                ),
-                filter_args + range_filter_args,
-            )
+                )
 
         records = [
             dict(
-                zip(("id", "type", "name", "description", "thumbnailId"), row)
+                zip(
+                    ("id", "type", "name", "description", "thumbnailId"),
+                    row[:5],
+                )
             )
-            for row in t.data
+            for row in rows
         ]
 
         return (
             jsonify(
                 common.wrap_response_json(
-                    None, {"count": count, "records": records}
+                    None, {"count": count, "records": records, "next": next_}
                 )
             ),
             200,
@@ -607,17 +708,13 @@ def register_api(app: Flask):
             FluxConfig.INDEX_LOCATION / FluxConfig.INDEX_DB_FILE, readonly=True
         ) as t:
             t.cursor.execute(
-                """
-                SELECT
-                    videos.id,
-                    videos.name,
-                    videos.description,
-                    videos.thumbnail_id,
-                    tracks.id,
-                    tracks.metadata_json
+                f"""
+                SELECT {VIDEO_INFO_COLUMNS}
                 FROM
                     videos
-                    JOIN tracks ON videos.id = tracks.video_id
+                    JOIN tracks
+                        ON videos.id = tracks.video_id
+                        AND tracks.available = 1
                 WHERE videos.id=?
                 """,
                 (video_id,),
@@ -626,23 +723,43 @@ def register_api(app: Flask):
         if len(t.data) == 0:
             raise exceptions.NotFoundException(f"Unknown video '{video_id}'.")
 
-        video = dict(
-            zip(
-                (
-                    "id",
-                    "name",
-                    "description",
-                    "thumbnailId",
-                    "trackId",
-                    "metadata",
-                ),
-                t.data[0],
-            )
+        return (
+            jsonify(
+                common.wrap_response_json(None, get_video_info(t.data[0]))
+            ),
+            200,
         )
-        video["metadata"] = parse_and_filter_track_metadata(video["metadata"])
+
+    @app.route("/api/v0/index/track/<track_id>/metadata", methods=["GET"])
+    @common.session_cookie_auth()
+    def get_track_metadata(
+        # pylint: disable=unused-argument
+        *args,
+        track_id: str,
+    ):
+        """Get full (ffprobe-)metadata of track."""
+        with Transaction(
+            FluxConfig.INDEX_LOCATION / FluxConfig.INDEX_DB_FILE, readonly=True
+        ) as t:
+            t.cursor.execute(
+                "SELECT metadata_compressed FROM tracks WHERE id=?",
+                (track_id,),
+            )
+
+        if len(t.data) == 0:
+            raise exceptions.NotFoundException(f"Unknown track '{track_id}'.")
 
         return (
-            jsonify(common.wrap_response_json(None, video)),
+            jsonify(
+                common.wrap_response_json(
+                    None,
+                    (
+                        None
+                        if t.data[0][0] is None
+                        else decompress_metadata(t.data[0][0])
+                    ),
+                )
+            ),
             200,
         )
 
@@ -677,36 +794,20 @@ def register_api(app: Flask):
             if len(query) > 0:
                 timestamp = query[0][1]
                 t.cursor.execute(
-                    """
-                    SELECT
-                        videos.id,
-                        videos.name,
-                        videos.description,
-                        videos.thumbnail_id,
-                        tracks.id,
-                        tracks.metadata_json
+                    f"""
+                    SELECT {VIDEO_INFO_COLUMNS}
                     FROM
                         videos
-                        JOIN tracks ON videos.id = tracks.video_id
+                        JOIN tracks
+                            ON videos.id = tracks.video_id
+                            AND tracks.available = 1
                     WHERE videos.id=?
                     """,
                     (query[0][0],),
                 )
                 query = t.cursor.fetchall()
                 if len(query) > 0:
-                    video = dict(
-                        zip(
-                            (
-                                "id",
-                                "name",
-                                "description",
-                                "thumbnailId",
-                                "trackId",
-                                "metadata",
-                            ),
-                            query[0],
-                        )
-                    )
+                    video = get_video_info(query[0])
 
         # * start anew
         if video is None:
@@ -0,0 +1,256 @@
+"""Index-jobs-API endpoints"""
+
+from typing import Optional
+from pathlib import Path
+from json import loads
+from math import floor
+from time import time
+from uuid import uuid4
+
+from flask import Flask, request, jsonify
+
+from flux.db import Transaction
+from flux.config import FluxConfig
+from flux import exceptions
+from flux.api import common
+from flux.app.jobs import JOB_ACTIONS, JOB_STATUSES
+from .index import validate_content_type
+
+
+JOB_INFO_COLUMNS = (
+    "id, action, target, type, name, description, username, status, "
+    + "cancel, processed, total, result, error, created, started, finished"
+)
+
+
+def get_job_info(row: tuple) -> dict:
+    """Returns job-info as JSON from row of `JOB_INFO_COLUMNS`."""
+    return {
+        "id": row[0],
+        "action": row[1],
+        "target": row[2],
+        "type": row[3],
+        "name": row[4],
+        "description": row[5],
+        "username": row[6],
+        "status": row[7],
+        "cancelRequested": row[8] == 1,
+        "progress": {"processed": row[9], "total": row[10]},
+        "result": None if row[11] is None else loads(row[11]),
+        "error": row[12],
+        "created": row[13],
+        "started": row[14],
+        "finished": row[15],
+    }
+
+
+def load_job_info(job_id: str) -> dict:
+    """Returns job-info or raises `NotFoundException`."""
+    with Transaction(
+        FluxConfig.INDEX_LOCATION / FluxConfig.INDEX_DB_FILE, readonly=True
+    ) as t:
+        t.cursor.execute(
+            f"SELECT {JOB_INFO_COLUMNS} FROM jobs WHERE id=?", (job_id,)
+        )
+    if len(t.data) == 0:
+        raise exceptions.NotFoundException(f"Unknown job '{job_id}'.")
+    return get_job_info(t.data[0])
+
+
+def validate_admin(username: str) -> None:
+    """Raises `BadRequestException` if user is not an admin."""
+    valid, msg = common.validate_admin(username)
+    if not valid:
+        raise exceptions.BadRequestException(msg)
+
+
+def register_api(app: Flask):
+    """Sets up api endpoints."""
+
+    @app.route("/api/v0/index/jobs", methods=["POST"])
+    @common.session_cookie_auth()
+    def create_job(
+        _: str,
+        username: str,
+    ):
+        """
+        Enqueue job for adding a server-side path to the index or for
+        synchronizing records (run by a background worker).
+        """
+        validate_admin(username)
+
+        json = request.get_json(silent=True)
+        if json is None:
+            raise exceptions.BadRequestException("Missing JSON data.")
+        content = json.get("content")
+        if not isinstance(content, dict):
+            raise exceptions.BadRequestException(
+                "Missing required 'content' in JSON data."
+            )
+
+        # parse and validate
+        action = content.get("action")
+        if action not in JOB_ACTIONS:
+            raise exceptions.BadRequestException(
+                f"Bad value for 'content.action' (one of {JOB_ACTIONS})."
+            )
+        for field in ["path", "type", "name", "description", "recordId"]:
+            if content.get(field) is None:
+                continue
+            valid, msg = common.run_validation(
+                [common.validate_string],
+                content[field],
+                name=f"content.{field}",
+            )
+            if not valid:
+                raise exceptions.BadRequestException(msg)
+
+        target: Optional[str] = None
+        if action == "add":
+            if content.get("path") is None:
+                raise exceptions.BadRequestException(
+                    "Missing required 'content.path' in JSON data."
+                )
+            path = Path(content["path"])
+            if not path.is_absolute():
+                raise exceptions.BadRequestException(
+                    f"Path '{path}' is not absolute."
+                )
+            if not path.exists():
+                raise exceptions.NotFoundException(
+                    f"Path '{path}' does not exist."
+                )
+            if content.get("type") is not None:
+                valid, msg = validate_content_type(content["type"])
+                if not valid:
+                    raise exceptions.BadRequestException(msg)
+            target = str(path.resolve())
+        else:
+            target = content.get("recordId")
+            if target is not None:
+                with Transaction(
+                    FluxConfig.INDEX_LOCATION / FluxConfig.INDEX_DB_FILE,
+                    readonly=True,
+                ) as t:
+                    t.cursor.execute(
+                        "SELECT id FROM records WHERE id=?", (target,)
+                    )
+                if len(t.data) == 0:
+                    raise exceptions.NotFoundException(
+                        f"Unknown record '{target}'."
+                    )
+
+        job_id = str(uuid4())
+        with Transaction(
+            FluxConfig.INDEX_LOCATION / FluxConfig.INDEX_DB_FILE
+        ) as t:
+            t.cursor.execute(
+                """
+                INSERT INTO jobs (
+                    id, action, target, type, name, description, username,
+                    created
+                )
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    job_id,
+                    action,
+                    target,
+                    content.get("type") if action == "add" else None,
+                    content.get("name") if action == "add" else None,
+                    content.get("description") if action == "add" else None,
+                    username,
+                    floor(time()),
+                ),
+            )
+
+        return (
+            jsonify(common.wrap_response_json(None, load_job_info(job_id))),
+            200,
+        )
+
+    @app.route("/api/v0/index/jobs", methods=["GET"])
+    @common.session_cookie_auth()
+    def list_jobs(
+        _: str,
+        username: str,
+    ):
+        """List jobs (most recent first)."""
+        validate_admin(username)
+
+        status = request.args.get("status")
+        if status is not None and status not in JOB_STATUSES:
+            raise exceptions.BadRequestException(
+                f"Bad value for 'status' (one of {JOB_STATUSES})."
+            )
+
+        with Transaction(
+            FluxConfig.INDEX_LOCATION / FluxConfig.INDEX_DB_FILE, readonly=True
+        ) as t:
+            t.cursor.execute(
+                f"SELECT {JOB_INFO_COLUMNS} FROM jobs "
+                + ("" if status is None else "WHERE status=? ")
+                + "ORDER BY created DESC, id",
+                () if status is None else (status,),
+            )
+
+        return (
+            jsonify(
+                common.wrap_response_json(
+                    None, {"jobs": list(map(get_job_info, t.data))}
+                )
+            ),
+            200,
+        )
+
+    @app.route("/api/v0/index/jobs/<job_id>", methods=["GET"])
+    @common.session_cookie_auth()
+    def get_job(
+        _: str,
+        username: str,
+        job_id: str,
+    ):
+        """Get job status and progress."""
+        validate_admin(username)
+        return (
+            jsonify(common.wrap_response_json(None, load_job_info(job_id))),
+            200,
+        )
+
+    @app.route("/api/v0/index/jobs/<job_id>", methods=["DELETE"])
+    @common.session_cookie_auth()
+    def cancel_job(
+        _: str,
+        username: str,
+        job_id: str,
+    ):
+        """
+        Cancel job. Queued jobs are cancelled immediately, running jobs
+        are stopped by the worker before processing the next file.
+        """
+        validate_admin(username)
+
+        with Transaction(
+            FluxConfig.INDEX_LOCATION / FluxConfig.INDEX_DB_FILE
+        ) as t:
+            t.cursor.execute(
+                """
+                UPDATE jobs SET status='cancelled', finished=?
+                WHERE id=? AND status='queued'
+                """,
+                (floor(time()), job_id),
+            )
+            updated = t.cursor.rowcount
+            t.cursor.execute(
+                "UPDATE jobs SET cancel=1 WHERE id=? AND status='running'",
+                (job_id,),
+            )
+            updated += t.cursor.rowcount
+
+        job = load_job_info(job_id)
+        if updated == 0:
+            raise exceptions.ConflictException(
+                f"Job '{job_id}' has already finished."
+            )
+
+        return jsonify(common.wrap_response_json(None, job)), 200
@@ -6,6 +6,7 @@ from uuid import uuid4
 from flask import Flask, request, jsonify
 
 from flux.db import Transaction
+from flux.db.sessions import revoke_sessions
 from flux.config import FluxConfig
 from flux import exceptions
 from flux.cli.user.common import validate_username, hash_password
@@ -137,6 +138,10 @@ def register_api(app: Flask):
                     username,
                 ),
             )
+        common.session_cache.invalidate_user(username)
+        revoke_sessions(
+            FluxConfig.INDEX_LOCATION / FluxConfig.SESSIONS_REVISION_FILE
+        )
         return jsonify(common.wrap_response_json(None, None)), 200
 
     @app.route("/api/v0/user/session", methods=["POST"])
@@ -231,10 +236,31 @@ def register_api(app: Flask):
             FluxConfig.INDEX_LOCATION / FluxConfig.INDEX_DB_FILE
         ) as t:
             t.cursor.execute("DELETE FROM sessions WHERE id=?", (session_id,))
+        common.session_cache.invalidate(session_id)
+        revoke_sessions(
+            FluxConfig.INDEX_LOCATION / FluxConfig.SESSIONS_REVISION_FILE
+        )
         r = jsonify(common.wrap_response_json(None, None))
         r.delete_cookie(FluxConfig.SESSION_COOKIE_NAME)
         return r, 200
 
+    @app.route("/api/v0/user/session/cache", methods=["GET"])
+    @common.session_cookie_auth()
+    def get_session_cache(_: str, username: str):
+        """
+        Returns statistics of the session cache (admin only; of the
+        process that handles this request).
+        """
+        valid, msg = common.validate_admin(username)
+        if not valid:
+            raise exceptions.BadRequestException(msg)
+        return (
+            jsonify(
+                common.wrap_response_json(None, common.session_cache.stats())
+            ),
+            200,
+        )
+
     @app.route("/api/v0/user/configuration", methods=["GET"])
     @common.session_cookie_auth()
     def get_configuration(_: str, username: str):
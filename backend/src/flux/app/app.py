@@ -14,6 +14,7 @@ from flux.config import FluxConfig
 from flux.exceptions import APIException
 from flux.api.static import register_api as register_static_api
 from flux.api import common, v0 as api_v0
+from flux.app.jobs import JobWorker
 
 
 def load_cors(_app: Flask, url: str) -> None:
@@ -209,6 +210,7 @@ def app_factory() -> Flask:
     api_v0.default.register_api(_app)
     api_v0.user.register_api(_app)
     api_v0.index.register_api(_app)
+    api_v0.jobs.register_api(_app)
     api_v0.playback.register_api(_app)
 
     @_app.route("/", defaults={"path": ""})
@@ -245,9 +247,28 @@ def run(app=None):
             + "Running without proper wsgi-server.",
             file=sys.stderr,
         )
+        # background worker for indexing jobs (runs in this process,
+        # separate from the request handlers)
+        if FluxConfig.JOBS_WORKER:
+            JobWorker(
+                FluxConfig.INDEX_LOCATION, FluxConfig.JOBS_CONCURRENCY
+            ).start()
         app.run(host=FluxConfig.BIND_ADDRESS, port=FluxConfig.PORT)
     else:
 
+        def post_worker_init(_):
+            """
+            Starts background worker for indexing jobs in the forked
+            gunicorn-worker (threads must not be started before forking;
+            only the worker holding the lock runs jobs).
+            """
+            if FluxConfig.JOBS_WORKER:
+                JobWorker(
+                    FluxConfig.INDEX_LOCATION, FluxConfig.JOBS_CONCURRENCY
+                ).start(
+                    lock=FluxConfig.INDEX_LOCATION / FluxConfig.JOBS_LOCK_FILE
+                )
+
         class StandaloneApplication(gunicorn.app.base.BaseApplication):
             """See https://docs.gunicorn.org/en/stable/custom.html"""
 
@@ -277,6 +298,7 @@ def run(app=None):
                 "bind": f"{FluxConfig.BIND_ADDRESS}:{FluxConfig.PORT}",
                 "workers": FluxConfig.FLASK_WORKERS,
                 "threads": FluxConfig.FLASK_THREADS,
+                "post_worker_init": post_worker_init,
             }
             | (FluxConfig.GUNICORN_OPTIONS or {}),
         ).run()
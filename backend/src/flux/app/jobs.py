@@ -0,0 +1,346 @@
+"""Background worker for indexing jobs of the admin-API."""
+
+from typing import Optional
+import os
+import sys
+import json
+import fcntl
+import sqlite3
+import threading
+from pathlib import Path
+from math import floor
+from time import time
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from traceback import format_exc
+
+from flux.config import FluxConfig
+from flux.db import Transaction
+from flux.db.probes import ProbeCache
+from flux.cli.index.add import AddToIndex
+from flux.cli.index.sync import SyncIndex
+from flux.cli.index.progress import Progress
+
+
+JOB_ACTIONS = ["add", "sync"]
+JOB_STATUSES = ["queued", "running", "completed", "failed", "cancelled"]
+
+
+class JobCancelled(Exception):
+    """Raised when cancellation of a running job has been requested."""
+
+
+class JobProgress(Progress):
+    """
+    Progress reporter that stores the counters of a job in the database
+    and picks up cancellation requests (instead of writing events to a
+    stream; see `sync`). Once cancellation has been requested, starting
+    another stage (e.g. probing a file) raises a `JobCancelled`.
+    """
+
+    def __init__(self, index_db: Path, job_id: str, *, workers: int) -> None:
+        super().__init__(
+            workers=workers, interval=FluxConfig.JOBS_UPDATE_INTERVAL
+        )
+        self.index_db = index_db
+        self.job_id = job_id
+        self.cancelled = False
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        super().__exit__(exc_type, exc_val, exc_tb)
+        self.sync()
+
+    def _report(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.sync()
+
+    def emit(self, event: str, **data) -> None:
+        """Events are not written (see `sync`)."""
+
+    def sync(self) -> None:
+        """
+        Stores the counters of the job and picks up cancellation
+        requests. The database is accessed without holding the lock of
+        the reporter; errors (e.g. if the index is locked) are reported
+        and the next interval is attempted regardless.
+        """
+        with self._lock:
+            files, total = self.files, self.total
+        try:
+            with Transaction(self.index_db) as t:
+                t.cursor.execute(
+                    "UPDATE jobs SET processed = ?, total = ? WHERE id = ?",
+                    (files, total, self.job_id),
+                )
+                t.cursor.execute(
+                    "SELECT cancel FROM jobs WHERE id = ?", (self.job_id,)
+                )
+        except sqlite3.Error as exc_info:
+            print(
+                "\033[1;33m"
+                + f"Failed to update progress of job '{self.job_id}': "
+                + f"{exc_info}"
+                + "\033[0m",
+                file=sys.stderr,
+            )
+            return
+        self.cancelled = t.data == [(1,)]
+
+    @contextmanager
+    def timed(self, stage: str, file: Optional[Path] = None):
+        if self.cancelled:
+            raise JobCancelled()
+        with super().timed(stage, file):
+            yield
+
+
+class JobWorker:
+    """
+    Runs queued jobs of an index one after another (see table 'jobs').
+
+    Jobs are claimed atomically so that multiple workers can share a
+    queue. Jobs that are still marked as running when the worker starts
+    (i.e., the previous server process has been stopped) are queued
+    again; interrupted imports are then resumed. Cancelled imports can
+    be resumed by adding the same path again.
+    """
+
+    def __init__(self, index: Path, jobs: Optional[int] = None) -> None:
+        self.index = index
+        self.index_db = index / FluxConfig.INDEX_DB_FILE
+        self.jobs = jobs or os.cpu_count() or 1
+
+    def recover(self) -> None:
+        """
+        Queues jobs that have been interrupted (or marks them as
+        cancelled if requested).
+        """
+        with Transaction(self.index_db) as t:
+            t.cursor.execute(
+                """
+                UPDATE jobs SET status = 'cancelled', finished = ?
+                WHERE status = 'running' AND cancel = 1
+                """,
+                (floor(time()),),
+            )
+            t.cursor.execute(
+                """
+                UPDATE jobs SET status = 'queued', started = NULL
+                WHERE status = 'running'
+                """
+            )
+
+    def claim(self) -> Optional[tuple]:
+        """
+        Marks the oldest queued job as running and returns it as tuple
+        of id, action, target, type, name, and description (`None` if no
+        job is queued).
+        """
+        while True:
+            with Transaction(self.index_db, readonly=True) as t:
+                t.cursor.execute(
+                    """
+                    SELECT id, action, target, type, name, description
+                    FROM jobs
+                    WHERE status = 'queued'
+                    ORDER BY created
+                    LIMIT 1
+                    """
+                )
+            if not t.data:
+                return None
+            job = t.data[0]
+            with Transaction(self.index_db) as t:
+                t.cursor.execute(
+                    """
+                    UPDATE jobs SET status = 'running', started = ?
+                    WHERE id = ? AND status = 'queued'
+                    """,
+                    (floor(time()), job[0]),
+                )
+                claimed = t.cursor.rowcount == 1
+            if claimed:
+                return job
+
+    def finish(
+        self,
+        job_id: str,
+        status: str,
+        result: Optional[dict] = None,
+        error: Optional[str] = None,
+    ) -> None:
+        """Stores outcome of job."""
+        with Transaction(self.index_db) as t:
+            t.cursor.execute(
+                """
+                UPDATE jobs SET status = ?, result = ?, error = ?, finished = ?
+                WHERE id = ?
+                """,
+                (
+                    status,
+                    None if result is None else json.dumps(result),
+                    error,
+                    floor(time()),
+                    job_id,
+                ),
+            )
+
+    def add(
+        self,
+        job: tuple,
+        *,
+        executor: ThreadPoolExecutor,
+        cache: ProbeCache,
+        progress: JobProgress,
+    ) -> dict:
+        """Runs 'add'-job and returns result."""
+        _, _, target, type_, name, description = job
+        target = Path(target)
+        if not target.exists():
+            raise ValueError(f"Target '{target}' does not exist.")
+        if type_ is None:
+            type_ = AddToIndex.get_target_heuristic(target)
+            if type_ is None:
+                raise ValueError(
+                    f"Heuristic record type detection failed for '{target}'."
+                )
+
+        interrupted = {
+            path: record_id
+            for record_id, _, path in AddToIndex.get_interrupted_imports(
+                self.index
+            )
+        }
+        if target in interrupted:
+            record_id = AddToIndex.import_record(
+                self.index,
+                target,
+                type_,
+                executor=executor,
+                cache=cache,
+                record_id=interrupted[target],
+                progress=progress,
+            )
+        else:
+            kwargs = {"cache": cache, "progress": progress}
+            if type_ != "movie":
+                kwargs["executor"] = executor
+            record_id = getattr(AddToIndex, f"process_{type_}")(
+                self.index, target, name, description, **kwargs
+            )
+        if record_id is None:
+            raise ValueError(
+                f"Cannot process '{target}' as {type_} (no new video files)."
+            )
+        return {"recordId": record_id, "type": type_}
+
+    def sync(
+        self,
+        job: tuple,
+        *,
+        executor: ThreadPoolExecutor,
+        cache: ProbeCache,
+        progress: JobProgress,
+    ) -> dict:
+        """Runs 'sync'-job and returns result."""
+        target = job[2]
+        changes = SyncIndex.sync(
+            self.index,
+            None if target is None else {target: None},
+            executor=executor,
+            cache=cache,
+            progress=progress,
+        )
+        return {
+            "records": len(changes),
+            "new": sum(len(record.videos) for record in changes),
+            "changed": sum(len(record.changed) for record in changes),
+            "moved": sum(len(record.moved) for record in changes),
+            "missing": sum(
+                not available
+                for record in changes
+                for _, available in record.available
+            ),
+        }
+
+    def run_next(self) -> bool:
+        """
+        Runs the oldest queued job. Returns `False` if no job is queued.
+        """
+        job = self.claim()
+        if job is None:
+            return False
+
+        cache = ProbeCache(
+            self.index / FluxConfig.PROBE_CACHE_FILE,
+            FluxConfig.PROBE_CACHE_SIZE,
+        )
+        try:
+            with ThreadPoolExecutor(self.jobs) as executor, JobProgress(
+                self.index_db, job[0], workers=self.jobs
+            ) as progress:
+                result = getattr(self, job[1])(
+                    job, executor=executor, cache=cache, progress=progress
+                )
+        except JobCancelled:
+            self.finish(job[0], "cancelled")
+        except (ValueError, OSError) as exc_info:
+            self.finish(job[0], "failed", error=str(exc_info))
+        # pylint: disable=broad-exception-caught
+        except Exception as exc_info:
+            print(
+                "\033[31mERROR:\033[0m "
+                + f" [job {job[0]}] "
+                + format_exc(),
+                file=sys.stderr,
+            )
+            self.finish(job[0], "failed", error=str(exc_info))
+        else:
+            self.finish(job[0], "completed", result=result)
+        cache.evict()
+        return True
+
+    def run(self, stop: Optional[threading.Event] = None) -> None:
+        """
+        Runs queued jobs until `stop` is set (polls for new jobs every
+        `FluxConfig.JOBS_POLL_INTERVAL` seconds).
+        """
+        stop = stop or threading.Event()
+        self.recover()
+        while not stop.is_set():
+            if not self.run_next():
+                stop.wait(FluxConfig.JOBS_POLL_INTERVAL)
+
+    def run_exclusive(
+        self, lock: Path, stop: Optional[threading.Event] = None
+    ) -> None:
+        """
+        Runs worker (see `run`) once an exclusive lock on the file `lock`
+        has been acquired. Of multiple processes (e.g., gunicorn-workers),
+        only one runs jobs at a time; if it exits, another process takes
+        over (and recovers interrupted jobs).
+        """
+        with open(lock, "a", encoding="utf-8") as file:
+            # released when the process exits
+            fcntl.flock(file, fcntl.LOCK_EX)
+            self.run(stop)
+
+    def start(
+        self,
+        stop: Optional[threading.Event] = None,
+        *,
+        lock: Optional[Path] = None,
+    ) -> threading.Thread:
+        """
+        Runs worker in a (daemon) thread and returns that thread. If a
+        `lock` file is given, the worker runs exclusively (see
+        `run_exclusive`).
+        """
+        thread = threading.Thread(
+            target=self.run if lock is None else self.run_exclusive,
+            args=(stop,) if lock is None else (lock, stop),
+            name="flux-jobs",
+            daemon=True,
+        )
+        thread.start()
+        return thread
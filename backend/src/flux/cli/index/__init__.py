@@ -6,6 +6,11 @@ from .create import CreateIndex
 from .show import ShowIndex
 from .add import AddToIndex
 from .remove import RmFromIndex
+from .sync import SyncIndex
+from .watch import WatchIndex
+from .verify import VerifyIndex
+from .backup import BackupIndex
+from .restore import RestoreIndex
 
 
 class Index(Command):
@@ -17,6 +22,19 @@ class Index(Command):
     )
     add = AddToIndex("add", helptext="add resources to an existing index")
     rm = RmFromIndex("rm", helptext="delete resources from an existing index")
+    sync = SyncIndex(
+        "sync", helptext="update existing records from the filesystem"
+    )
+    watch = WatchIndex(
+        "watch", helptext="continuously update records on file changes"
+    )
+    verify = VerifyIndex(
+        "verify", helptext="check indexed files for missing or changed files"
+    )
+    backup = BackupIndex(
+        "backup", helptext="create a backup of an existing index"
+    )
+    restore = RestoreIndex("restore", helptext="restore index from a backup")
 
     def run(self, args):
         self._print_help()
@@ -1,20 +1,39 @@
 """Definition of the add-subcommand."""
 
-from typing import Optional
+from typing import Any, Optional, Callable, Iterable
+import os
 import sys
 from pathlib import Path
+from stat import S_ISREG
 from dataclasses import dataclass, field
+from shutil import copyfile
 from uuid import uuid4
 import json
 import subprocess
+from concurrent.futures import Executor, ThreadPoolExecutor
+from contextlib import nullcontext
+from time import time
+from math import floor
 
 import filetype
 from befehl import Parser, Option, Command, Argument
 
 from flux.config import FluxConfig
-from flux.db import Transaction
+from flux.db import Transaction, BatchWriter
+from flux.db.probes import ProbeCache
+from flux.db.tracks import INSERT_TRACK, get_track_row
 from ..common import verbose, index_location, get_index
-from .common import dry_run, DEFAULT_THUMBNAIL_EXTENSION
+from .common import (
+    dry_run,
+    jobs,
+    DEFAULT_THUMBNAIL_EXTENSION,
+    VIDEO_EXTENSIONS,
+    NON_VIDEO_EXTENSIONS,
+)
+from .progress import Progress, timed
+from .walk import scan, walk
+from .devices import get_stat, device_slot, map_by_device
+from .fingerprints import IndexedFiles, get_fingerprint
 
 
 @dataclass
@@ -27,6 +46,8 @@ class VideoFile:
     id: str = field(default_factory=lambda: str(uuid4()))
     thumbnail_id: str = field(default_factory=lambda: str(uuid4()))
     description: str = field(default_factory=lambda: "No description provided")
+    stat: Optional[os.stat_result] = None
+    fingerprint: Optional[str] = None
 
 
 @dataclass
@@ -87,7 +108,33 @@ class AddToIndex(Command):
         helptext=("provide a record-description"),
         nargs=1,
     )
+    resume = Option(
+        "--resume",
+        helptext=(
+            "continue interrupted imports (of the given targets or all if "
+            + "no target is given)"
+        ),
+    )
+    manifest = Option(
+        "--manifest",
+        helptext=(
+            "add records from a JSONL-manifest with precomputed metadata "
+            + "(files are not probed; see README)"
+        ),
+        nargs=1,
+        parser=Parser.parse_as_path,
+    )
+    progress = Option(
+        "--progress",
+        helptext=(
+            "report progress in a machine-readable format on stdout (one "
+            + "of 'json')"
+        ),
+        nargs=1,
+        parser=Parser.parse_with_values(["json"]),
+    )
     dry_run = dry_run
+    jobs = jobs
     verbose = verbose
 
     target = Argument(
@@ -98,6 +145,43 @@ class AddToIndex(Command):
     )
 
     def validate(self, args):
+        if self.progress in args:
+            for option in (self.dry_run, self.verbose):
+                if option in args:
+                    return (
+                        False,
+                        f"Option '{self.progress.names[0]}' is incompatible "
+                        + f"with '{option.names[0]}'.",
+                    )
+        if self.manifest in args:
+            if len(args.get(self.target, [])) > 0:
+                return (
+                    False,
+                    f"Option '{self.manifest.names[0]}' is incompatible with "
+                    + "targets.",
+                )
+            for option in (
+                self.type_,
+                self.name_,
+                self.description,
+                self.resume,
+                self.progress,
+            ):
+                if option in args:
+                    return (
+                        False,
+                        f"Option '{self.manifest.names[0]}' is incompatible "
+                        + f"with '{option.names[0]}'.",
+                    )
+            return True, ""
+        if self.resume in args:
+            if self.dry_run in args:
+                return (
+                    False,
+                    f"Option '{self.resume.names[0]}' is incompatible with "
+                    + f"'{self.dry_run.names[0]}'.",
+                )
+            return True, ""
         if self.target not in args or len(args[self.target]) == 0:
             return (
                 False,
@@ -120,9 +204,38 @@ class AddToIndex(Command):
         return True, ""
 
     INDENTATION = "   "
+    # ffprobe-output is restricted to the fields used by flux (see
+    # `flux.db.tracks`) and a few informative stream properties
+    FFPROBE_ENTRIES = (
+        "format=duration,size,bit_rate,nb_streams,format_name,"
+        + "format_long_name"
+        + ":stream=index,codec_type,codec_name,codec_long_name,profile,"
+        + "width,height,pix_fmt,r_frame_rate,sample_rate,channels,"
+        + "channel_layout,bit_rate,duration"
+        + ":stream_tags=language,title"
+    )
 
     @staticmethod
-    def get_metadata(file: Path) -> Optional[dict]:
+    def is_video_file(file: Path) -> bool:
+        """
+        Returns whether `file` is (likely) a video file. Files with
+        common extensions are classified without reading them, others
+        by their file signature.
+        """
+        suffix = file.suffix.lower()
+        if suffix in VIDEO_EXTENSIONS:
+            return True
+        if suffix in NON_VIDEO_EXTENSIONS:
+            return False
+        ft = filetype.guess(file)
+        return (
+            ft is not None
+            and ft.mime is not None
+            and ft.mime.startswith("video/")
+        )
+
+    @classmethod
+    def get_metadata(cls, file: Path) -> Optional[dict]:
         """
         Runs ffprobe to collect metadata of video file. Returns
         JSON or `None` if not successful.
@@ -135,8 +248,8 @@ class AddToIndex(Command):
                     "error",
                     "-print_format",
                     "json",
-                    "-show_format",
-                    "-show_streams",
+                    "-show_entries",
+                    cls.FFPROBE_ENTRIES,
                     str(file),
                 ],
                 check=True,
@@ -162,6 +275,10 @@ class AddToIndex(Command):
             )
             or not isinstance(result_json["format"]["nb_streams"], int)
             or result_json["format"]["nb_streams"] < 1
+            or not any(
+                stream.get("codec_type") == "video"
+                for stream in result_json.get("streams", [])
+            )
         ):
             return None
         return result_json
@@ -174,6 +291,10 @@ class AddToIndex(Command):
         context: str,
         *,
         verbose: bool = False,
+        cache: Optional[ProbeCache] = None,
+        progress: Optional[Progress] = None,
+        stat: Optional[os.stat_result] = None,
+        indexed: Optional[IndexedFiles] = None,
     ) -> Optional[VideoFile]:
         """
         Process given file in given context. Returns a `VideoFile` if
@@ -184,32 +305,84 @@ class AddToIndex(Command):
         context -- context for processing
         verbose -- whether to run in verbose mode
                    (default False)
+        cache -- cache for ffprobe-results
+                 (default None; always runs ffprobe)
+        progress -- progress reporter (files that are skipped are
+                    reported as done)
+                    (default None)
+        stat -- result of `os.stat` for `file` (if already known)
+                (default None; stats file)
+        indexed -- lookup of indexed files (files that are already
+                   indexed or have been moved are skipped)
+                   (default None; no lookup)
         """
+        with timed(progress, "inspect", file):
+            # file type and identity (before probing to detect later
+            # changes) from a single stat-call
+            if stat is None:
+                stat = get_stat(file)
+            is_file = stat is not None and S_ISREG(stat.st_mode)
+            is_video_file = is_file and cls.is_video_file(file)
+            fingerprint = (
+                get_fingerprint(file, stat.st_size) if is_video_file else None
+            )
+
         # file
-        if not file.is_file():
+        if not is_file:
             if verbose:
                 print(
                     2 * cls.INDENTATION
                     + f"Skipping '{file.name}' (not a file)"
                 )
+            if progress is not None:
+                progress.done(file, "skipped", reason="not a file")
             return None
 
         # mimetype
-        ft = filetype.guess(file)
-        if ft is None or ft.mime is None or not ft.mime.startswith("video/"):
+        if not is_video_file:
             if verbose:
                 print(
                     2 * cls.INDENTATION
                     + f"Skipping file '{file.name}' (filetype)"
                 )
+            if progress is not None:
+                progress.done(file, "skipped", reason="filetype")
+            return None
+
+        # content already indexed
+        reason = (
+            None
+            if indexed is None or fingerprint is None
+            else indexed.check(file, stat, fingerprint)
+        )
+        if reason is not None:
+            if verbose:
+                print(
+                    2 * cls.INDENTATION
+                    + f"Skipping file '{file.name}' ({reason})"
+                )
+            if progress is not None:
+                progress.done(file, "skipped", reason=reason)
             return None
 
         # ffprobe
-        metadata = cls.get_metadata(file)
+        with timed(progress, "probe", file):
+            metadata = None if cache is None else cache.get(file, stat)
+            cached = metadata is not None
+            if metadata is None:
+                metadata = cls.get_metadata(file)
+                if metadata is not None and cache is not None:
+                    cache.put(file, stat, metadata)
+        if progress is not None:
+            progress.annotate(file, bytes=stat.st_size, cached=cached)
         if metadata is None:
-            print(
-                2 * cls.INDENTATION + f"Skipping file '{file.name}' (ffprobe)"
-            )
+            if progress is not None:
+                progress.done(file, "skipped", reason="ffprobe")
+            else:
+                print(
+                    2 * cls.INDENTATION
+                    + f"Skipping file '{file.name}' (ffprobe)"
+                )
             return None
 
         # success
@@ -219,13 +392,25 @@ class AddToIndex(Command):
                 + f"Adding file '{file.name}' as {context} '{file.stem}'"
             )
 
-        return VideoFile(file, file.stem, metadata)
+        return VideoFile(
+            file, file.stem, metadata, stat=stat, fingerprint=fingerprint
+        )
 
     @staticmethod
     def generate_thumbnail(
-        source: VideoFile, destination: Path, seek: Optional[str] = None
-    ) -> None:
-        """Creates a thumbnail of `source` at `destination`."""
+        source: VideoFile,
+        destination: Path,
+        seek: Optional[str] = None,
+        progress: Optional[Progress] = None,
+    ) -> bool:
+        """
+        Creates a thumbnail of `source` at `destination` (from the last
+        keyframe before `seek` to avoid decoding further frames) and
+        returns `True` if the thumbnail has been created. If no frame
+        has been written (e.g. because the duration from the metadata
+        exceeds the actual length of the video), the first keyframe is
+        used instead.
+        """
         if seek is None:
             seek_seconds = int(
                 0.1 * float(source.metadata["format"]["duration"])
@@ -235,37 +420,138 @@ class AddToIndex(Command):
                 + f":0{(seek_seconds // 60) % 10}"
                 + f":{int(seek_seconds % 60)}"
             )
-        try:
-            subprocess.run(
-                [
-                    "ffmpeg",
-                    "-v",
-                    "error",
-                    "-ss",
-                    seek,
-                    "-i",
-                    str(source.path),
-                    "-frames:v",
-                    "1",
-                    "-vf",
-                    "scale=720:-1",
-                    str(destination),
-                ],
-                check=True,
-                capture_output=True,
-                text=True,
-            )
-        except subprocess.CalledProcessError as exc_info:
-            print(
-                "\033[1;33m"
-                + f"Failed to create thumbnail from '{source.path}' at "
-                + f"'{destination}': {exc_info} ({exc_info.stderr})"
-                + "\033[0m",
-                file=sys.stderr,
-            )
+        error = "no frame written"
+        for position in (seek, "0"):
+            try:
+                with timed(progress, "thumbnail", source.path):
+                    subprocess.run(
+                        [
+                            "ffmpeg",
+                            "-v",
+                            "error",
+                            "-skip_frame",
+                            "nokey",
+                            "-noaccurate_seek",
+                            "-ss",
+                            position,
+                            "-i",
+                            str(source.path),
+                            "-frames:v",
+                            "1",
+                            "-vf",
+                            "scale=720:-1",
+                            str(destination),
+                        ],
+                        check=True,
+                        capture_output=True,
+                        text=True,
+                    )
+            except subprocess.CalledProcessError as exc_info:
+                error = f"{exc_info} ({exc_info.stderr})"
+            if destination.is_file():
+                return True
+        print(
+            "\033[1;33m"
+            + f"Failed to create thumbnail from '{source.path}' at "
+            + f"'{destination}': {error}"
+            + "\033[0m",
+            file=sys.stderr,
+        )
+        return False
+
+    @staticmethod
+    def map_jobs(
+        executor: Optional[Executor], func: Callable, iterable: Iterable
+    ) -> list:
+        """
+        Returns results of `func` applied to the elements of `iterable`
+        (in order). If an `executor` is given, the calls are distributed
+        across its workers.
+        """
+        if executor is None:
+            return list(map(func, iterable))
+        return list(executor.map(func, iterable))
 
     @classmethod
-    def process_movie(
+    def process_video_files(
+        # pylint: disable=redefined-outer-name
+        cls,
+        files: list[tuple[Path, str]],
+        *,
+        executor: Optional[Executor] = None,
+        verbose: bool = False,
+        cache: Optional[ProbeCache] = None,
+        progress: Optional[Progress] = None,
+        indexed: Optional[IndexedFiles] = None,
+    ) -> list[Optional[VideoFile]]:
+        """
+        Returns results of `process_video_file` for `files` (tuples of
+        file and context; in order). Files are stat'ed first and then
+        scheduled per storage device (see `map_by_device`).
+        """
+        stats = cls.map_jobs(executor, get_stat, [file for file, _ in files])
+        return map_by_device(
+            executor,
+            lambda item: cls.process_video_file(
+                item[0][0],
+                item[0][1],
+                verbose=verbose,
+                cache=cache,
+                progress=progress,
+                stat=item[1],
+                indexed=indexed,
+            ),
+            list(zip(files, stats)),
+            stats,
+        )
+
+    @staticmethod
+    def collect_files(
+        type_: str, path: Path
+    ) -> list[tuple[Optional[str], Path]]:
+        """
+        Returns list of tuples of season-name (or `None`) and file for
+        the record source `path` (same layout as used by `flux index
+        add`).
+        """
+        if type_ == "movie":
+            return [(None, path)] if path.is_file() else []
+        if type_ == "collection":
+            return [(None, file) for file in walk(path, recursive=True)]
+        specials, directories = scan(path)
+        return [
+            (directory.name, file)
+            for directory in directories
+            for file in walk(directory)
+        ] + [(None, file) for file in specials]
+
+    @classmethod
+    def generate_thumbnails(
+        cls,
+        videos: list[VideoFile],
+        thumbnails: Path,
+        *,
+        executor: Optional[Executor] = None,
+        progress: Optional[Progress] = None,
+    ) -> None:
+        """
+        Creates thumbnails for `videos` in directory `thumbnails`
+        (scheduled per storage device, see `map_by_device`).
+        """
+        map_by_device(
+            executor,
+            lambda video: cls.generate_thumbnail(
+                video,
+                thumbnails
+                / (video.thumbnail_id + DEFAULT_THUMBNAIL_EXTENSION),
+                progress=progress,
+            ),
+            videos,
+            [video.stat for video in videos],
+        )
+
+    @classmethod
+    def prepare_movie(
         # pylint: disable=redefined-outer-name
         cls,
         index: Path,
@@ -275,9 +561,13 @@ class AddToIndex(Command):
         *,
         verbose: bool = False,
         dry_run: bool = False,
-    ):
+        cache: Optional[ProbeCache] = None,
+        progress: Optional[Progress] = None,
+        indexed: Optional[IndexedFiles] = None,
+    ) -> Optional[VideoFile]:
         """
-        Add target to index.
+        Collect movie-data and create thumbnail. Returns `None` if
+        target cannot be processed as movie.
 
         Keyword arguments:
         index -- index location
@@ -290,22 +580,40 @@ class AddToIndex(Command):
                    (default False)
         dry_run -- whether to run a simulation (automatically verbose)
                    (default False)
+        cache -- cache for ffprobe-results
+                 (default None; always runs ffprobe)
+        progress -- progress reporter
+                    (default None)
+        indexed -- lookup of indexed files
+                   (default None; no lookup)
         """
         if dry_run:
             verbose = True
 
-        movie = cls.process_video_file(target, "movie", verbose=verbose)
+        # single files are not scheduled with `map_by_device` but count
+        # towards the limits of their device nonetheless
+        stat = get_stat(target)
+        with device_slot(stat):
+            movie = cls.process_video_file(
+                target,
+                "movie",
+                verbose=verbose,
+                cache=cache,
+                progress=progress,
+                stat=stat,
+                indexed=indexed,
+            )
 
         # check minimum requirements
-        # * target is a video
+        # * target is a new video
         if movie is None:
             if verbose:
                 print(
                     cls.INDENTATION
-                    + "Cannot process as movie: Not a video file.",
+                    + "Cannot process as movie: Not a (new) video file.",
                     file=sys.stderr,
                 )
-            return
+            return None
 
         if name is not None:
             movie.name = name
@@ -334,60 +642,68 @@ class AddToIndex(Command):
                 + f"Creating thumbnail for movie '{movie.name}'"
             )
         if not dry_run:
-            cls.generate_thumbnail(
-                movie,
-                thumbnails
-                / (movie.thumbnail_id + DEFAULT_THUMBNAIL_EXTENSION),
-            )
-
-        # write to database
-        if not dry_run:
-            index_db = index / FluxConfig.INDEX_DB_FILE
-            with Transaction(index_db) as t:
-                # thumbnail first so that refs exist ..
-                t.cursor.execute(
-                    "INSERT INTO thumbnails VALUES (?, ?)",
-                    (
-                        movie.thumbnail_id,
-                        movie.thumbnail_id + DEFAULT_THUMBNAIL_EXTENSION,
-                    ),
-                )
-                # .. now movie
-                t.cursor.execute(
-                    "INSERT INTO records VALUES (?, ?, ?, ?, ?)",
-                    (
-                        movie.id,
-                        movie.thumbnail_id,
-                        "movie",
-                        movie.name,
-                        movie.description,
-                    ),
-                )
-                t.cursor.execute(
-                    "INSERT INTO videos VALUES (?, ?, ?, ?, ?, ?, ?)",
-                    (
-                        movie.id,
-                        movie.id,
-                        None,
-                        None,
-                        None,
-                        None,
-                        0,
-                    ),
-                )
-                t.cursor.execute(
-                    "INSERT INTO tracks VALUES (?, ?, ?, ?, ?)",
-                    (
-                        str(uuid4()),
-                        movie.id,
-                        str(movie.path),
-                        json.dumps(movie.metadata),
-                        1,
-                    ),
+            with device_slot(stat):
+                cls.generate_thumbnail(
+                    movie,
+                    thumbnails
+                    / (movie.thumbnail_id + DEFAULT_THUMBNAIL_EXTENSION),
+                    progress=progress,
                 )
 
+        return movie
+
+    @staticmethod
+    def write_movie(index: Path, movie: VideoFile) -> None:
+        """Write prepared `movie` to database."""
+        index_db = index / FluxConfig.INDEX_DB_FILE
+        with Transaction(index_db) as t:
+            # thumbnail first so that refs exist ..
+            t.cursor.execute(
+                "INSERT INTO thumbnails VALUES (?, ?)",
+                (
+                    movie.thumbnail_id,
+                    movie.thumbnail_id + DEFAULT_THUMBNAIL_EXTENSION,
+                ),
+            )
+            # .. now movie
+            t.cursor.execute(
+                "INSERT INTO records VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    movie.id,
+                    movie.thumbnail_id,
+                    "movie",
+                    movie.name,
+                    movie.description,
+                    floor(time()),
+                    str(movie.path),
+                ),
+            )
+            t.cursor.execute(
+                "INSERT INTO videos VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    movie.id,
+                    movie.id,
+                    None,
+                    None,
+                    None,
+                    None,
+                    0,
+                ),
+            )
+            t.cursor.execute(
+                INSERT_TRACK,
+                get_track_row(
+                    str(uuid4()),
+                    movie.id,
+                    movie.path,
+                    movie.metadata,
+                    movie.stat,
+                    fingerprint=movie.fingerprint,
+                ),
+            )
+
     @classmethod
-    def process_series(
+    def prepare_series(
         # pylint: disable=redefined-outer-name
         cls,
         index: Path,
@@ -397,9 +713,13 @@ class AddToIndex(Command):
         *,
         verbose: bool = False,
         dry_run: bool = False,
-    ):
+        executor: Optional[Executor] = None,
+        cache: Optional[ProbeCache] = None,
+        indexed: Optional[IndexedFiles] = None,
+    ) -> Optional[Series]:
         """
-        Add target to index.
+        Collect series-data and create thumbnails. Returns `None` if
+        target cannot be processed as series.
 
         Keyword arguments:
         index -- index location
@@ -412,6 +732,12 @@ class AddToIndex(Command):
                    (default False)
         dry_run -- whether to run a simulation (automatically verbose)
                    (default False)
+        executor -- executor for processing files in parallel
+                    (default None; sequential processing)
+        cache -- cache for ffprobe-results
+                 (default None; always runs ffprobe)
+        indexed -- lookup of indexed files
+                   (default None; no lookup)
         """
         if dry_run:
             verbose = True
@@ -432,29 +758,36 @@ class AddToIndex(Command):
             print(cls.INDENTATION + f"Assigned name: {series.name}")
 
         # collect data from filesystem
-        # * seasons
-        for directory in sorted(
-            filter(lambda p: p.is_dir(), series.path.glob("*")),
-            key=lambda p: p.name,
+        # * seasons and episodes
+        specials, directories = scan(series.path)
+        seasons = [
+            Season(directory, directory.name, []) for directory in directories
+        ]
+        files = [
+            (season, file, "episode")
+            for season in seasons
+            for file in walk(season.path)
+        ]
+        # * specials
+        files += [(None, file, "special") for file in specials]
+        # * process files (in parallel) and assign results in order
+        for (season, _, _), video in zip(
+            files,
+            cls.process_video_files(
+                [(file, context) for _, file, context in files],
+                executor=executor,
+                verbose=verbose,
+                cache=cache,
+                indexed=indexed,
+            ),
         ):
-            season = Season(directory, directory.name, [])
-            if verbose:
-                print(
-                    cls.INDENTATION
-                    + f"Processing '{season.path.name}' as season"
-                )
-
-            # * episodes
-            for file in sorted(
-                filter(lambda p: p.is_file(), season.path.glob("*")),
-                key=lambda p: p.name,
-            ):
-                episode = cls.process_video_file(
-                    file, "episode", verbose=verbose
-                )
-                if episode is not None:
-                    season.episodes.append(episode)
-
+            if video is None:
+                continue
+            if season is None:
+                series.specials.append(video)
+            else:
+                season.episodes.append(video)
+        for season in seasons:
             if len(season.episodes) == 0:
                 if verbose:
                     print(
@@ -462,19 +795,13 @@ class AddToIndex(Command):
                         + f"Omitting empty season '{season.path.name}'"
                     )
                 continue
+            if verbose:
+                print(
+                    cls.INDENTATION
+                    + f"Processed '{season.path.name}' as season"
+                )
             series.seasons.append(season)
 
-        # * specials
-        if verbose:
-            print(cls.INDENTATION + "Processing specials")
-        for file in sorted(
-            filter(lambda p: p.is_file(), series.path.glob("*")),
-            key=lambda p: p.name,
-        ):
-            special = cls.process_video_file(file, "special", verbose=verbose)
-            if special is not None:
-                series.specials.append(special)
-
         # check minimum requirements
         # * at least one season or one special
         if len(series.specials) + len(series.seasons) < 1:
@@ -485,7 +812,7 @@ class AddToIndex(Command):
                     + "least one season or special.",
                     file=sys.stderr,
                 )
-            return
+            return None
 
         # generate thumbnails
         # * general preparations
@@ -502,31 +829,28 @@ class AddToIndex(Command):
                     2 * cls.INDENTATION
                     + f"Creating thumbnails for season '{season.name}'"
                 )
-            for episode in season.episodes:
-                if verbose:
+                for episode in season.episodes:
                     print(
                         3 * cls.INDENTATION
                         + f"Creating thumbnail for episode '{episode.name}'"
                     )
-                if not dry_run:
-                    cls.generate_thumbnail(
-                        episode,
-                        thumbnails
-                        / (episode.thumbnail_id + DEFAULT_THUMBNAIL_EXTENSION),
-                    )
         # * specials
-        for special in series.specials:
-            if verbose:
+        if verbose:
+            for special in series.specials:
                 print(
                     2 * cls.INDENTATION
                     + f"Creating thumbnail for special '{special.name}'"
                 )
-            if not dry_run:
-                cls.generate_thumbnail(
-                    special,
-                    thumbnails
-                    / (special.thumbnail_id + DEFAULT_THUMBNAIL_EXTENSION),
+        if not dry_run:
+            cls.generate_thumbnails(
+                sum(
+                    (season.episodes for season in series.seasons),
+                    start=[],
                 )
+                + series.specials,
+                thumbnails,
+                executor=executor,
+            )
 
         # select thumbnail for series (prioritize seasons/episodes)
         if len(series.seasons) > 0:
@@ -534,92 +858,10 @@ class AddToIndex(Command):
         else:
             series.thumbnail_id = series.specials[0].thumbnail_id
 
-        # write to database
-        if not dry_run:
-            index_db = index / FluxConfig.INDEX_DB_FILE
-            with Transaction(index_db) as t:
-                # thumbnails first so that refs exist ..
-                for video in sum(
-                    (season.episodes for season in series.seasons),
-                    start=series.specials,
-                ):
-                    t.cursor.execute(
-                        "INSERT INTO thumbnails VALUES (?, ?)",
-                        (
-                            video.thumbnail_id,
-                            video.thumbnail_id + DEFAULT_THUMBNAIL_EXTENSION,
-                        ),
-                    )
-                # .. now remaining contents
-                t.cursor.execute(
-                    "INSERT INTO records VALUES (?, ?, ?, ?, ?)",
-                    (
-                        series.id,
-                        series.thumbnail_id,
-                        "series",
-                        series.name,
-                        series.description,
-                    ),
-                )
-                for season_position, season in enumerate(series.seasons):
-                    t.cursor.execute(
-                        "INSERT INTO seasons VALUES (?, ?, ?, ?)",
-                        (
-                            season.id,
-                            series.id,
-                            season.name,
-                            season_position,
-                        ),
-                    )
-                    for position, episode in enumerate(season.episodes):
-                        t.cursor.execute(
-                            "INSERT INTO videos VALUES (?, ?, ?, ?, ?, ?, ?)",
-                            (
-                                episode.id,
-                                series.id,
-                                season.id,
-                                episode.thumbnail_id,
-                                episode.name,
-                                "No description provided.",
-                                position,
-                            ),
-                        )
-                        t.cursor.execute(
-                            "INSERT INTO tracks VALUES (?, ?, ?, ?, ?)",
-                            (
-                                str(uuid4()),
-                                episode.id,
-                                str(episode.path),
-                                json.dumps(episode.metadata),
-                                1,
-                            ),
-                        )
-                for position, special in enumerate(series.specials):
-                    t.cursor.execute(
-                        "INSERT INTO videos VALUES (?, ?, ?, ?, ?, ?, ?)",
-                        (
-                            special.id,
-                            series.id,
-                            None,
-                            special.thumbnail_id,
-                            special.name,
-                            "No description provided.",
-                            position,
-                        ),
-                    )
-                    t.cursor.execute(
-                        "INSERT INTO tracks VALUES (?, ?, ?, ?, ?)",
-                        (
-                            str(uuid4()),
-                            special.id,
-                            str(special.path),
-                            json.dumps(special.metadata),
-                            1,
-                        ),
-                    )
+        return series
 
     @classmethod
-    def process_collection(
+    def prepare_collection(
         # pylint: disable=redefined-outer-name
         cls,
         index: Path,
@@ -629,9 +871,13 @@ class AddToIndex(Command):
         *,
         verbose: bool = False,
         dry_run: bool = False,
-    ):
+        executor: Optional[Executor] = None,
+        cache: Optional[ProbeCache] = None,
+        indexed: Optional[IndexedFiles] = None,
+    ) -> Optional[Collection]:
         """
-        Add target to index.
+        Collect collection-data and create thumbnails. Returns `None` if
+        target cannot be processed as collection.
 
         Keyword arguments:
         index -- index location
@@ -644,6 +890,12 @@ class AddToIndex(Command):
                    (default False)
         dry_run -- whether to run a simulation (automatically verbose)
                    (default False)
+        executor -- executor for processing files in parallel
+                    (default None; sequential processing)
+        cache -- cache for ffprobe-results
+                 (default None; always runs ffprobe)
+        indexed -- lookup of indexed files
+                   (default None; no lookup)
         """
         if dry_run:
             verbose = True
@@ -663,16 +915,23 @@ class AddToIndex(Command):
             print(cls.INDENTATION + f"Assigned name: {collection.name}")
 
         # collect data from filesystem
-        # * specials
+        # * videos (processed in parallel)
         if verbose:
             print(cls.INDENTATION + "Processing collection")
-        for file in sorted(
-            filter(lambda p: p.is_file(), collection.path.glob("**/*")),
-            key=str,
-        ):
-            video = cls.process_video_file(file, "video", verbose=verbose)
-            if video is not None:
-                collection.videos.append(video)
+        collection.videos = [
+            video
+            for video in cls.process_video_files(
+                [
+                    (file, "video")
+                    for file in walk(collection.path, recursive=True)
+                ],
+                executor=executor,
+                verbose=verbose,
+                cache=cache,
+                indexed=indexed,
+            )
+            if video is not None
+        ]
 
         # check minimum requirements
         # * at least one video
@@ -684,7 +943,7 @@ class AddToIndex(Command):
                     + "at least one video.",
                     file=sys.stderr,
                 )
-            return
+            return None
 
         # generate thumbnails
         # * general preparations
@@ -694,80 +953,789 @@ class AddToIndex(Command):
             print(2 * cls.INDENTATION + f"Output location: {thumbnails}")
         if not dry_run:
             thumbnails.mkdir(parents=True, exist_ok=True)
-        # * specials
-        for video in collection.videos:
-            if verbose:
+        # * videos
+        if verbose:
+            for video in collection.videos:
                 print(
                     2 * cls.INDENTATION
                     + f"Creating thumbnail for video '{video.name}'"
                 )
-            if not dry_run:
-                cls.generate_thumbnail(
-                    video,
-                    thumbnails
-                    / (video.thumbnail_id + DEFAULT_THUMBNAIL_EXTENSION),
-                )
+        if not dry_run:
+            cls.generate_thumbnails(
+                collection.videos, thumbnails, executor=executor
+            )
 
         # select thumbnail for collection
         collection.thumbnail_id = collection.videos[0].thumbnail_id
 
-        # write to database
-        if not dry_run:
-            index_db = index / FluxConfig.INDEX_DB_FILE
-            with Transaction(index_db) as t:
-                # thumbnails first so that refs exist ..
-                for video in collection.videos:
-                    t.cursor.execute(
-                        "INSERT INTO thumbnails VALUES (?, ?)",
+        return collection
+
+    @classmethod
+    def import_record(
+        # pylint: disable=redefined-outer-name, too-many-locals
+        # pylint: disable=too-many-branches, too-many-statements
+        cls,
+        index: Path,
+        target: Path,
+        type_: str,
+        name: Optional[str] = None,
+        description: Optional[str] = None,
+        *,
+        verbose: bool = False,
+        executor: Optional[Executor] = None,
+        cache: Optional[ProbeCache] = None,
+        batch_size: Optional[int] = None,
+        record_id: Optional[str] = None,
+        progress: Optional[Progress] = None,
+    ) -> Optional[str]:
+        """
+        Add series or collection to index in batches of files (files
+        are processed, thumbnails created, and the results written
+        batch by batch). The progress is stored in the journal-table
+        'imports' (until completion) so that an interrupted import can
+        be resumed. Returns the record-id or `None` if the target does
+        not contain any videos.
+
+        Keyword arguments:
+        index -- index location
+        target -- target path
+        type_ -- record type ('series' or 'collection')
+        name -- name of the record
+                (default None; uses directory name)
+        description -- description of the record
+                       (default None; uses placeholder)
+        verbose -- whether to run in verbose mode
+                   (default False)
+        executor -- executor for processing files in parallel
+                    (default None; sequential processing)
+        cache -- cache for ffprobe-results
+                 (default None; always runs ffprobe)
+        batch_size -- number of files per batch
+                      (default None; uses `FluxConfig.IMPORT_BATCH_SIZE`)
+        record_id -- id of an interrupted import that is resumed
+                     (default None; starts new import)
+        progress -- progress reporter
+                    (default None)
+        """
+        index_db = index / FluxConfig.INDEX_DB_FILE
+        target = target.resolve()
+        files = cls.collect_files(type_, target)
+        batch_size = batch_size or FluxConfig.IMPORT_BATCH_SIZE
+        indexed = IndexedFiles(index_db)
+
+        # restore progress
+        # * seasons by name as tuples of id and position
+        seasons: dict[str, tuple[str, int]] = {}
+        # * next video positions by season-id
+        positions: dict[Optional[str], int] = {}
+        processed = 0
+        exists = record_id is not None
+        if record_id is None:
+            record_id = str(uuid4())
+        else:
+            with Transaction(index_db, readonly=True) as t:
+                t.cursor.execute(
+                    "SELECT processed FROM imports WHERE record_id = ?",
+                    (record_id,),
+                )
+                processed = (t.cursor.fetchone() or (0,))[0]
+                t.cursor.execute(
+                    "SELECT name, id, position FROM seasons "
+                    + "WHERE record_id = ?",
+                    (record_id,),
+                )
+                seasons = {row[0]: row[1:] for row in t.cursor.fetchall()}
+                t.cursor.execute(
+                    """
+                    SELECT season_id, MAX(position) + 1 FROM videos
+                    WHERE record_id = ?
+                    GROUP BY season_id
+                    """,
+                    (record_id,),
+                )
+                positions = dict(t.cursor.fetchall())
+
+        if verbose:
+            print("Processing:")
+            print(cls.INDENTATION + f"Index location: {index}")
+            print(cls.INDENTATION + f"Content type: {type_}")
+            print(cls.INDENTATION + f"Target location: {target}")
+            if processed > 0:
+                print(
+                    cls.INDENTATION
+                    + f"Resuming after {processed} of {len(files)} files"
+                )
+
+        if progress is not None:
+            progress.add_total(len(files) - processed)
+
+        thumbnails = (index / FluxConfig.THUMBNAILS).resolve()
+        thumbnails.mkdir(parents=True, exist_ok=True)
+        with BatchWriter(
+            index_db,
+            chunk_rows=FluxConfig.DB_WRITE_CHUNK_ROWS,
+            chunk_duration=FluxConfig.DB_WRITE_CHUNK_DURATION,
+            chunk_pause=FluxConfig.DB_WRITE_CHUNK_PAUSE,
+        ) as writer:
+            for start in range(processed, len(files), batch_size):
+                batch = files[start : start + batch_size]
+
+                # process files and create thumbnails (in parallel)
+                videos = cls.process_video_files(
+                    [
                         (
-                            video.thumbnail_id,
-                            video.thumbnail_id + DEFAULT_THUMBNAIL_EXTENSION,
-                        ),
+                            file,
+                            (
+                                "video"
+                                if type_ == "collection"
+                                else (
+                                    "special"
+                                    if season_name is None
+                                    else "episode"
+                                )
+                            ),
+                        )
+                        for season_name, file in batch
+                    ],
+                    executor=executor,
+                    verbose=verbose,
+                    cache=cache,
+                    progress=progress,
+                    indexed=indexed,
+                )
+                cls.generate_thumbnails(
+                    [video for video in videos if video is not None],
+                    thumbnails,
+                    executor=executor,
+                    progress=progress,
+                )
+
+                # queue rows (written in chunks together with the
+                # progress)
+                for offset, ((season_name, _), video) in enumerate(
+                    zip(batch, videos)
+                ):
+                    if video is not None:
+                        writer.add(
+                            "INSERT INTO thumbnails VALUES (?, ?)",
+                            [
+                                (
+                                    video.thumbnail_id,
+                                    video.thumbnail_id
+                                    + DEFAULT_THUMBNAIL_EXTENSION,
+                                )
+                            ],
+                        )
+                        if not exists:
+                            # record is created with its first video
+                            writer.add(
+                                "INSERT INTO records "
+                                + "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                                [
+                                    (
+                                        record_id,
+                                        video.thumbnail_id,
+                                        type_,
+                                        name or target.name,
+                                        description
+                                        or "No description provided",
+                                        floor(time()),
+                                        str(target),
+                                    )
+                                ],
+                            )
+                            writer.add(
+                                "INSERT INTO imports VALUES (?, ?, ?)",
+                                [(record_id, 0, floor(time()))],
+                            )
+                            exists = True
+                        season_id = None
+                        if season_name is not None:
+                            if season_name not in seasons:
+                                seasons[season_name] = (
+                                    str(uuid4()),
+                                    len(seasons),
+                                )
+                                writer.add(
+                                    "INSERT INTO seasons VALUES (?, ?, ?, ?)",
+                                    [
+                                        (
+                                            seasons[season_name][0],
+                                            record_id,
+                                            season_name,
+                                            seasons[season_name][1],
+                                        )
+                                    ],
+                                )
+                                if verbose:
+                                    print(
+                                        cls.INDENTATION
+                                        + f"Processed '{season_name}' as "
+                                        + "season"
+                                    )
+                            season_id = seasons[season_name][0]
+                        position = positions.get(season_id, 0)
+                        positions[season_id] = position + 1
+                        writer.add(
+                            "INSERT INTO videos VALUES (?, ?, ?, ?, ?, ?, ?)",
+                            [
+                                (
+                                    video.id,
+                                    record_id,
+                                    season_id,
+                                    video.thumbnail_id,
+                                    video.name,
+                                    "No description provided.",
+                                    position,
+                                )
+                            ],
+                        )
+                        writer.add(
+                            INSERT_TRACK,
+                            [
+                                get_track_row(
+                                    str(uuid4()),
+                                    video.id,
+                                    video.path,
+                                    video.metadata,
+                                    video.stat,
+                                    fingerprint=video.fingerprint,
+                                )
+                            ],
+                        )
+                        if progress is not None:
+                            progress.done(video.path, "added")
+                    if exists:
+                        writer.checkpoint(
+                            "UPDATE imports SET processed = ? "
+                            + "WHERE record_id = ?",
+                            (start + offset + 1, record_id),
+                        )
+                # the thumbnails of this batch have already been written,
+                # hence the remaining rows (and the progress) are written
+                # as well so that the journal does not lag behind them
+                writer.flush()
+                if verbose:
+                    print(
+                        cls.INDENTATION
+                        + f"Processed {start + len(batch)} of {len(files)} "
+                        + "files"
                     )
-                # .. now remaining contents
-                t.cursor.execute(
-                    "INSERT INTO records VALUES (?, ?, ?, ?, ?)",
-                    (
-                        collection.id,
-                        collection.thumbnail_id,
-                        "collection",
-                        collection.name,
-                        collection.description,
+
+            if exists:
+                # completed
+                writer.checkpoint(
+                    "DELETE FROM imports WHERE record_id = ?", (record_id,)
+                )
+
+        # files that had been indexed at a different location
+        if verbose and indexed.moves:
+            print(
+                cls.INDENTATION
+                + f"Updating location of {len(indexed.moves)} moved file(s)"
+            )
+        indexed.write_moves(target)
+
+        if progress is not None:
+            for duration in writer.hold_times:
+                progress.record("write", duration)
+
+        if verbose and writer.hold_times:
+            print(
+                cls.INDENTATION
+                + f"Wrote {writer.rows_written} rows in "
+                + f"{len(writer.hold_times)} transaction(s) (write lock "
+                + f"held for at most {max(writer.hold_times) * 1e3:.1f} ms)"
+            )
+
+        if not exists:
+            if verbose:
+                print(
+                    cls.INDENTATION
+                    + f"Cannot process as {type_}: Target needs to contain "
+                    + "at least one new video.",
+                    file=sys.stderr,
+                )
+            return None
+        return record_id
+
+    @classmethod
+    def process_movie(
+        # pylint: disable=redefined-outer-name
+        cls,
+        index: Path,
+        target: Path,
+        name: Optional[str] = None,
+        description: Optional[str] = None,
+        *,
+        verbose: bool = False,
+        dry_run: bool = False,
+        cache: Optional[ProbeCache] = None,
+        progress: Optional[Progress] = None,
+    ) -> Optional[str]:
+        """
+        Add target to index (see `prepare_movie` for arguments). Returns
+        the record-id or `None` if nothing has been added.
+        """
+        if progress is not None:
+            progress.add_total(1)
+        indexed = IndexedFiles(index / FluxConfig.INDEX_DB_FILE)
+        movie = cls.prepare_movie(
+            index,
+            target,
+            name,
+            description,
+            verbose=verbose,
+            dry_run=dry_run,
+            cache=cache,
+            progress=progress,
+            indexed=indexed,
+        )
+        if dry_run:
+            return None
+        indexed.write_moves(target.resolve())
+        if movie is None:
+            return None
+        with timed(progress, "write", None):
+            cls.write_movie(index, movie)
+        if progress is not None:
+            progress.done(movie.path, "added")
+        return movie.id
+
+    @classmethod
+    def process_series(
+        # pylint: disable=redefined-outer-name
+        cls,
+        index: Path,
+        target: Path,
+        name: Optional[str] = None,
+        description: Optional[str] = None,
+        *,
+        verbose: bool = False,
+        dry_run: bool = False,
+        executor: Optional[Executor] = None,
+        cache: Optional[ProbeCache] = None,
+        progress: Optional[Progress] = None,
+    ) -> Optional[str]:
+        """
+        Add target to index (see `prepare_series` for arguments). Unless
+        running a simulation, the target is imported in batches (see
+        `import_record`). Returns the record-id or `None` if nothing has
+        been added.
+        """
+        if dry_run:
+            cls.prepare_series(
+                index,
+                target,
+                name,
+                description,
+                verbose=verbose,
+                dry_run=dry_run,
+                executor=executor,
+                cache=cache,
+                indexed=IndexedFiles(index / FluxConfig.INDEX_DB_FILE),
+            )
+            return None
+        return cls.import_record(
+            index,
+            target,
+            "series",
+            name,
+            description,
+            verbose=verbose,
+            executor=executor,
+            cache=cache,
+            progress=progress,
+        )
+
+    @classmethod
+    def process_collection(
+        # pylint: disable=redefined-outer-name
+        cls,
+        index: Path,
+        target: Path,
+        name: Optional[str] = None,
+        description: Optional[str] = None,
+        *,
+        verbose: bool = False,
+        dry_run: bool = False,
+        executor: Optional[Executor] = None,
+        cache: Optional[ProbeCache] = None,
+        progress: Optional[Progress] = None,
+    ) -> Optional[str]:
+        """
+        Add target to index (see `prepare_collection` for arguments). Unless
+        running a simulation, the target is imported in batches (see
+        `import_record`). Returns the record-id or `None` if nothing has
+        been added.
+        """
+        if dry_run:
+            cls.prepare_collection(
+                index,
+                target,
+                name,
+                description,
+                verbose=verbose,
+                dry_run=dry_run,
+                executor=executor,
+                cache=cache,
+                indexed=IndexedFiles(index / FluxConfig.INDEX_DB_FILE),
+            )
+            return None
+        return cls.import_record(
+            index,
+            target,
+            "collection",
+            name,
+            description,
+            verbose=verbose,
+            executor=executor,
+            cache=cache,
+            progress=progress,
+        )
+
+    @staticmethod
+    def parse_manifest_record(
+        data: Any,
+    ) -> tuple[str, Path, str, str, Optional[Path], list[tuple]]:
+        """
+        Returns tuple of type, path, name, description, thumbnail, and
+        videos (as tuples of `VideoFile`, season-name, and thumbnail) of
+        a manifest-record. Raises `ValueError` for invalid records.
+        """
+
+        def get_string(obj: dict, key: str, required: bool = False):
+            value = obj.get(key)
+            if value is None and not required:
+                return None
+            if not isinstance(value, str) or value == "":
+                raise ValueError(f"Bad or missing field '{key}'.")
+            return value
+
+        if not isinstance(data, dict):
+            raise ValueError("Record is not an object.")
+        type_ = get_string(data, "type", True)
+        if type_ not in ["movie", "series", "collection"]:
+            raise ValueError(f"Unknown record type '{type_}'.")
+        path = Path(get_string(data, "path", True))
+        if not path.is_absolute():
+            raise ValueError(f"Path '{path}' is not absolute.")
+        thumbnail = get_string(data, "thumbnail")
+        if not isinstance(data.get("videos"), list) or not data["videos"]:
+            raise ValueError("Bad or missing field 'videos'.")
+        if type_ == "movie" and len(data["videos"]) != 1:
+            raise ValueError("Movies require exactly one video.")
+
+        videos = []
+        for video in data["videos"]:
+            if not isinstance(video, dict):
+                raise ValueError("Video is not an object.")
+            video_path = Path(get_string(video, "path", True))
+            if not video_path.is_absolute():
+                raise ValueError(f"Path '{video_path}' is not absolute.")
+            metadata = video.get("metadata")
+            if (
+                not isinstance(metadata, dict)
+                or not isinstance(metadata.get("format"), dict)
+                or "duration" not in metadata["format"]
+            ):
+                raise ValueError(
+                    f"Bad or missing field 'metadata' for '{video_path}' "
+                    + "(requires ffprobe-format with 'format.duration')."
+                )
+            season = get_string(video, "season")
+            if season is not None and type_ != "series":
+                raise ValueError(f"Seasons are not supported for {type_}.")
+            video_thumbnail = get_string(video, "thumbnail")
+            videos.append(
+                (
+                    VideoFile(
+                        video_path,
+                        get_string(video, "name") or video_path.stem,
+                        metadata,
+                        description=get_string(video, "description")
+                        or "No description provided.",
                     ),
+                    season,
+                    None if video_thumbnail is None else Path(video_thumbnail),
                 )
-                for position, video in enumerate(collection.videos):
-                    t.cursor.execute(
-                        "INSERT INTO videos VALUES (?, ?, ?, ?, ?, ?, ?)",
+            )
+        return (
+            type_,
+            path,
+            get_string(data, "name") or path.stem,
+            get_string(data, "description") or "No description provided",
+            None if thumbnail is None else Path(thumbnail),
+            videos,
+        )
+
+    @staticmethod
+    def copy_thumbnail(
+        source: Path, thumbnail_id: str, thumbnails: Path
+    ) -> Optional[str]:
+        """
+        Copies precomputed thumbnail `source` to directory `thumbnails`
+        (hard-linked if possible) and returns its file name (`None` if
+        not successful).
+        """
+        filename = thumbnail_id + (
+            source.suffix or DEFAULT_THUMBNAIL_EXTENSION
+        )
+        try:
+            try:
+                os.link(source, thumbnails / filename)
+            except OSError:
+                # different filesystem or no support for hard links
+                copyfile(source, thumbnails / filename)
+        except OSError as exc_info:
+            print(
+                "\033[1;33m"
+                + f"Failed to copy thumbnail '{source}': {exc_info}"
+                + "\033[0m",
+                file=sys.stderr,
+            )
+            return None
+        return filename
+
+    @classmethod
+    def import_manifest(
+        # pylint: disable=redefined-outer-name, too-many-locals
+        # pylint: disable=too-many-branches, too-many-statements
+        cls,
+        index: Path,
+        manifest: Path,
+        *,
+        verbose: bool = False,
+        dry_run: bool = False,
+        executor: Optional[Executor] = None,
+    ) -> list[str]:
+        """
+        Add records from JSONL-`manifest` (one record per line) to index
+        without probing files (metadata is taken from the manifest).
+        Precomputed thumbnails are copied, missing thumbnails are
+        generated. Rows are written in chunks (with a checkpoint after
+        every record). Invalid records are skipped. Returns list of
+        record-ids.
+
+        Keyword arguments:
+        index -- index location
+        manifest -- manifest file
+        verbose -- whether to run in verbose mode
+                   (default False)
+        dry_run -- whether to only validate the manifest (automatically
+                   verbose)
+                   (default False)
+        executor -- executor for handling files in parallel
+                    (default None; sequential processing)
+        """
+        if dry_run:
+            verbose = True
+
+        thumbnails = (index / FluxConfig.THUMBNAILS).resolve()
+        if not dry_run:
+            thumbnails.mkdir(parents=True, exist_ok=True)
+
+        def create_thumbnail(item) -> Optional[str]:
+            video, _, source = item
+            filename = None
+            if source is not None:
+                filename = cls.copy_thumbnail(
+                    source, video.thumbnail_id, thumbnails
+                )
+            if filename is None:
+                filename = video.thumbnail_id + DEFAULT_THUMBNAIL_EXTENSION
+                if not cls.generate_thumbnail(video, thumbnails / filename):
+                    return None
+            return filename
+
+        record_ids = []
+        videos_total = 0
+        with open(manifest, "r", encoding="utf-8") as file, BatchWriter(
+            index / FluxConfig.INDEX_DB_FILE,
+            chunk_rows=FluxConfig.DB_WRITE_CHUNK_ROWS,
+            chunk_duration=FluxConfig.DB_WRITE_CHUNK_DURATION,
+            chunk_pause=FluxConfig.DB_WRITE_CHUNK_PAUSE,
+        ) as writer:
+            for number, line in enumerate(file, start=1):
+                if line.strip() == "":
+                    continue
+                try:
+                    type_, path, name, description, thumbnail, videos = (
+                        cls.parse_manifest_record(json.loads(line))
+                    )
+                except ValueError as exc_info:
+                    print(
+                        "\033[1;33m"
+                        + f"Skipping line {number} of '{manifest}': "
+                        + f"{exc_info}"
+                        + "\033[0m",
+                        file=sys.stderr,
+                    )
+                    continue
+
+                # file identity (files that do not exist are skipped)
+                for item, stat_ in zip(
+                    videos,
+                    cls.map_jobs(
+                        executor, lambda item: get_stat(item[0].path), videos
+                    ),
+                ):
+                    item[0].stat = stat_
+                    if stat_ is None:
+                        print(
+                            "\033[1;33m"
+                            + f"Skipping missing file '{item[0].path}'."
+                            + "\033[0m",
+                            file=sys.stderr,
+                        )
+                videos = [item for item in videos if item[0].stat is not None]
+                if not videos:
+                    print(
+                        "\033[1;33m"
+                        + f"Skipping line {number} of '{manifest}': No "
+                        + "video available."
+                        + "\033[0m",
+                        file=sys.stderr,
+                    )
+                    continue
+                if verbose:
+                    print(
+                        f"{'Validated' if dry_run else 'Adding'} {type_} "
+                        + f"'{name}' with {len(videos)} video(s) (line "
+                        + f"{number})"
+                    )
+                if dry_run:
+                    continue
+
+                # thumbnails (videos without thumbnail reference none;
+                # the record requires a thumbnail, so the entry for the
+                # first video is kept if no thumbnail could be created)
+                filenames = cls.map_jobs(executor, create_thumbnail, videos)
+                thumbnail_ids = {
+                    item[0].thumbnail_id: filename
+                    for item, filename in zip(videos, filenames)
+                    if filename is not None
+                }
+                record_thumbnail_id = next(
+                    iter(thumbnail_ids), videos[0][0].thumbnail_id
+                )
+                writer.add(
+                    "INSERT INTO thumbnails VALUES (?, ?)",
+                    list(thumbnail_ids.items())
+                    or [
                         (
-                            video.id,
-                            collection.id,
-                            None,
-                            video.thumbnail_id,
-                            video.name,
-                            "No description provided.",
-                            position,
-                        ),
+                            record_thumbnail_id,
+                            record_thumbnail_id + DEFAULT_THUMBNAIL_EXTENSION,
+                        )
+                    ],
+                )
+                record_id = (
+                    videos[0][0].id if type_ == "movie" else str(uuid4())
+                )
+                if thumbnail is not None:
+                    thumbnail_id = str(uuid4())
+                    filename = cls.copy_thumbnail(
+                        thumbnail, thumbnail_id, thumbnails
                     )
-                    t.cursor.execute(
-                        "INSERT INTO tracks VALUES (?, ?, ?, ?, ?)",
+                    if filename is not None:
+                        writer.add(
+                            "INSERT INTO thumbnails VALUES (?, ?)",
+                            [(thumbnail_id, filename)],
+                        )
+                        record_thumbnail_id = thumbnail_id
+
+                # record, seasons, videos, and tracks
+                writer.add(
+                    "INSERT INTO records VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [
                         (
-                            str(uuid4()),
-                            video.id,
-                            str(video.path),
-                            json.dumps(video.metadata),
-                            1,
-                        ),
+                            record_id,
+                            record_thumbnail_id,
+                            type_,
+                            name,
+                            description,
+                            floor(time()),
+                            str(path),
+                        )
+                    ],
+                )
+                seasons: dict[str, str] = {}
+                positions: dict[Optional[str], int] = {}
+                for video, season_name, _ in videos:
+                    season_id = None
+                    if season_name is not None:
+                        if season_name not in seasons:
+                            seasons[season_name] = str(uuid4())
+                            writer.add(
+                                "INSERT INTO seasons VALUES (?, ?, ?, ?)",
+                                [
+                                    (
+                                        seasons[season_name],
+                                        record_id,
+                                        season_name,
+                                        len(seasons) - 1,
+                                    )
+                                ],
+                            )
+                        season_id = seasons[season_name]
+                    position = positions.get(season_id, 0)
+                    positions[season_id] = position + 1
+                    writer.add(
+                        "INSERT INTO videos VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        [
+                            (
+                                video.id,
+                                record_id,
+                                season_id,
+                                (
+                                    video.thumbnail_id
+                                    if video.thumbnail_id in thumbnail_ids
+                                    else None
+                                ),
+                                video.name if type_ != "movie" else None,
+                                (
+                                    video.description
+                                    if type_ != "movie"
+                                    else None
+                                ),
+                                position,
+                            )
+                        ],
                     )
+                    writer.add(
+                        INSERT_TRACK,
+                        [
+                            get_track_row(
+                                str(uuid4()),
+                                video.id,
+                                video.path,
+                                video.metadata,
+                                video.stat,
+                            )
+                        ],
+                    )
+                # records are written entirely or not at all
+                writer.checkpoint()
+                record_ids.append(record_id)
+                videos_total += len(videos)
+
+        if verbose and not dry_run:
+            print(
+                f"Added {len(record_ids)} record(s) with {videos_total} "
+                + f"video(s) from '{manifest}' ({writer.rows_written} rows "
+                + f"in {len(writer.hold_times)} transaction(s))"
+            )
+        return record_ids
 
-    def get_target_heuristic(self, target: Path) -> Optional[str]:
+    @staticmethod
+    def get_target_heuristic(target: Path) -> Optional[str]:
         """
         Heuristically determine target type (movie, series, collection).
         """
         if target.is_file():
             return "movie"
 
-        files = [f for f in target.glob("*") if f.is_file()]
-        dirs = [f for f in target.glob("*") if f.is_dir()]
+        files, dirs = scan(target)
 
         if len(files) == 0 and len(dirs) == 0:
             return None
@@ -778,69 +1746,150 @@ class AddToIndex(Command):
 
         for dir_ in dirs:
             # deeply nested directories
-            if (
-                len([subdir for subdir in dir_.glob("*") if subdir.is_dir()])
-                > 0
-            ):
+            if next(walk(dir_, directories=True), None) is not None:
                 return "collection"
 
         # single level directories
         return "series"
 
+    @staticmethod
+    def get_interrupted_imports(index: Path) -> list[tuple[str, str, Path]]:
+        """
+        Returns list of interrupted imports as tuples of record-id,
+        type, and target.
+        """
+        with Transaction(
+            index / FluxConfig.INDEX_DB_FILE, readonly=True
+        ) as t:
+            t.cursor.execute(
+                """
+                SELECT records.id, records.type, records.path
+                FROM imports
+                JOIN records ON records.id = imports.record_id
+                ORDER BY imports.started
+                """
+            )
+        return [(row[0], row[1], Path(row[2])) for row in t.data]
+
     def run(self, args):
         # pylint: disable=redefined-outer-name
         verbose = self.verbose in args
         dry_run = self.dry_run in args
+        jobs = args.get(self.jobs, [os.cpu_count() or 1])[0]
 
         # read and process index-location
         index = get_index(args)
 
-        # process
-        for t in args[self.target]:
-            # determine type
-            type_ = args.get(self.type_)
-            if type_ is None:
-                type_ = [self.get_target_heuristic(t)]
-                if type[0] is None:
+        if self.manifest in args:
+            if not args[self.manifest][0].is_file():
+                print(
+                    f"Manifest '{args[self.manifest][0]}' does not exist.",
+                    file=sys.stderr,
+                )
+                sys.exit(1)
+            with ThreadPoolExecutor(jobs) as executor:
+                self.import_manifest(
+                    index,
+                    args[self.manifest][0],
+                    verbose=verbose,
+                    dry_run=dry_run,
+                    executor=executor,
+                )
+            return
+
+        interrupted = self.get_interrupted_imports(index)
+
+        # determine types
+        targets = []
+        if self.resume in args:
+            # continue interrupted imports
+            selection = {t.resolve() for t in args.get(self.target, [])}
+            for record_id, type_, t in interrupted:
+                if not selection or t in selection:
+                    selection.discard(t)
+                    targets.append((t, type_, record_id))
+            for t in selection:
+                print(f"No interrupted import for '{t}'.", file=sys.stderr)
+        else:
+            for t in args[self.target]:
+                # targets are processed concurrently, so that duplicates
+                # could not be detected as indexed files reliably
+                if t.resolve() in [target for target, _, _ in targets]:
                     print(
-                        f"Heuristic record type detection failed for '{t}'.",
+                        "\033[1;33m"
+                        + f"Skipping '{t}' (duplicate target)."
+                        + "\033[0m",
                         file=sys.stderr,
                     )
-                    sys.exit(1)
-                if verbose:
-                    print(f"Processing '{t}' as {type_[0]}.")
-
-            match (type_[0]):
-                case "series":
-                    self.process_series(
-                        index,
-                        t.resolve(),
-                        args.get(self.name_, [None])[0],
-                        args.get(self.description, [None])[0],
-                        verbose=verbose,
-                        dry_run=dry_run,
-                    )
-                case "movie":
-                    self.process_movie(
-                        index,
-                        t.resolve(),
-                        args.get(self.name_, [None])[0],
-                        args.get(self.description, [None])[0],
-                        verbose=verbose,
-                        dry_run=dry_run,
-                    )
-                case "collection":
-                    self.process_collection(
-                        index,
-                        t.resolve(),
-                        args.get(self.name_, [None])[0],
-                        args.get(self.description, [None])[0],
-                        verbose=verbose,
-                        dry_run=dry_run,
-                    )
-                case _:
+                    continue
+                if t.resolve() in [target for _, _, target in interrupted]:
                     print(
-                        f"Type '{args[self.type_][0]}' is not supported.",
+                        "\033[1;33m"
+                        + f"Skipping '{t}' (import has been interrupted; "
+                        + f"use '{self.resume.names[0]}' to continue)."
+                        + "\033[0m",
                         file=sys.stderr,
                     )
-                    sys.exit(1)
+                    continue
+                type_ = args.get(self.type_, [None])[0]
+                if type_ is None:
+                    type_ = self.get_target_heuristic(t)
+                    if type_ is None:
+                        print(
+                            "Heuristic record type detection failed for "
+                            + f"'{t}'.",
+                            file=sys.stderr,
+                        )
+                        sys.exit(1)
+                    if verbose:
+                        print(f"Processing '{t}' as {type_}.")
+                targets.append((t.resolve(), type_, None))
+
+        # results of previous runs (also dry-runs) are reused
+        cache = ProbeCache(
+            index / FluxConfig.PROBE_CACHE_FILE, FluxConfig.PROBE_CACHE_SIZE
+        )
+
+        # process
+        # targets are processed concurrently (probing and thumbnails of
+        # individual files are distributed across a shared pool of
+        # `jobs` workers)
+        def process(target):
+            t, type_, record_id = target
+            if record_id is not None:
+                self.import_record(
+                    index,
+                    t,
+                    type_,
+                    verbose=verbose,
+                    executor=executor,
+                    cache=cache,
+                    record_id=record_id,
+                    progress=progress,
+                )
+                return
+            kwargs = {
+                "verbose": verbose,
+                "dry_run": dry_run,
+                "cache": cache,
+                "progress": progress,
+            }
+            if type_ != "movie":
+                kwargs["executor"] = executor
+            getattr(self, f"process_{type_}")(
+                index,
+                t,
+                args.get(self.name_, [None])[0],
+                args.get(self.description, [None])[0],
+                **kwargs,
+            )
+
+        progress = None
+        if self.progress in args:
+            progress = Progress(workers=jobs)
+        with ThreadPoolExecutor(jobs) as executor, ThreadPoolExecutor(
+            jobs
+        ) as target_executor, progress or nullcontext():
+            list(target_executor.map(process, targets))
+
+        cache.evict()
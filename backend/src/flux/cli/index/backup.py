@@ -0,0 +1,239 @@
+"""Definition of the backup-subcommand."""
+
+from typing import Optional, Iterable
+import os
+import sys
+import sqlite3
+import time
+from pathlib import Path
+from shutil import copy2
+from concurrent.futures import Executor, ThreadPoolExecutor
+
+from befehl import Command, Option, Argument, Parser
+
+from flux.config import FluxConfig
+from ..common import verbose, index_location, get_index, parse_as_flux_dir
+from .common import jobs
+
+
+def snapshot(
+    source: Path,
+    target: Path,
+    *,
+    pages: int = -1,
+    sleep: float = 0,
+) -> int:
+    """
+    Copies the database `source` to `target` with the SQLite backup API
+    and returns the number of steps. The copy is made in steps of
+    `pages` pages (all at once if not positive) with a pause of `sleep`
+    seconds in between.
+
+    The source is read within a single read-transaction. In WAL-mode,
+    this neither blocks other connections nor restarts the backup when
+    the source is written to in the meantime (the copy reflects the
+    state at the start of the backup).
+    """
+    steps = 0
+
+    def progress(_, remaining: int, __) -> None:
+        # called after every step (the `sleep`-argument of
+        # `Connection.backup` only applies to busy or locked steps)
+        nonlocal steps
+        steps += 1
+        if remaining > 0 and sleep > 0:
+            time.sleep(sleep)
+
+    source_connection = sqlite3.connect(
+        f"file:{source.resolve()}?mode=ro", uri=True, isolation_level=None
+    )
+    try:
+        source_connection.execute(
+            f"PRAGMA busy_timeout = {int(FluxConfig.DB_BUSY_TIMEOUT)}"
+        )
+        source_connection.execute("BEGIN")
+        source_connection.execute("SELECT COUNT(*) FROM sqlite_master")
+        target_connection = sqlite3.connect(target, isolation_level=None)
+        try:
+            target_connection.execute(
+                f"PRAGMA busy_timeout = {int(FluxConfig.DB_BUSY_TIMEOUT)}"
+            )
+            source_connection.backup(
+                target_connection, pages=pages, progress=progress
+            )
+        finally:
+            target_connection.close()
+        source_connection.execute("COMMIT")
+    finally:
+        source_connection.close()
+    return steps
+
+
+def copy_thumbnails(
+    thumbnails: Iterable[tuple[str, str]],
+    source: Path,
+    target: Path,
+    *,
+    overwrite: bool = True,
+    executor: Optional[Executor] = None,
+) -> list[str]:
+    """
+    Copies `thumbnails` (tuples of id and filename) from the directory
+    `source` to `target` and returns the ids of the copied thumbnails
+    (missing files are skipped with a warning). The modification time
+    is preserved; if not `overwrite`, files that already exist in
+    `target` with the same size and modification time are skipped.
+    """
+    target.mkdir(parents=True, exist_ok=True)
+
+    def copy(thumbnail: tuple[str, str]) -> Optional[str]:
+        id_, filename = thumbnail
+        try:
+            if not overwrite:
+                stat = (source / filename).stat()
+                try:
+                    existing = (target / filename).stat()
+                except FileNotFoundError:
+                    existing = None
+                if (
+                    existing is not None
+                    and existing.st_size == stat.st_size
+                    and existing.st_mtime_ns == stat.st_mtime_ns
+                ):
+                    return None
+            copy2(source / filename, target / filename)
+        except OSError as exc_info:
+            print(
+                "\033[1;33m"
+                + f"Skipping thumbnail '{id_}': {exc_info}"
+                + "\033[0m",
+                file=sys.stderr,
+            )
+            return None
+        return id_
+
+    if executor is None:
+        results = map(copy, thumbnails)
+    else:
+        results = executor.map(copy, thumbnails)
+    return [id_ for id_ in results if id_ is not None]
+
+
+class BackupIndex(Command):
+    """Subcommand for creating a backup of the index."""
+
+    index_location = index_location
+    jobs = jobs
+    verbose = verbose
+    full = Option(
+        "--full",
+        helptext="copy all thumbnails (not only new ones)",
+        parser=Parser.parse_as_bool,
+    )
+
+    destination = Argument(
+        "destination",
+        helptext="backup directory (same layout as an index)",
+        nargs=1,
+        parser=parse_as_flux_dir,
+    )
+
+    @staticmethod
+    def backup(
+        # pylint: disable=redefined-outer-name
+        index: Path,
+        destination: Path,
+        *,
+        full: bool = False,
+        verbose: bool = False,
+        executor: Optional[Executor] = None,
+    ) -> int:
+        """
+        Creates a snapshot of the database of `index` in `destination`
+        and copies the thumbnails that are referenced in the snapshot.
+        Returns the number of copied thumbnails.
+
+        The database is copied in paced steps (see
+        `FluxConfig.BACKUP_PAGES` and `FluxConfig.BACKUP_SLEEP`) to a
+        temporary file that replaces a previous snapshot only once it is
+        complete. Thumbnails that already exist in `destination` with the
+        same size and modification time (e.g. from a previous backup) are
+        skipped (unless `full`).
+
+        Keyword arguments:
+        index -- index location
+        destination -- backup location
+        full -- whether to copy all thumbnails
+                (default False)
+        verbose -- whether to run in verbose mode
+                   (default False)
+        executor -- executor for copying thumbnails in parallel
+                    (default None; sequential processing)
+        """
+        destination = destination.resolve()
+        destination.mkdir(parents=True, exist_ok=True)
+        index_db = index / FluxConfig.INDEX_DB_FILE
+        backup_db = destination / FluxConfig.INDEX_DB_FILE
+        partial_db = backup_db.with_name(backup_db.name + ".partial")
+
+        # database
+        if verbose:
+            print(f"Creating snapshot of '{index_db}' at '{backup_db}'")
+        partial_db.unlink(missing_ok=True)
+        steps = snapshot(
+            index_db,
+            partial_db,
+            pages=FluxConfig.BACKUP_PAGES,
+            sleep=FluxConfig.BACKUP_SLEEP,
+        )
+        os.replace(partial_db, backup_db)
+        if verbose:
+            print(f"Created snapshot in {steps} step(s)")
+
+        # thumbnails (the snapshot determines which thumbnails are
+        # needed; the files in the destination determine which of them
+        # have to be copied)
+        connection = sqlite3.connect(
+            f"file:{backup_db}?mode=ro", uri=True, isolation_level=None
+        )
+        try:
+            thumbnails = connection.execute(
+                "SELECT id, path FROM thumbnails"
+            ).fetchall()
+        finally:
+            connection.close()
+        if verbose:
+            print(f"Checking {len(thumbnails)} thumbnail(s)")
+        copied = copy_thumbnails(
+            thumbnails,
+            index / FluxConfig.THUMBNAILS,
+            destination / FluxConfig.THUMBNAILS,
+            overwrite=full,
+            executor=executor,
+        )
+        if verbose:
+            print(f"Copied {len(copied)} thumbnail(s)")
+
+        if verbose:
+            print(f"Created backup at '{destination}'")
+        return len(copied)
+
+    def run(self, args):
+        # pylint: disable=redefined-outer-name
+        verbose = self.verbose in args
+        jobs = args.get(self.jobs, [os.cpu_count() or 1])[0]
+
+        # read and process index-location
+        index = get_index(args)
+        if not (index / FluxConfig.INDEX_DB_FILE).is_file():
+            print(f"No index at '{index}'", file=sys.stderr)
+            sys.exit(1)
+
+        with ThreadPoolExecutor(jobs) as executor:
+            self.backup(
+                index,
+                args[self.destination][0],
+                full=self.full in args,
+                verbose=verbose,
+                executor=executor,
+            )
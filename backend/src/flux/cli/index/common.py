@@ -1,5 +1,7 @@
 """Common definitions of the index-subcommand."""
 
+from typing import Optional
+
 from befehl import Parser, Option
 
 
@@ -10,4 +12,63 @@ dry_run = Option(
 )
 
 
+def parse_as_positive_int(data) -> tuple[bool, Optional[str], Optional[int]]:
+    """Parses `data` as positive integer."""
+    ok, msg, number = Parser.parse_as_int(data)
+    if not ok:
+        return ok, msg, number
+    if number < 1:
+        return False, f"input '{data}' is not a positive integer", None
+    return True, None, number
+
+
+jobs = Option(
+    ("-j", "--jobs"),
+    helptext="number of parallel jobs (default uses number of CPUs)",
+    nargs=1,
+    parser=parse_as_positive_int,
+)
+
+
 DEFAULT_THUMBNAIL_EXTENSION = ".jpg"
+# file extensions that are classified without reading the file (other
+# files are identified by their signature)
+VIDEO_EXTENSIONS = {
+    ".3gp",
+    ".avi",
+    ".flv",
+    ".m2ts",
+    ".m4v",
+    ".mkv",
+    ".mov",
+    ".mp4",
+    ".mpeg",
+    ".mpg",
+    ".ogv",
+    ".ts",
+    ".webm",
+    ".wmv",
+}
+NON_VIDEO_EXTENSIONS = {
+    ".ass",
+    ".bmp",
+    ".flac",
+    ".gif",
+    ".idx",
+    ".jpeg",
+    ".jpg",
+    ".json",
+    ".m4a",
+    ".md",
+    ".mp3",
+    ".nfo",
+    ".ogg",
+    ".pdf",
+    ".png",
+    ".srt",
+    ".sub",
+    ".txt",
+    ".vtt",
+    ".webp",
+    ".xml",
+}
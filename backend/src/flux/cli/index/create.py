@@ -7,7 +7,7 @@ from importlib.metadata import version
 from befehl import Command
 
 from flux.config import FluxConfig
-from flux.db import Transaction
+from flux.db import Transaction, set_journal_mode
 
 from ..common import verbose, index_location, get_index
 
@@ -45,6 +45,11 @@ def create_index(index: Path, verbose_: bool) -> None:
             "INSERT INTO index_metadata (initialized) VALUES (1)"
         )
 
+    if verbose_:
+        print(f"Setting journal mode '{FluxConfig.DB_JOURNAL_MODE}'")
+
+    set_journal_mode(index_db, FluxConfig.DB_JOURNAL_MODE)
+
     if verbose_:
         print("Created a new index")
 
@@ -0,0 +1,151 @@
+"""Device-aware scheduling of file operations."""
+
+from typing import Optional, Callable, Sequence, Iterator
+import os
+import threading
+from pathlib import Path
+from functools import lru_cache
+from contextlib import contextmanager
+from concurrent.futures import Executor, Future, wait, FIRST_COMPLETED
+
+from flux.config import FluxConfig
+
+
+def get_stat(path: Path) -> Optional[os.stat_result]:
+    """Returns result of `os.stat` for `path` (`None` on error)."""
+    try:
+        return path.stat()
+    except OSError:
+        return None
+
+
+@lru_cache
+def is_rotational(device: int) -> bool:
+    """
+    Returns whether the block device `device` (`st_dev`) is a rotational
+    disk (based on sysfs; `False` if unknown, e.g. for network
+    filesystems or on other platforms).
+    """
+    block = Path(f"/sys/dev/block/{os.major(device)}:{os.minor(device)}")
+    # partitions inherit the queue of their disk
+    for queue in [block / "queue", block / ".." / "queue"]:
+        try:
+            return (queue / "rotational").read_text(
+                encoding="utf-8"
+            ).strip() == "1"
+        except OSError:
+            continue
+    return False
+
+
+def get_device_limit(device: Optional[int]) -> Optional[int]:
+    """
+    Returns the maximum number of concurrent jobs for `device` (`None`
+    if not limited).
+    """
+    if device is None:
+        return None
+    if FluxConfig.JOBS_PER_DEVICE is not None:
+        return FluxConfig.JOBS_PER_DEVICE
+    return 1 if is_rotational(device) else None
+
+
+# slots per device (shared by all calls, e.g. of targets that are
+# processed concurrently; keys are device and limit)
+_device_slots: dict[tuple[int, int], threading.BoundedSemaphore] = {}
+_device_slots_lock = threading.Lock()
+
+
+@contextmanager
+def device_slot(stat: Optional[os.stat_result]) -> Iterator[None]:
+    """
+    Context manager that occupies one of the slots for concurrent jobs
+    on the device of `stat` (see `get_device_limit`) for the duration
+    of the context (waits for a free slot). The slots are shared
+    process-wide.
+    """
+    device = None if stat is None else stat.st_dev
+    limit = get_device_limit(device)
+    if device is None or limit is None:
+        yield
+        return
+    with _device_slots_lock:
+        slots = _device_slots.setdefault(
+            (device, limit), threading.BoundedSemaphore(limit)
+        )
+    with slots:
+        yield
+
+
+def map_by_device(
+    executor: Optional[Executor],
+    func: Callable,
+    items: Sequence,
+    stats: Sequence[Optional[os.stat_result]],
+) -> list:
+    """
+    Returns results of `func` applied to `items` (in order), where
+    `stats` contains the file identity of every item (or `None` if not
+    available).
+
+    Items are grouped by device and processed in order of their inode
+    (approximates the on-disk layout). If an `executor` is given, the
+    number of concurrent calls per device is limited (see
+    `get_device_limit`) while devices are processed in parallel. The
+    limits also apply across concurrent calls (see `device_slot`).
+    """
+    # group by device
+    queues: dict[Optional[int], list[int]] = {}
+    for i, stat in enumerate(stats):
+        queues.setdefault(None if stat is None else stat.st_dev, []).append(
+            i
+        )
+    for device, queue in queues.items():
+        if device is not None:
+            queue.sort(key=lambda i: stats[i].st_ino)
+        # items are taken from the end
+        queue.reverse()
+
+    def call(i: int):
+        with device_slot(stats[i]):
+            return func(items[i])
+
+    results = [None] * len(items)
+    if executor is None:
+        for queue in queues.values():
+            while queue:
+                i = queue.pop()
+                results[i] = call(i)
+        return results
+
+    limits = {device: get_device_limit(device) for device in queues}
+    running: dict[Future, tuple[Optional[int], int]] = {}
+
+    def submit() -> None:
+        """Submits items (round-robin across devices) up to the limits."""
+        active = {device: 0 for device in queues}
+        for device, _ in running.values():
+            active[device] += 1
+        while any(
+            queue
+            and (limits[device] is None or active[device] < limits[device])
+            for device, queue in queues.items()
+        ):
+            for device, queue in queues.items():
+                if not queue or (
+                    limits[device] is not None
+                    and active[device] >= limits[device]
+                ):
+                    continue
+                i = queue.pop()
+                running[executor.submit(call, i)] = (device, i)
+                active[device] += 1
+
+    submit()
+    while running:
+        done, _ = wait(running, return_when=FIRST_COMPLETED)
+        for future in done:
+            _, i = running.pop(future)
+            results[i] = future.result()
+        submit()
+    return results
@@ -0,0 +1,119 @@
+"""Content fingerprints for detecting indexed and moved files."""
+
+from typing import Optional
+import os
+import threading
+import hashlib
+from pathlib import Path
+
+from flux.config import FluxConfig
+from flux.db import Transaction
+from flux.db.tracks import TRACK_STAT_COLUMNS, get_track_stat
+
+
+def get_fingerprint(path: Path, size: int) -> Optional[str]:
+    """
+    Returns content fingerprint of the file at `path` with `size` bytes
+    (hash of the size and `FluxConfig.FINGERPRINT_BLOCKS` evenly spaced
+    blocks of `FluxConfig.FINGERPRINT_BLOCK_SIZE` bytes; `None` if the
+    file cannot be read).
+    """
+    blocks = FluxConfig.FINGERPRINT_BLOCKS
+    block_size = FluxConfig.FINGERPRINT_BLOCK_SIZE
+    digest = hashlib.blake2b(str(size).encode("utf-8"), digest_size=16)
+    try:
+        with open(path, "rb") as file:
+            if size <= blocks * block_size or blocks < 2:
+                digest.update(file.read(blocks * block_size))
+            else:
+                for i in range(blocks):
+                    file.seek((size - block_size) * i // (blocks - 1))
+                    digest.update(file.read(block_size))
+    except OSError:
+        return None
+    return f"{size}:{digest.hexdigest()}"
+
+
+class IndexedFiles:
+    """
+    Lookup of indexed tracks by their content fingerprint (used by
+    `flux index add` to skip files that are already indexed).
+
+    Files that match a track whose file does not exist at the indexed
+    location anymore are collected as moves of that track (see
+    `write_moves`), so that the track (and its playback progress) is
+    kept.
+    """
+
+    def __init__(self, index_db: Path) -> None:
+        self.index_db = index_db
+        # moved tracks as tuples of track-id, new path, and stat
+        self.moves: list[tuple[str, Path, os.stat_result]] = []
+        self._lock = threading.Lock()
+
+    def check(
+        self, file: Path, stat: os.stat_result, fingerprint: str
+    ) -> Optional[str]:
+        """
+        Returns 'indexed' if `file` is already indexed, 'moved' if it
+        has been moved, or `None` if it needs to be processed.
+        """
+        with Transaction(self.index_db, readonly=True) as t:
+            t.cursor.execute(
+                "SELECT id, path FROM tracks WHERE fingerprint = ?",
+                (fingerprint,),
+            )
+        if any(path == str(file) for _, path in t.data):
+            return "indexed"
+        with self._lock:
+            moved = {id_ for id_, _, _ in self.moves}
+            for id_, path in t.data:
+                if id_ not in moved and not os.path.exists(path):
+                    self.moves.append((id_, file, stat))
+                    return "moved"
+        return None
+
+    def write_moves(self, target: Path) -> None:
+        """
+        Updates the location of moved tracks. Records whose source does
+        not exist anymore are assigned the new source `target`.
+        """
+        if not self.moves:
+            return
+        with Transaction(self.index_db) as t:
+            t.cursor.executemany(
+                f"""
+                UPDATE tracks
+                SET
+                    path = ?,
+                    {', '.join(f'{c} = ?' for c in TRACK_STAT_COLUMNS)},
+                    available = 1
+                WHERE id = ?
+                """,
+                [
+                    (str(path),) + get_track_stat(stat) + (id_,)
+                    for id_, path, stat in self.moves
+                ],
+            )
+            records = {}
+            for id_, _, _ in self.moves:
+                t.cursor.execute(
+                    """
+                    SELECT records.id, records.path
+                    FROM tracks
+                    JOIN videos ON videos.id = tracks.video_id
+                    JOIN records ON records.id = videos.record_id
+                    WHERE tracks.id = ?
+                    """,
+                    (id_,),
+                )
+                records.update(t.cursor.fetchall())
+            t.cursor.executemany(
+                "UPDATE records SET path = ? WHERE id = ?",
+                [
+                    (str(target), record_id)
+                    for record_id, path in records.items()
+                    if path is None or not os.path.exists(path)
+                ],
+            )
+        self.moves = []
@@ -0,0 +1,102 @@
+"""Minimal inotify-interface (Linux) based on `ctypes`."""
+
+from typing import Optional
+import os
+import ctypes
+import ctypes.util
+import select
+import struct
+from pathlib import Path
+from dataclasses import dataclass
+
+
+# event masks (see `man 7 inotify`)
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+
+_EVENT = struct.Struct("iIII")
+
+
+@dataclass
+class Event:
+    """Record class for an inotify-event."""
+
+    wd: int
+    mask: int
+    cookie: int
+    name: str
+
+
+class Inotify:
+    """
+    Context manager for an inotify-instance.
+
+    Raises `OSError` if inotify is not available.
+    """
+
+    def __init__(self) -> None:
+        self._libc = ctypes.CDLL(
+            ctypes.util.find_library("c") or "libc.so.6", use_errno=True
+        )
+        if not hasattr(self._libc, "inotify_init1"):
+            raise OSError("inotify is not supported on this platform")
+        self._fd: Optional[int] = None
+
+    def __enter__(self):
+        fd = self._libc.inotify_init1(os.O_CLOEXEC | os.O_NONBLOCK)
+        if fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+        self._fd = fd
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        os.close(self._fd)
+        self._fd = None
+
+    def add_watch(self, path: Path, mask: int) -> int:
+        """Adds watch for `path` and returns its watch descriptor."""
+        wd = self._libc.inotify_add_watch(
+            self._fd, os.fsencode(path), ctypes.c_uint32(mask)
+        )
+        if wd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno), str(path))
+        return wd
+
+    def rm_watch(self, wd: int) -> None:
+        """Removes watch with watch descriptor `wd`."""
+        if self._libc.inotify_rm_watch(self._fd, wd) < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+
+    def read(self, timeout: Optional[float] = None) -> list[Event]:
+        """
+        Returns events that are available within `timeout` seconds
+        (`None` blocks until events are available).
+        """
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return []
+        try:
+            data = os.read(self._fd, 2**16)
+        except BlockingIOError:
+            return []
+        events = []
+        offset = 0
+        while offset < len(data):
+            wd, mask, cookie, length = _EVENT.unpack_from(data, offset)
+            offset += _EVENT.size
+            name = os.fsdecode(data[offset : offset + length].rstrip(b"\0"))
+            offset += length
+            events.append(Event(wd, mask, cookie, name))
+        return events
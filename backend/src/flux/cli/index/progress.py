@@ -0,0 +1,164 @@
+"""Machine-readable progress reporting for indexing."""
+
+from typing import Optional, TextIO
+import sys
+import json
+import threading
+from pathlib import Path
+from contextlib import contextmanager, nullcontext
+from time import perf_counter
+
+from flux.config import FluxConfig
+
+
+class Progress:
+    """
+    Thread-safe reporter for the progress of processing files. Events
+    are written as JSON-lines to `stream`:
+    * 'file': per processed file with outcome, size, and the durations
+      of the individual stages (in ms),
+    * 'progress': periodically (every `interval` seconds) with
+      throughput, ETA, and worker utilization, and
+    * 'summary': once when leaving the context with the totals per
+      stage.
+
+    Worker utilization is the time spent in stages relative to the
+    time available to `workers` workers.
+    """
+
+    def __init__(
+        self,
+        *,
+        workers: int = 1,
+        interval: float = FluxConfig.PROGRESS_INTERVAL,
+        stream: Optional[TextIO] = None,
+    ) -> None:
+        self.workers = workers
+        self.interval = interval
+        self.stream = stream or sys.stdout
+        self.total = 0
+        self.files = 0
+        self.bytes = 0
+        # durations by stage
+        self.stages: dict[str, list[float]] = {}
+        # pending details by file
+        self._details: dict[Path, dict] = {}
+        self._lock = threading.Lock()
+        self._start = perf_counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def __enter__(self):
+        self._start = perf_counter()
+        self._thread = threading.Thread(target=self._report, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._stop.set()
+        self._thread.join()
+        with self._lock:
+            self.emit(
+                "summary",
+                **self._get_status(),
+                stages={
+                    stage: {
+                        "count": len(durations),
+                        "total_ms": round(sum(durations) * 1e3, 3),
+                        "mean_ms": round(
+                            sum(durations) / len(durations) * 1e3, 3
+                        ),
+                        "max_ms": round(max(durations) * 1e3, 3),
+                    }
+                    for stage, durations in self.stages.items()
+                },
+            )
+
+    def _report(self) -> None:
+        """Emits 'progress'-events until stopped."""
+        while not self._stop.wait(self.interval):
+            with self._lock:
+                self.emit("progress", **self._get_status())
+
+    def _get_status(self) -> dict:
+        """Returns current throughput, ETA, and utilization."""
+        elapsed = perf_counter() - self._start
+        rate = self.files / elapsed if elapsed > 0 else 0.0
+        return {
+            "files": self.files,
+            "total": self.total,
+            "elapsed_s": round(elapsed, 3),
+            "files_per_s": round(rate, 3),
+            "bytes_per_s": round(self.bytes / elapsed if elapsed > 0 else 0),
+            "eta_s": (
+                round((self.total - self.files) / rate, 1)
+                if rate > 0 and self.total >= self.files
+                else None
+            ),
+            "utilization": round(
+                (
+                    sum(map(sum, self.stages.values()))
+                    / (elapsed * self.workers)
+                    if elapsed > 0
+                    else 0.0
+                ),
+                3,
+            ),
+        }
+
+    def emit(self, event: str, **data) -> None:
+        """Writes event as JSON-line (caller needs to hold lock)."""
+        print(
+            json.dumps({"event": event, **data}),
+            file=self.stream,
+            flush=True,
+        )
+
+    def add_total(self, files: int) -> None:
+        """Adds `files` to the number of expected files."""
+        with self._lock:
+            self.total += files
+
+    def record(
+        self, stage: str, duration: float, file: Optional[Path] = None
+    ) -> None:
+        """Records `duration` (seconds) of `stage` (for `file`)."""
+        with self._lock:
+            self.stages.setdefault(stage, []).append(duration)
+            if file is not None:
+                details = self._details.setdefault(file, {})
+                details[f"{stage}_ms"] = round(
+                    details.get(f"{stage}_ms", 0.0) + duration * 1e3, 3
+                )
+
+    @contextmanager
+    def timed(self, stage: str, file: Optional[Path] = None):
+        """Records the duration of the context as `stage`."""
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, perf_counter() - start, file)
+
+    def annotate(self, file: Path, **details) -> None:
+        """Adds `details` to the 'file'-event of `file`."""
+        with self._lock:
+            self._details.setdefault(file, {}).update(details)
+
+    def done(self, file: Path, outcome: str, **details) -> None:
+        """Emits the 'file'-event of `file`."""
+        with self._lock:
+            details = {**self._details.pop(file, {}), **details}
+            self.files += 1
+            self.bytes += details.get("bytes") or 0
+            self.emit("file", path=str(file), outcome=outcome, **details)
+
+
+def timed(progress: Optional[Progress], stage: str, file: Optional[Path]):
+    """
+    Returns context manager that records the duration of `stage` with
+    `progress` (no-op if `progress` is `None`).
+    """
+    if progress is None:
+        return nullcontext()
+    return progress.timed(stage, file)
@@ -0,0 +1,118 @@
+"""Definition of the restore-subcommand."""
+
+from typing import Optional
+import os
+import sys
+import sqlite3
+from pathlib import Path
+from concurrent.futures import Executor, ThreadPoolExecutor
+
+from befehl import Command, Argument, Parser
+
+from flux.config import FluxConfig
+from flux.db import set_journal_mode
+from flux.db.sessions import revoke_sessions
+from ..common import verbose, index_location, get_index
+from .common import jobs
+from .backup import snapshot, copy_thumbnails
+from .walk import scan
+
+
+class RestoreIndex(Command):
+    """Subcommand for restoring the index from a backup."""
+
+    index_location = index_location
+    jobs = jobs
+    verbose = verbose
+
+    source = Argument(
+        "source",
+        helptext="backup directory (as created by 'flux index backup')",
+        nargs=1,
+        parser=Parser.parse_as_path,
+    )
+
+    @staticmethod
+    def restore(
+        # pylint: disable=redefined-outer-name
+        index: Path,
+        source: Path,
+        *,
+        verbose: bool = False,
+        executor: Optional[Executor] = None,
+    ) -> int:
+        """
+        Restores the index at `index` (replaces the database if it
+        already exists) from the backup at `source` and returns the
+        number of copied thumbnails.
+
+        Thumbnails are copied first (only those that are missing in the
+        index), the database is then replaced in a single step.
+
+        Keyword arguments:
+        index -- index location
+        source -- backup location
+        verbose -- whether to run in verbose mode
+                   (default False)
+        executor -- executor for copying thumbnails in parallel
+                    (default None; sequential processing)
+        """
+        index.mkdir(parents=True, exist_ok=True)
+        index_db = index / FluxConfig.INDEX_DB_FILE
+        backup_db = source / FluxConfig.INDEX_DB_FILE
+
+        # thumbnails
+        connection = sqlite3.connect(
+            f"file:{backup_db.resolve()}?mode=ro",
+            uri=True,
+            isolation_level=None,
+        )
+        try:
+            thumbnails = connection.execute(
+                "SELECT id, path FROM thumbnails"
+            ).fetchall()
+        finally:
+            connection.close()
+        existing = {
+            file.name for file in scan(index / FluxConfig.THUMBNAILS)[0]
+        }
+        thumbnails = [
+            (id_, filename)
+            for id_, filename in thumbnails
+            if filename not in existing
+        ]
+        if verbose:
+            print(f"Copying {len(thumbnails)} thumbnail(s)")
+        copied = copy_thumbnails(
+            thumbnails,
+            source / FluxConfig.THUMBNAILS,
+            index / FluxConfig.THUMBNAILS,
+            executor=executor,
+        )
+
+        # database (other connections see the restored state afterwards)
+        if verbose:
+            print(f"Restoring '{index_db}' from '{backup_db}'")
+        snapshot(backup_db, index_db)
+        set_journal_mode(index_db, FluxConfig.DB_JOURNAL_MODE)
+        # sessions are replaced as well
+        revoke_sessions(index / FluxConfig.SESSIONS_REVISION_FILE)
+
+        if verbose:
+            print(f"Restored index at '{index}'")
+        return len(copied)
+
+    def run(self, args):
+        # pylint: disable=redefined-outer-name
+        verbose = self.verbose in args
+        jobs = args.get(self.jobs, [os.cpu_count() or 1])[0]
+
+        # read and process index-location
+        index = get_index(args)
+        source = args[self.source][0].resolve()
+        if not (source / FluxConfig.INDEX_DB_FILE).is_file():
+            print(f"No backup at '{source}'", file=sys.stderr)
+            sys.exit(1)
+
+        with ThreadPoolExecutor(jobs) as executor:
+            self.restore(index, source, verbose=verbose, executor=executor)
@@ -0,0 +1,746 @@
+"""Definition of the sync-subcommand."""
+
+from typing import Optional, Iterable
+import os
+import sys
+from pathlib import Path
+from dataclasses import dataclass, field
+from uuid import uuid4
+from concurrent.futures import Executor, ThreadPoolExecutor
+
+from befehl import Command, Argument
+
+from flux.config import FluxConfig
+from flux.db import Transaction
+from flux.db.probes import ProbeCache
+from flux.db.tracks import (
+    INSERT_TRACK,
+    TRACK_METADATA_COLUMNS,
+    TRACK_STAT_COLUMNS,
+    get_track_metadata,
+    get_track_row,
+    get_track_stat,
+    compress_metadata,
+)
+from ..common import verbose, index_location, get_index
+from .common import dry_run, jobs, DEFAULT_THUMBNAIL_EXTENSION
+from .add import AddToIndex, VideoFile
+from .progress import Progress
+from .walk import walk
+from .fingerprints import get_fingerprint
+
+
+@dataclass
+class Track:
+    """Record class for an indexed (primary) track."""
+
+    id: str
+    video_id: str
+    path: Path
+    identity: tuple
+    available: bool
+    fingerprint: Optional[str] = None
+
+
+@dataclass
+class IndexedRecord:
+    """Record class for the indexed state of a record."""
+
+    # seasons as tuples of name and position by id
+    seasons: dict[str, tuple[str, int]]
+    # videos as tuples of season-id and position by id
+    videos: dict[str, tuple[Optional[str], int]]
+    # (primary) tracks by path
+    tracks: dict[str, Track]
+
+
+@dataclass
+class RecordChanges:
+    """Record class for the changes of a record during a sync."""
+
+    id: str
+    name: str
+    # new seasons as tuples of id and name
+    seasons: list[tuple[str, str]] = field(default_factory=list)
+    # new videos as tuples of video and season-id
+    videos: list[tuple[VideoFile, Optional[str]]] = field(
+        default_factory=list
+    )
+    # tracks of changed files as tuples of track-id and re-probed video
+    changed: list[tuple[str, VideoFile]] = field(default_factory=list)
+    # tracks of moved files as tuples of track-id, path, and stat
+    moved: list[tuple[str, Path, os.stat_result]] = field(
+        default_factory=list
+    )
+    # availability as tuples of track-id and new value
+    available: list[tuple[str, bool]] = field(default_factory=list)
+    # missing fingerprints of tracks as tuples of track-id and value
+    fingerprints: list[tuple[str, str]] = field(default_factory=list)
+    # season-assignments of videos as tuples of video-id and season-id
+    video_seasons: dict[str, Optional[str]] = field(default_factory=dict)
+    # new positions of seasons and videos by id
+    season_positions: dict[str, int] = field(default_factory=dict)
+    video_positions: dict[str, int] = field(default_factory=dict)
+    unchanged: int = 0
+
+    @property
+    def empty(self) -> bool:
+        """Returns `True` if the record is up to date."""
+        return not (
+            self.seasons
+            or self.videos
+            or self.changed
+            or self.moved
+            or self.available
+            or self.fingerprints
+            or self.video_seasons
+            or self.season_positions
+            or self.video_positions
+        )
+
+
+class SyncIndex(Command):
+    """Subcommand for synchronizing index with filesystem."""
+
+    index_location = index_location
+    dry_run = dry_run
+    jobs = jobs
+    verbose = verbose
+
+    target = Argument(
+        "target",
+        helptext="target record to synchronize (default uses all records)",
+        nargs=-1,
+    )
+
+    @staticmethod
+    def locate(
+        type_: str, path: Path, file: Path
+    ) -> tuple[bool, Optional[str]]:
+        """
+        Returns tuple of whether `file` belongs to the record with source
+        `path` (same layout as used by `flux index add`) and the
+        season-name (or `None`).
+        """
+        try:
+            parts = file.relative_to(path).parts
+        except ValueError:
+            return False, None
+        if type_ == "movie":
+            return len(parts) == 0, None
+        if type_ == "collection":
+            return len(parts) > 0, None
+        if len(parts) == 2:
+            return True, parts[0]
+        return len(parts) == 1, None
+
+    @classmethod
+    def collect_affected_files(
+        cls, type_: str, path: Path, paths: Iterable[Path]
+    ) -> list[tuple[Optional[str], Path]]:
+        """
+        Returns list of tuples of season-name (or `None`) and file for
+        the record source `path` like `AddToIndex.collect_files` but
+        only for the given files or directories `paths`.
+        """
+        files = {}
+        for affected in sorted(paths, key=str):
+            if affected.is_dir():
+                candidates = walk(affected, recursive=True)
+            elif affected.is_file():
+                candidates = [affected]
+            else:
+                continue
+            for file in candidates:
+                ok, season_name = cls.locate(type_, path, file)
+                if ok:
+                    files[file] = season_name
+        # affected paths may overlap
+        return [
+            (season_name, file)
+            for file, season_name in sorted(
+                files.items(), key=lambda item: str(item[0])
+            )
+        ]
+
+    @staticmethod
+    def load_record(t: Transaction, record_id: str) -> IndexedRecord:
+        """
+        Returns the indexed state of the record `record_id` (loaded with
+        transaction `t`).
+        """
+        t.cursor.execute(
+            "SELECT id, name, position FROM seasons WHERE record_id = ?",
+            (record_id,),
+        )
+        seasons = {row[0]: (row[1], row[2]) for row in t.cursor.fetchall()}
+        t.cursor.execute(
+            f"""
+            SELECT videos.id, videos.season_id, videos.position, tracks.id,
+                tracks.path, {', '.join(
+                    f'tracks.{c}' for c in TRACK_STAT_COLUMNS
+                )}, tracks.available, tracks.fingerprint
+            FROM videos
+            JOIN tracks
+                ON tracks.video_id = videos.id AND tracks.is_primary_track = 1
+            WHERE videos.record_id = ?
+            """,
+            (record_id,),
+        )
+        videos = {}
+        tracks = {}
+        for row in t.cursor.fetchall():
+            videos[row[0]] = (row[1], row[2])
+            tracks[row[4]] = Track(
+                row[3],
+                row[0],
+                Path(row[4]),
+                tuple(row[5:-2]),
+                bool(row[-2]),
+                row[-1],
+            )
+        return IndexedRecord(seasons, videos, tracks)
+
+    @classmethod
+    def prepare_record(
+        # pylint: disable=redefined-outer-name, too-many-locals
+        # pylint: disable=too-many-branches, too-many-statements
+        cls,
+        record: tuple[str, str, str, str],
+        indexed: IndexedRecord,
+        *,
+        verbose: bool = False,
+        executor: Optional[Executor] = None,
+        cache: Optional[ProbeCache] = None,
+        paths: Optional[set[Path]] = None,
+        progress: Optional[Progress] = None,
+    ) -> RecordChanges:
+        """
+        Compares the `indexed` state of `record` (tuple of id, type,
+        name, and source path; see `load_record`) with the filesystem and
+        returns the required changes. Only new and changed files are
+        probed.
+
+        Keyword arguments:
+        record -- record to be synchronized
+        indexed -- indexed state of the record
+        verbose -- whether to run in verbose mode
+                   (default False)
+        executor -- executor for processing files in parallel
+                    (default None; sequential processing)
+        cache -- cache for ffprobe-results
+                 (default None; always runs ffprobe)
+        paths -- restrict comparison to these files or directories
+                 (default None; compares entire record)
+        progress -- progress reporter
+                    (default None)
+        """
+        record_id, type_, name, path = record
+        changes = RecordChanges(record_id, name)
+
+        seasons = indexed.seasons
+        videos = indexed.videos
+        tracks = indexed.tracks
+        season_ids = {
+            season_name: id_ for id_, (season_name, _) in seasons.items()
+        }
+
+        def get_season_id(season_name: Optional[str]) -> Optional[str]:
+            """Returns (new) season-id for given directory name."""
+            if type_ != "series" or season_name is None:
+                return None
+            if season_name not in season_ids:
+                season_ids[season_name] = str(uuid4())
+                changes.seasons.append((season_ids[season_name], season_name))
+            return season_ids[season_name]
+
+        # compare with filesystem
+        found = set()
+        unknown = []
+        probe = []
+        # unchanged tracks without fingerprint
+        backfill = []
+        # * tracks that may have vanished
+        if paths is None:
+            files = AddToIndex.collect_files(type_, Path(path))
+            candidates = list(tracks.values())
+        else:
+            files = cls.collect_affected_files(type_, Path(path), paths)
+            candidates = [
+                track
+                for track in tracks.values()
+                if any(
+                    track.path == p or p in track.path.parents for p in paths
+                )
+            ]
+        for season_name, file in files:
+            try:
+                stat = file.stat()
+            except OSError:
+                continue
+            track = tracks.get(str(file))
+            if track is None:
+                unknown.append((season_name, file, stat))
+                continue
+            found.add(track.id)
+            if track.identity == get_track_stat(stat):
+                changes.unchanged += 1
+                if not track.available:
+                    changes.available.append((track.id, True))
+                if track.fingerprint is None:
+                    backfill.append((track, file, stat))
+            else:
+                probe.append((track, season_name, file))
+        video_paths = {
+            track.video_id: track.path for track in tracks.values()
+        }
+
+        def move(
+            track: Track, season_name: Optional[str], file: Path, stat
+        ) -> None:
+            """Registers `track` as moved to `file`."""
+            found.add(track.id)
+            changes.moved.append((track.id, file, stat))
+            video_paths[track.video_id] = file
+            if not track.available:
+                changes.available.append((track.id, True))
+            season_id = get_season_id(season_name)
+            if season_id != videos[track.video_id][0]:
+                changes.video_seasons[track.video_id] = season_id
+
+        # * detect moved files by their identity
+        vanished = {
+            track.identity: track
+            for track in candidates
+            if track.id not in found and None not in track.identity
+        }
+        unmatched = []
+        for season_name, file, stat in unknown:
+            track = vanished.pop(get_track_stat(stat), None)
+            if track is None:
+                unmatched.append((season_name, file, stat))
+                continue
+            move(track, season_name, file, stat)
+        # * detect moved files by their content (e.g. if copied)
+        vanished_content = {}
+        for track in candidates:
+            if track.id not in found and track.fingerprint is not None:
+                vanished_content.setdefault(track.fingerprint, []).append(
+                    track
+                )
+        for (season_name, file, stat), fingerprint in zip(
+            unmatched,
+            (
+                AddToIndex.map_jobs(
+                    executor,
+                    lambda item: get_fingerprint(item[1], item[2].st_size),
+                    unmatched,
+                )
+                if vanished_content
+                else [None] * len(unmatched)
+            ),
+        ):
+            track = next(
+                (
+                    candidate
+                    for candidate in vanished_content.get(fingerprint, [])
+                    if candidate.id not in found
+                ),
+                None,
+            )
+            if track is None:
+                probe.append((None, season_name, file))
+                continue
+            move(track, season_name, file, stat)
+        # * probe new and changed files
+        if progress is not None:
+            progress.add_total(len(probe))
+        for (track, season_name, file), video in zip(
+            probe,
+            AddToIndex.process_video_files(
+                [
+                    (file, "video" if track is None else "changed video")
+                    for track, _, file in probe
+                ],
+                executor=executor,
+                verbose=verbose,
+                cache=cache,
+                progress=progress,
+            ),
+        ):
+            if video is None:
+                continue
+            if track is not None:
+                found.add(track.id)
+                changes.changed.append((track.id, video))
+                if not track.available:
+                    changes.available.append((track.id, True))
+                continue
+            changes.videos.append((video, get_season_id(season_name)))
+            video_paths[video.id] = video.path
+        # * mark vanished files as unavailable
+        for track in candidates:
+            if track.id not in found and track.available:
+                changes.available.append((track.id, False))
+        # * missing fingerprints of unchanged tracks (e.g. indexed before
+        #   fingerprints were introduced)
+        for (track, file, stat), fingerprint in zip(
+            backfill,
+            AddToIndex.map_jobs(
+                executor,
+                lambda item: get_fingerprint(item[1], item[2].st_size),
+                backfill,
+            ),
+        ):
+            if fingerprint is not None:
+                changes.fingerprints.append((track.id, fingerprint))
+
+        if type_ == "movie":
+            return changes
+
+        # determine positions (sorted like in `flux index add`)
+        groups = {}
+        for video_id, (season_id, _) in videos.items():
+            groups.setdefault(
+                changes.video_seasons.get(video_id, season_id), []
+            ).append(video_id)
+        for video, season_id in changes.videos:
+            groups.setdefault(season_id, []).append(video.id)
+        for group in groups.values():
+            for position, video_id in enumerate(
+                sorted(
+                    group,
+                    key=lambda id_: (
+                        str(video_paths[id_])
+                        if type_ == "collection"
+                        else video_paths[id_].name
+                    ),
+                )
+            ):
+                if (
+                    video_id in changes.video_seasons
+                    or videos.get(video_id, (None, None))[1] != position
+                ):
+                    changes.video_positions[video_id] = position
+        # (season directories are ordered like in `walk`, i.e. by their
+        # name with a trailing '/')
+        for position, season_name in enumerate(
+            sorted(season_ids, key=lambda name: name + "/")
+        ):
+            season_id = season_ids[season_name]
+            if seasons.get(season_id, (None, None))[1] != position:
+                changes.season_positions[season_id] = position
+
+        return changes
+
+    @staticmethod
+    def write_changes(index: Path, changes: list[RecordChanges]) -> None:
+        """Write `changes` to database (single transaction)."""
+        with Transaction(index / FluxConfig.INDEX_DB_FILE) as t:
+            for record in changes:
+                new_seasons = {id_ for id_, _ in record.seasons}
+                new_videos = {video.id for video, _ in record.videos}
+                # move existing seasons and videos to temporary positions
+                # to avoid conflicts with unique positions
+                t.cursor.executemany(
+                    "UPDATE seasons SET position = ? WHERE id = ?",
+                    [
+                        (-1 - position, id_)
+                        for id_, position in record.season_positions.items()
+                        if id_ not in new_seasons
+                    ],
+                )
+                t.cursor.executemany(
+                    """
+                    UPDATE videos SET season_id = ?, position = ?
+                    WHERE id = ?
+                    """,
+                    [
+                        (season_id, -1 - record.video_positions[id_], id_)
+                        for id_, season_id in record.video_seasons.items()
+                    ],
+                )
+                t.cursor.executemany(
+                    "UPDATE videos SET position = ? WHERE id = ?",
+                    [
+                        (-1 - position, id_)
+                        for id_, position in record.video_positions.items()
+                        if id_ not in new_videos
+                        and id_ not in record.video_seasons
+                    ],
+                )
+                # new contents
+                t.cursor.executemany(
+                    "INSERT INTO seasons VALUES (?, ?, ?, ?)",
+                    [
+                        (
+                            id_,
+                            record.id,
+                            name,
+                            record.season_positions[id_],
+                        )
+                        for id_, name in record.seasons
+                    ],
+                )
+                t.cursor.executemany(
+                    "INSERT INTO thumbnails VALUES (?, ?)",
+                    [
+                        (
+                            video.thumbnail_id,
+                            video.thumbnail_id + DEFAULT_THUMBNAIL_EXTENSION,
+                        )
+                        for video, _ in record.videos
+                    ],
+                )
+                t.cursor.executemany(
+                    "INSERT INTO videos VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [
+                        (
+                            video.id,
+                            record.id,
+                            season_id,
+                            video.thumbnail_id,
+                            video.name,
+                            "No description provided.",
+                            record.video_positions[video.id],
+                        )
+                        for video, season_id in record.videos
+                    ],
+                )
+                t.cursor.executemany(
+                    INSERT_TRACK,
+                    [
+                        get_track_row(
+                            str(uuid4()),
+                            video.id,
+                            video.path,
+                            video.metadata,
+                            video.stat,
+                            fingerprint=video.fingerprint,
+                        )
+                        for video, _ in record.videos
+                    ],
+                )
+                # final positions
+                t.cursor.executemany(
+                    "UPDATE seasons SET position = ? WHERE id = ?",
+                    [
+                        (position, id_)
+                        for id_, position in record.season_positions.items()
+                        if id_ not in new_seasons
+                    ],
+                )
+                t.cursor.executemany(
+                    "UPDATE videos SET position = ? WHERE id = ?",
+                    [
+                        (position, id_)
+                        for id_, position in record.video_positions.items()
+                        if id_ not in new_videos
+                    ],
+                )
+                # tracks
+                t.cursor.executemany(
+                    f"""
+                    UPDATE tracks
+                    SET
+                        {', '.join(
+                            f'{c} = ?'
+                            for c in TRACK_METADATA_COLUMNS
+                            + TRACK_STAT_COLUMNS
+                        )},
+                        metadata_compressed = ?,
+                        fingerprint = ?
+                    WHERE id = ?
+                    """,
+                    [
+                        get_track_metadata(video.metadata)
+                        + get_track_stat(video.stat)
+                        + (
+                            compress_metadata(video.metadata),
+                            video.fingerprint,
+                            id_,
+                        )
+                        for id_, video in record.changed
+                    ],
+                )
+                t.cursor.executemany(
+                    f"""
+                    UPDATE tracks
+                    SET
+                        path = ?,
+                        {', '.join(f'{c} = ?' for c in TRACK_STAT_COLUMNS)}
+                    WHERE id = ?
+                    """,
+                    [
+                        (str(path),) + get_track_stat(stat) + (id_,)
+                        for id_, path, stat in record.moved
+                    ],
+                )
+                t.cursor.executemany(
+                    "UPDATE tracks SET available = ? WHERE id = ?",
+                    [
+                        (int(available), id_)
+                        for id_, available in record.available
+                    ],
+                )
+                t.cursor.executemany(
+                    "UPDATE tracks SET fingerprint = ? WHERE id = ?",
+                    [
+                        (fingerprint, id_)
+                        for id_, fingerprint in record.fingerprints
+                    ],
+                )
+
+    @classmethod
+    def sync(
+        # pylint: disable=redefined-outer-name
+        cls,
+        index: Path,
+        targets: Optional[dict[str, Optional[set[Path]]]] = None,
+        *,
+        verbose: bool = False,
+        dry_run: bool = False,
+        executor: Optional[Executor] = None,
+        cache: Optional[ProbeCache] = None,
+        progress: Optional[Progress] = None,
+    ) -> list[RecordChanges]:
+        """
+        Synchronize records with the filesystem and return the changes.
+
+        Keyword arguments:
+        index -- index location
+        targets -- mapping of record-ids and affected files or
+                   directories (`None` compares the entire record)
+                   (default None; all records)
+        verbose -- whether to run in verbose mode
+                   (default False)
+        dry_run -- whether to run a simulation (automatically verbose)
+                   (default False)
+        executor -- executor for processing files in parallel
+                    (default None; sequential processing)
+        cache -- cache for ffprobe-results
+                 (default None; always runs ffprobe)
+        progress -- progress reporter (reports new and changed files)
+                    (default None)
+        """
+        if dry_run:
+            verbose = True
+
+        # load indexed state (in a short read-only transaction; files are
+        # compared and probed without holding a database connection)
+        with Transaction(index / FluxConfig.INDEX_DB_FILE, readonly=True) as t:
+            if targets is None:
+                t.cursor.execute("SELECT id, type, name, path FROM records")
+                records = [(record, None) for record in t.cursor.fetchall()]
+            else:
+                records = []
+                for record_id, paths in targets.items():
+                    t.cursor.execute(
+                        "SELECT id, type, name, path FROM records "
+                        + "WHERE id = ?",
+                        (record_id,),
+                    )
+                    record = t.cursor.fetchone()
+                    if record is None:
+                        print(
+                            "\033[1;33m"
+                            + f"Skipping unknown record '{record_id}'."
+                            + "\033[0m",
+                            file=sys.stderr,
+                        )
+                        continue
+                    records.append((record, paths))
+            indexed = []
+            for record, paths in records:
+                if record[3] is None:
+                    print(
+                        "\033[1;33m"
+                        + f"Skipping record '{record[0]}' (unknown "
+                        + "source location)."
+                        + "\033[0m",
+                        file=sys.stderr,
+                    )
+                    continue
+                indexed.append(
+                    (record, paths, cls.load_record(t, record[0]))
+                )
+
+        # collect changes
+        changes = []
+        for record, paths, state in indexed:
+            if verbose:
+                print(f"Synchronizing '{record[2]}' ({record[0]})")
+            changes.append(
+                cls.prepare_record(
+                    record,
+                    state,
+                    verbose=verbose,
+                    executor=executor,
+                    cache=cache,
+                    paths=paths,
+                    progress=progress,
+                )
+            )
+
+        if verbose:
+            for record in changes:
+                missing = [a for _, a in record.available if not a]
+                print(
+                    f"{record.id}: {len(record.videos)} new, "
+                    + f"{len(record.changed)} changed, "
+                    + f"{len(record.moved)} moved, "
+                    + f"{len(missing)} missing, "
+                    + f"{record.unchanged} unchanged"
+                )
+
+        if dry_run:
+            return changes
+
+        # generate thumbnails for new videos
+        thumbnails = (index / FluxConfig.THUMBNAILS).resolve()
+        thumbnails.mkdir(parents=True, exist_ok=True)
+        AddToIndex.generate_thumbnails(
+            [video for record in changes for video, _ in record.videos],
+            thumbnails,
+            executor=executor,
+            progress=progress,
+        )
+        if progress is not None:
+            for record in changes:
+                for video, _ in record.videos:
+                    progress.done(video.path, "added")
+                for _, video in record.changed:
+                    progress.done(video.path, "changed")
+
+        # write changes
+        cls.write_changes(
+            index, [record for record in changes if not record.empty]
+        )
+        return changes
+
+    def run(self, args):
+        # pylint: disable=redefined-outer-name
+        verbose = self.verbose in args
+        dry_run = self.dry_run in args
+        jobs = args.get(self.jobs, [os.cpu_count() or 1])[0]
+
+        # read and process index-location
+        index = get_index(args)
+        cache = ProbeCache(
+            index / FluxConfig.PROBE_CACHE_FILE, FluxConfig.PROBE_CACHE_SIZE
+        )
+
+        with ThreadPoolExecutor(jobs) as executor:
+            self.sync(
+                index,
+                (
+                    dict.fromkeys(args[self.target])
+                    if args.get(self.target)
+                    else None
+                ),
+                verbose=verbose,
+                dry_run=dry_run,
+                executor=executor,
+                cache=cache,
+            )
+        cache.evict()
@@ -0,0 +1,244 @@
+"""Definition of the verify-subcommand."""
+
+from typing import Optional, TextIO
+import os
+import sys
+import json
+import stat as stat_
+from pathlib import Path
+from dataclasses import dataclass, asdict
+from concurrent.futures import Executor, ThreadPoolExecutor
+from time import perf_counter
+
+from befehl import Command, Option, Argument, Parser
+
+from flux.config import FluxConfig
+from flux.db import Transaction, BatchWriter
+from ..common import index_location, get_index
+from .common import jobs
+from .devices import get_stat, map_by_device
+from .fingerprints import get_fingerprint
+
+
+@dataclass
+class TrackReport:
+    """Record class for the result of verifying a single track."""
+
+    track: str
+    video: str
+    record: str
+    path: str
+    # one of 'ok', 'missing', 'resized', 'changed'
+    status: str
+    available: bool
+    size: Optional[int] = None
+    actual_size: Optional[int] = None
+
+    @property
+    def ok(self) -> bool:
+        """Returns `True` if the file matches the index."""
+        return self.status == "ok"
+
+
+class VerifyIndex(Command):
+    """Subcommand for verifying indexed files."""
+
+    index_location = index_location
+    jobs = jobs
+    fingerprint = Option(
+        "--fingerprint",
+        helptext=(
+            "also compare content fingerprints (reads a few blocks of "
+            + "every file)"
+        ),
+        parser=Parser.parse_as_bool,
+    )
+    mark = Option(
+        "--mark",
+        helptext=(
+            "mark missing or changed files as unavailable (and files "
+            + "that have reappeared as available)"
+        ),
+        parser=Parser.parse_as_bool,
+    )
+
+    target = Argument(
+        "target",
+        helptext="target record to verify (default uses all records)",
+        nargs=-1,
+    )
+
+    @staticmethod
+    def check(
+        track: tuple,
+        stat: Optional[os.stat_result],
+        fingerprint: bool = False,
+    ) -> TrackReport:
+        """
+        Returns report for `track` (tuple of track-id, video-id,
+        record-id, path, size, fingerprint, and availability as loaded
+        by `verify`) based on the current `stat` of its file. If
+        `fingerprint`, the file content is compared as well (only if
+        the index contains a fingerprint).
+        """
+        id_, video_id, record_id, path, size, fingerprint_, available = (
+            track
+        )
+        report = TrackReport(
+            id_, video_id, record_id, path, "ok", bool(available), size
+        )
+        if stat is None or not stat_.S_ISREG(stat.st_mode):
+            report.status = "missing"
+            return report
+        report.actual_size = stat.st_size
+        if size is not None and stat.st_size != size:
+            report.status = "resized"
+        elif (
+            fingerprint
+            and fingerprint_ is not None
+            and get_fingerprint(Path(path), stat.st_size) != fingerprint_
+        ):
+            report.status = "changed"
+        return report
+
+    @classmethod
+    def verify(
+        # pylint: disable=redefined-outer-name
+        cls,
+        index: Path,
+        targets: Optional[list[str]] = None,
+        *,
+        fingerprint: bool = False,
+        mark: bool = False,
+        executor: Optional[Executor] = None,
+        stream: Optional[TextIO] = None,
+    ) -> list[TrackReport]:
+        """
+        Verify the files of all indexed tracks and return the reports.
+
+        The index is only read in a single, short read-only transaction
+        and files are checked without holding a database connection, so
+        that this can run while the server (or other indexing commands)
+        use the index. If `mark`, changes of the availability of tracks
+        are written in short transactions (only if the path of the
+        track has not been changed in the meantime).
+
+        Keyword arguments:
+        index -- index location
+        targets -- record-ids to verify
+                   (default None; all records)
+        fingerprint -- whether to compare content fingerprints
+                       (default False)
+        mark -- whether to update the availability of tracks
+                (default False)
+        executor -- executor for checking files in parallel
+                    (default None; sequential processing)
+        stream -- stream for JSON-line reports of tracks that are not ok
+                  or whose availability has changed and a final summary
+                  (default None; no output)
+        """
+        start = perf_counter()
+        index_db = index / FluxConfig.INDEX_DB_FILE
+        with Transaction(index_db, readonly=True) as t:
+            query = """
+                SELECT tracks.id, videos.id, videos.record_id, tracks.path,
+                    tracks.size, tracks.fingerprint, tracks.available
+                FROM tracks
+                JOIN videos ON videos.id = tracks.video_id
+                """
+            if targets is None:
+                t.cursor.execute(query)
+            else:
+                t.cursor.execute(
+                    query
+                    + "WHERE videos.record_id IN "
+                    + f"({', '.join('?' * len(targets))})",
+                    tuple(targets),
+                )
+            tracks = [track for track in t.cursor.fetchall() if track[3]]
+
+        # check files (the stat-results are also used to schedule the
+        # reads for fingerprints per device)
+        paths = [Path(track[3]) for track in tracks]
+        if executor is None:
+            stats = list(map(get_stat, paths))
+        else:
+            stats = list(executor.map(get_stat, paths))
+        reports = map_by_device(
+            executor if fingerprint else None,
+            lambda i: cls.check(tracks[i], stats[i], fingerprint),
+            range(len(tracks)),
+            stats,
+        )
+
+        # update availability
+        marked = 0
+        if mark:
+            with BatchWriter(
+                index_db,
+                chunk_rows=FluxConfig.DB_WRITE_CHUNK_ROWS,
+                chunk_duration=FluxConfig.DB_WRITE_CHUNK_DURATION,
+                chunk_pause=FluxConfig.DB_WRITE_CHUNK_PAUSE,
+            ) as writer:
+                for report in reports:
+                    if report.ok == report.available:
+                        continue
+                    writer.add(
+                        """
+                        UPDATE tracks SET available = ?
+                        WHERE id = ? AND path = ?
+                        """,
+                        [(int(report.ok), report.track, report.path)],
+                    )
+                    writer.checkpoint()
+                    marked += 1
+
+        if stream is not None:
+            for report in reports:
+                if report.ok and report.available:
+                    continue
+                print(
+                    json.dumps(
+                        {"event": "track"}
+                        | asdict(report)
+                        | {"marked": mark and report.ok != report.available}
+                    ),
+                    file=stream,
+                )
+            summary = {
+                status: sum(1 for report in reports if report.status == status)
+                for status in ["ok", "missing", "resized", "changed"]
+            }
+            print(
+                json.dumps(
+                    {"event": "summary", "tracks": len(reports)}
+                    | summary
+                    | {
+                        "marked": marked,
+                        "duration": round(perf_counter() - start, 3),
+                    }
+                ),
+                file=stream,
+                flush=True,
+            )
+        return reports
+
+    def run(self, args):
+        # pylint: disable=redefined-outer-name
+        jobs = args.get(self.jobs, [os.cpu_count() or 1])[0]
+
+        # read and process index-location
+        index = get_index(args)
+
+        with ThreadPoolExecutor(jobs) as executor:
+            reports = self.verify(
+                index,
+                args[self.target] if args.get(self.target) else None,
+                fingerprint=self.fingerprint in args,
+                mark=self.mark in args,
+                executor=executor,
+                stream=sys.stdout,
+            )
+
+        if any(not report.ok for report in reports):
+            sys.exit(1)
@@ -0,0 +1,69 @@
+"""Directory traversal for indexing."""
+
+from typing import Iterator
+import os
+from pathlib import Path
+
+
+def _entries(directory: Path) -> list[tuple[str, bool, os.DirEntry]]:
+    """
+    Returns files and directories of `directory` as tuples of sort key,
+    whether the entry is a directory, and the entry itself (empty if
+    `directory` cannot be read).
+
+    Directories are keyed by their name with a trailing '/' so that,
+    when traversing recursively, files are visited in the order of
+    their paths as strings.
+    """
+    entries = []
+    try:
+        with os.scandir(directory) as iterator:
+            for entry in iterator:
+                # the type is taken from the directory listing (only
+                # symbolic links or filesystems that do not report the
+                # type require an additional stat-call)
+                try:
+                    if entry.is_dir():
+                        entries.append((entry.name + "/", True, entry))
+                    elif entry.is_file():
+                        entries.append((entry.name, False, entry))
+                except OSError:
+                    continue
+    except OSError:
+        return []
+    entries.sort(key=lambda item: item[0])
+    return entries
+
+
+def scan(directory: Path) -> tuple[list[Path], list[Path]]:
+    """
+    Returns files and subdirectories of `directory` (sorted by name)
+    from a single directory listing.
+    """
+    files, directories = [], []
+    for _, is_dir, entry in _entries(directory):
+        (directories if is_dir else files).append(directory / entry.name)
+    return files, directories
+
+
+def walk(
+    directory: Path, *, recursive: bool = False, directories: bool = False
+) -> Iterator[Path]:
+    """
+    Lazily yields files (or subdirectories if `directories`) of
+    `directory`. Every directory is listed once and entries are not
+    stat'ed. Files are yielded in order of their paths as strings
+    (i.e., like `sorted(directory.glob("**/*"), key=str)` if
+    `recursive`). Symbolic links to directories are not followed when
+    traversing recursively.
+    """
+    for _, is_dir, entry in _entries(directory):
+        path = directory / entry.name
+        if not is_dir:
+            if not directories:
+                yield path
+            continue
+        if directories:
+            yield path
+        if recursive and not entry.is_symlink():
+            yield from walk(path, recursive=True, directories=directories)
@@ -0,0 +1,330 @@
+"""Definition of the watch-subcommand."""
+
+from typing import Optional
+import os
+import sys
+import threading
+from pathlib import Path
+from time import monotonic
+from concurrent.futures import Executor, ThreadPoolExecutor
+
+from befehl import Parser, Option, Command
+
+from flux.config import FluxConfig
+from flux.db import Transaction
+from flux.db.probes import ProbeCache
+from ..common import verbose, index_location, get_index
+from .common import jobs
+from .sync import SyncIndex
+from .walk import walk
+from .inotify import (
+    Inotify,
+    IN_CLOSE_WRITE,
+    IN_MOVED_FROM,
+    IN_MOVED_TO,
+    IN_CREATE,
+    IN_DELETE,
+    IN_DELETE_SELF,
+    IN_MOVE_SELF,
+    IN_Q_OVERFLOW,
+    IN_IGNORED,
+    IN_ONLYDIR,
+    IN_ISDIR,
+)
+
+
+class Watcher:
+    """
+    Watches the sources of all records of an index (directories only)
+    and collects affected files by record.
+    """
+
+    MASK = (
+        IN_CLOSE_WRITE
+        | IN_MOVED_FROM
+        | IN_MOVED_TO
+        | IN_CREATE
+        | IN_DELETE
+        | IN_DELETE_SELF
+        | IN_MOVE_SELF
+        | IN_ONLYDIR
+    )
+
+    def __init__(self, inotify: Inotify, verbose: bool = False) -> None:
+        self.inotify = inotify
+        self.verbose = verbose
+        # records by id as tuples of type and source
+        self.records: dict[str, tuple[str, Path]] = {}
+        # watched directories by watch descriptor and record-ids by
+        # watched directory
+        self.directories: dict[int, Path] = {}
+        self.owners: dict[Path, set[str]] = {}
+        # affected files by record (`None` requires a full sync)
+        self.pending: dict[str, Optional[set[Path]]] = {}
+
+    def add_watch(self, record_id: str, directory: Path) -> None:
+        """Adds watch for `directory` of record."""
+        try:
+            wd = self.inotify.add_watch(directory, self.MASK)
+        except OSError as exc_info:
+            print(
+                "\033[1;33m"
+                + f"Unable to watch '{directory}': {exc_info}"
+                + "\033[0m",
+                file=sys.stderr,
+            )
+            return
+        self.directories[wd] = directory
+        self.owners.setdefault(directory, set()).add(record_id)
+
+    def add_record(self, record_id: str, type_: str, path: Path) -> None:
+        """Adds watches for the source of a record."""
+        self.records[record_id] = (type_, path)
+        if self.verbose:
+            print(f"Watching record '{record_id}' at '{path}'")
+        if type_ == "movie":
+            self.add_watch(record_id, path.parent)
+        else:
+            self.add_directory(record_id, path)
+
+    def add_directory(self, record_id: str, directory: Path) -> None:
+        """Adds watches for `directory` and its relevant subdirectories."""
+        type_, path = self.records[record_id]
+        self.add_watch(record_id, directory)
+        if type_ == "series" and directory != path:
+            return
+        for subdirectory in walk(
+            directory, recursive=type_ == "collection", directories=True
+        ):
+            self.add_watch(record_id, subdirectory)
+
+    def remove_record(self, record_id: str) -> None:
+        """
+        Removes record and the watches for directories that are not
+        watched for other records.
+        """
+        del self.records[record_id]
+        self.pending.pop(record_id, None)
+        for directory, owners in list(self.owners.items()):
+            owners.discard(record_id)
+            if owners:
+                continue
+            del self.owners[directory]
+            for wd, watched in list(self.directories.items()):
+                if watched != directory:
+                    continue
+                del self.directories[wd]
+                try:
+                    self.inotify.rm_watch(wd)
+                except OSError:
+                    # watch has already been removed (e.g. directory
+                    # deleted)
+                    pass
+        if self.verbose:
+            print(f"Stopped watching record '{record_id}'")
+
+    def load(self, index: Path) -> None:
+        """
+        Adds watches for records that are not being watched yet and
+        removes those of deleted records.
+        """
+        with Transaction(
+            index / FluxConfig.INDEX_DB_FILE, readonly=True
+        ) as t:
+            t.cursor.execute(
+                "SELECT id, type, path FROM records WHERE path IS NOT NULL"
+            )
+        current = {row[0] for row in t.data}
+        for record_id in set(self.records) - current:
+            self.remove_record(record_id)
+        for record_id, type_, path in t.data:
+            if record_id not in self.records:
+                self.add_record(record_id, type_, Path(path))
+
+    def mark(self, record_id: str, path: Optional[Path]) -> None:
+        """Marks `path` of record as affected (`None` for entire record)."""
+        if record_id in self.pending and self.pending[record_id] is None:
+            return
+        if path is None:
+            self.pending[record_id] = None
+        else:
+            self.pending.setdefault(record_id, set()).add(path)
+
+    def requeue(self, record_id: str, paths: Optional[set[Path]]) -> None:
+        """
+        Marks `paths` of record as affected again (e.g. after failing to
+        synchronize them; `None` for entire record).
+        """
+        if record_id not in self.records:
+            return
+        if paths is None:
+            self.mark(record_id, None)
+            return
+        for path in paths:
+            self.mark(record_id, path)
+
+    def process(self, timeout: Optional[float] = None) -> bool:
+        """
+        Processes available events (waits at most `timeout` seconds).
+        Returns `True` if any record has been affected.
+        """
+        affected = False
+        for event in self.inotify.read(timeout):
+            if event.mask & IN_Q_OVERFLOW:
+                # events have been lost
+                for record_id in self.records:
+                    self.mark(record_id, None)
+                affected = True
+                continue
+            directory = self.directories.get(event.wd)
+            if directory is None:
+                continue
+            if event.mask & IN_IGNORED:
+                del self.directories[event.wd]
+                if directory not in self.directories.values():
+                    self.owners.pop(directory, None)
+                continue
+            path = directory / event.name if event.name else directory
+            for record_id in list(self.owners.get(directory, [])):
+                type_, source = self.records[record_id]
+                if type_ == "movie" and path != source:
+                    continue
+                if event.mask & IN_ISDIR and event.mask & (
+                    IN_CREATE | IN_MOVED_TO
+                ):
+                    if type_ == "collection" or directory == source:
+                        self.add_directory(record_id, path)
+                elif event.mask & IN_CREATE:
+                    # wait until file has been written
+                    continue
+                self.mark(record_id, path)
+                affected = True
+        return affected
+
+
+class WatchIndex(Command):
+    """Subcommand for watching record sources."""
+
+    index_location = index_location
+    debounce = Option(
+        "--debounce",
+        helptext=(
+            "seconds without file events before changes are processed "
+            + f"(default {FluxConfig.WATCH_DEBOUNCE})"
+        ),
+        nargs=1,
+        parser=Parser.parse_as_float,
+    )
+    jobs = jobs
+    verbose = verbose
+
+    @staticmethod
+    def watch(
+        # pylint: disable=redefined-outer-name
+        index: Path,
+        *,
+        debounce: float = FluxConfig.WATCH_DEBOUNCE,
+        verbose: bool = False,
+        executor: Optional[Executor] = None,
+        cache: Optional[ProbeCache] = None,
+        stop: Optional[threading.Event] = None,
+        ready: Optional[threading.Event] = None,
+    ) -> None:
+        """
+        Watch record sources and synchronize affected files once no
+        further events occur for `debounce` seconds. Records that fail
+        to synchronize are retried after `FluxConfig.WATCH_RETRY_INTERVAL`
+        seconds. Raises `OSError` if inotify is not available.
+
+        Keyword arguments:
+        index -- index location
+        debounce -- seconds without events before syncing
+                    (default `FluxConfig.WATCH_DEBOUNCE`)
+        verbose -- whether to run in verbose mode
+                   (default False)
+        executor -- executor for processing files in parallel
+                    (default None; sequential processing)
+        cache -- cache for ffprobe-results
+                 (default None; always runs ffprobe)
+        stop -- event for stopping the watcher
+                (default None; runs indefinitely)
+        ready -- event that is set once the sources are watched
+                 (default None)
+        """
+        with Inotify() as inotify:
+            watcher = Watcher(inotify, verbose)
+            watcher.load(index)
+            if ready is not None:
+                ready.set()
+            deadline = None
+            reload = monotonic() + FluxConfig.WATCH_RELOAD_INTERVAL
+            while stop is None or not stop.is_set():
+                timeout = 1.0
+                if deadline is not None:
+                    timeout = max(0.0, min(timeout, deadline - monotonic()))
+                if watcher.process(timeout):
+                    deadline = monotonic() + debounce
+                if deadline is not None and monotonic() >= deadline:
+                    pending, watcher.pending = watcher.pending, {}
+                    deadline = None
+                    for record_id, paths in pending.items():
+                        try:
+                            SyncIndex.sync(
+                                index,
+                                {record_id: paths},
+                                verbose=verbose,
+                                executor=executor,
+                                cache=cache,
+                            )
+                        # pylint: disable=broad-exception-caught
+                        except Exception as exc_info:
+                            print(
+                                "\033[1;33m"
+                                + "Failed to synchronize record "
+                                + f"'{record_id}' (retrying in "
+                                + f"{FluxConfig.WATCH_RETRY_INTERVAL}s): "
+                                + f"{exc_info}"
+                                + "\033[0m",
+                                file=sys.stderr,
+                            )
+                            watcher.requeue(record_id, paths)
+                    if watcher.pending:
+                        deadline = (
+                            monotonic() + FluxConfig.WATCH_RETRY_INTERVAL
+                        )
+                    if cache is not None:
+                        cache.evict()
+                if monotonic() >= reload:
+                    watcher.load(index)
+                    reload = monotonic() + FluxConfig.WATCH_RELOAD_INTERVAL
+
+    def run(self, args):
+        # pylint: disable=redefined-outer-name
+        verbose = self.verbose in args
+        jobs = args.get(self.jobs, [os.cpu_count() or 1])[0]
+
+        # read and process index-location
+        index = get_index(args)
+        cache = ProbeCache(
+            index / FluxConfig.PROBE_CACHE_FILE, FluxConfig.PROBE_CACHE_SIZE
+        )
+
+        with ThreadPoolExecutor(jobs) as executor:
+            try:
+                self.watch(
+                    index,
+                    debounce=args.get(
+                        self.debounce, [FluxConfig.WATCH_DEBOUNCE]
+                    )[0],
+                    verbose=verbose,
+                    executor=executor,
+                    cache=cache,
+                )
+            except OSError as exc_info:
+                print(
+                    f"Unable to watch record sources: {exc_info}",
+                    file=sys.stderr,
+                )
+                sys.exit(1)
+            except KeyboardInterrupt:
+                pass
@@ -1,18 +1,350 @@
 """Definition of the migrate-subcommand."""
 
+from typing import Callable
+import os
 import sys
 from pathlib import Path
+import json
+import sqlite3
 from importlib.metadata import version
 from datetime import datetime
 
 from befehl import Command
 
 from flux.config import FluxConfig
-from flux.db import Transaction
+from flux.db import Transaction, set_journal_mode
+from flux.db.tracks import (
+    TRACK_METADATA_COLUMNS,
+    TRACK_STAT_COLUMNS,
+    get_track_metadata,
+    get_track_stat,
+    compress_metadata,
+)
 from ..common import verbose, index_location, get_index
 from .common import compare_versions
 
 
+def migrate_track_metadata(cursor: sqlite3.Cursor) -> None:
+    """
+    Fills denormalized metadata-columns and compressed metadata of
+    tracks from column 'metadata_json'.
+    """
+    cursor.execute("SELECT id, metadata_json FROM tracks")
+    values = []
+    for id_, metadata_json in cursor.fetchall():
+        metadata = json.loads(metadata_json)
+        values.append(
+            get_track_metadata(metadata)
+            + (compress_metadata(metadata), id_)
+        )
+    cursor.executemany(
+        f"""
+        UPDATE tracks
+        SET
+            {', '.join(f'{c} = ?' for c in TRACK_METADATA_COLUMNS)},
+            metadata_compressed = ?
+        WHERE id = ?
+        """,
+        values,
+    )
+
+
+def migrate_record_paths(cursor: sqlite3.Cursor) -> None:
+    """
+    Infers source paths of records from the paths of their tracks and
+    fills file identities of tracks that are currently available.
+    """
+    cursor.execute(
+        """
+        SELECT records.id, records.type, videos.season_id, tracks.id,
+            tracks.path
+        FROM records
+        JOIN videos ON videos.record_id = records.id
+        JOIN tracks ON tracks.video_id = videos.id
+        """
+    )
+    paths = {}
+    stats = []
+    for record_id, type_, season_id, track_id, path in cursor.fetchall():
+        if type_ == "movie":
+            source = Path(path)
+        elif type_ == "series" and season_id is not None:
+            # episodes are located in season-directories
+            source = Path(path).parent.parent
+        else:
+            source = Path(path).parent
+        paths.setdefault(record_id, []).append(str(source))
+        try:
+            stats.append(get_track_stat(os.stat(path)) + (track_id,))
+        except OSError:
+            pass
+    cursor.executemany(
+        "UPDATE records SET path = ? WHERE id = ?",
+        [
+            (os.path.commonpath(record_paths), record_id)
+            for record_id, record_paths in paths.items()
+        ],
+    )
+    cursor.executemany(
+        f"""
+        UPDATE tracks
+        SET {', '.join(f'{c} = ?' for c in TRACK_STAT_COLUMNS)}
+        WHERE id = ?
+        """,
+        stats,
+    )
+
+
+# statements that migrate a database-schema to the given version (from
+# the previous version); when migrating, the statements for all versions
+# after the current schema-version up to the app-version are run in
+# order (either SQL or callables that are passed the cursor)
+CATALOGUE = {
+    "0.4.0": [
+        # secondary indices for lookups and foreign keys
+        """
+        CREATE INDEX IF NOT EXISTS user_secrets_username
+        ON user_secrets (username)
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS sessions_username
+        ON sessions (username)
+        """,
+        """
+        ALTER TABLE records ADD COLUMN added INTEGER NOT NULL DEFAULT 0
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS records_name
+        ON records (name COLLATE NOCASE, id)
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS records_added
+        ON records (added, id)
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS records_type_name
+        ON records (type, name COLLATE NOCASE, id)
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS records_type_added
+        ON records (type, added, id)
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS records_thumbnail_id
+        ON records (thumbnail_id)
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS videos_season_id
+        ON videos (season_id)
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS videos_thumbnail_id
+        ON videos (thumbnail_id)
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS tracks_video_id
+        ON tracks (video_id)
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS playbacks_username_changed
+        ON playbacks (username, changed, record_id)
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS playbacks_record_id
+        ON playbacks (record_id)
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS playbacks_video_id
+        ON playbacks (video_id)
+        """,
+        # full text search
+        """
+        CREATE VIRTUAL TABLE records_search USING fts5 (
+            name,
+            description,
+            content='records',
+            content_rowid='rowid',
+            tokenize='trigram'
+        )
+        """,
+        """
+        CREATE TRIGGER records_search_insert AFTER INSERT ON records BEGIN
+            INSERT INTO records_search (rowid, name, description)
+            VALUES (new.rowid, new.name, new.description);
+        END;
+        """,
+        """
+        CREATE TRIGGER records_search_delete AFTER DELETE ON records BEGIN
+            INSERT INTO records_search (
+                records_search, rowid, name, description
+            )
+            VALUES ('delete', old.rowid, old.name, old.description);
+        END;
+        """,
+        """
+        CREATE TRIGGER records_search_update
+        AFTER UPDATE OF name, description ON records BEGIN
+            INSERT INTO records_search (
+                records_search, rowid, name, description
+            )
+            VALUES ('delete', old.rowid, old.name, old.description);
+            INSERT INTO records_search (rowid, name, description)
+            VALUES (new.rowid, new.name, new.description);
+        END;
+        """,
+        """
+        CREATE VIRTUAL TABLE videos_search USING fts5 (
+            name,
+            description,
+            content='videos',
+            content_rowid='rowid',
+            tokenize='trigram'
+        )
+        """,
+        """
+        CREATE TRIGGER videos_search_insert AFTER INSERT ON videos BEGIN
+            INSERT INTO videos_search (rowid, name, description)
+            VALUES (new.rowid, new.name, new.description);
+        END;
+        """,
+        """
+        CREATE TRIGGER videos_search_delete AFTER DELETE ON videos BEGIN
+            INSERT INTO videos_search (
+                videos_search, rowid, name, description
+            )
+            VALUES ('delete', old.rowid, old.name, old.description);
+        END;
+        """,
+        """
+        CREATE TRIGGER videos_search_update
+        AFTER UPDATE OF name, description ON videos BEGIN
+            INSERT INTO videos_search (
+                videos_search, rowid, name, description
+            )
+            VALUES ('delete', old.rowid, old.name, old.description);
+            INSERT INTO videos_search (rowid, name, description)
+            VALUES (new.rowid, new.name, new.description);
+        END;
+        """,
+        """
+        INSERT INTO records_search (records_search) VALUES ('rebuild')
+        """,
+        """
+        INSERT INTO videos_search (videos_search) VALUES ('rebuild')
+        """,
+        # denormalized track metadata
+        """
+        ALTER TABLE tracks ADD COLUMN duration REAL
+        """,
+        """
+        ALTER TABLE tracks ADD COLUMN format_name TEXT
+        """,
+        """
+        ALTER TABLE tracks ADD COLUMN format_long_name TEXT
+        """,
+        """
+        ALTER TABLE tracks ADD COLUMN bit_rate INTEGER
+        """,
+        """
+        ALTER TABLE tracks ADD COLUMN width INTEGER
+        """,
+        """
+        ALTER TABLE tracks ADD COLUMN height INTEGER
+        """,
+        """
+        ALTER TABLE tracks ADD COLUMN codec_name TEXT
+        """,
+        """
+        ALTER TABLE tracks ADD COLUMN metadata_compressed BLOB
+        """,
+        migrate_track_metadata,
+        """
+        ALTER TABLE tracks DROP COLUMN metadata_json
+        """,
+        # sources for incremental syncs
+        """
+        ALTER TABLE records ADD COLUMN path TEXT
+        """,
+        """
+        ALTER TABLE tracks ADD COLUMN size INTEGER
+        """,
+        """
+        ALTER TABLE tracks ADD COLUMN mtime_ns INTEGER
+        """,
+        """
+        ALTER TABLE tracks ADD COLUMN inode INTEGER
+        """,
+        """
+        ALTER TABLE tracks ADD COLUMN available INTEGER NOT NULL DEFAULT 1
+        """,
+        migrate_record_paths,
+        # journal for resumable imports
+        """
+        CREATE TABLE imports (
+            record_id TEXT NOT NULL PRIMARY KEY
+                REFERENCES records (id) ON DELETE CASCADE,
+            processed INTEGER NOT NULL DEFAULT 0,
+            started INTEGER NOT NULL
+        )
+        """,
+        # background jobs of the admin-API
+        """
+        CREATE TABLE jobs (
+            id TEXT NOT NULL PRIMARY KEY,
+            action TEXT NOT NULL,
+            target TEXT,
+            type TEXT,
+            name TEXT,
+            description TEXT,
+            username TEXT REFERENCES users (name) ON DELETE SET NULL,
+            status TEXT NOT NULL DEFAULT 'queued',
+            cancel INTEGER NOT NULL DEFAULT 0,
+            processed INTEGER NOT NULL DEFAULT 0,
+            total INTEGER NOT NULL DEFAULT 0,
+            result TEXT,
+            error TEXT,
+            created INTEGER NOT NULL,
+            started INTEGER,
+            finished INTEGER
+        )
+        """,
+        """
+        CREATE INDEX jobs_status_created ON jobs (status, created)
+        """,
+        """
+        CREATE INDEX jobs_username ON jobs (username)
+        """,
+        # content fingerprints (filled when adding or syncing)
+        """
+        ALTER TABLE tracks ADD COLUMN fingerprint TEXT
+        """,
+        """
+        CREATE INDEX tracks_fingerprint ON tracks (fingerprint)
+        """,
+    ],
+}
+
+
+def get_migrations(
+    old: str, new: str
+) -> list[str | Callable[[sqlite3.Cursor], None]]:
+    """
+    Returns list of statements required to migrate a database-schema
+    from version `old` to `new`.
+    """
+    return sum(
+        (
+            CATALOGUE[v]
+            for v in sorted(
+                CATALOGUE,
+                key=lambda v: tuple(map(int, v.split("."))),
+            )
+            if compare_versions(v, old) and not compare_versions(v, new)
+        ),
+        start=[],
+    )
+
+
 class Migrate(Command):
     """Subcommand for migrating flux-db."""
 
@@ -23,11 +355,11 @@ class Migrate(Command):
     def migrate_database(cls, index: Path, verbose: bool) -> None:
         # pylint: disable=redefined-outer-name
         """Perform any required database migrations."""
-        CATALOGUE = {
-            # "0.1.0": [STATEMENT_0, STATEMENT_1],
-            # "0.2.0": [STATEMENT_1],
-            # ...
-        }
+        journal_mode = set_journal_mode(
+            index / FluxConfig.INDEX_DB_FILE, FluxConfig.DB_JOURNAL_MODE
+        )
+        if verbose:
+            print(f"Database journal mode is '{journal_mode}'.")
 
         new = version("flux")
         with Transaction(index / FluxConfig.INDEX_DB_FILE) as t:
@@ -47,8 +379,11 @@ class Migrate(Command):
                     file=sys.stderr,
                 )
                 sys.exit(1)
-            for s in CATALOGUE.get(new, []):
-                t.cursor.execute(s)
+            for s in get_migrations(old, new):
+                if callable(s):
+                    s(t.cursor)
+                else:
+                    t.cursor.execute(s)
             t.cursor.execute(
                 """
                 UPDATE index_metadata
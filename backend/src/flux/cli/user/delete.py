@@ -6,6 +6,7 @@ from befehl import Command, Option, Argument
 
 from flux.config import FluxConfig
 from flux.db import Transaction
+from flux.db.sessions import revoke_sessions
 from ..common import verbose, index_location, get_index
 
 
@@ -60,6 +61,8 @@ class Delete(Command):
                 "DELETE FROM users WHERE name = ?",
                 (user,)
             )
+        # running apps discard cached sessions (of the deleted user)
+        revoke_sessions(index / FluxConfig.SESSIONS_REVISION_FILE)
 
         if verbose:
             print(f"User '{user}' deleted")
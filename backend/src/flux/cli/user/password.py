@@ -9,6 +9,7 @@ from befehl import Command, Argument, Option
 
 from flux.config import FluxConfig
 from flux.db import Transaction
+from flux.db.sessions import revoke_sessions
 from ..common import verbose, index_location, get_index
 from .common import hash_password
 
@@ -76,6 +77,8 @@ class Password(Command):
                 """DELETE FROM sessions WHERE username = ?""",
                 (user,)
             )
+        # running apps discard cached sessions
+        revoke_sessions(index / FluxConfig.SESSIONS_REVISION_FILE)
 
         if verbose:
             print(f"Updated password for user '{user}'")
@@ -17,9 +17,69 @@ class FluxConfig:
     ).resolve()
     INDEX_DB_FILE = Path("index.db")
     SCHEMA_LOCATION = Path(db.__file__).parent / "schema.sql"
+    # SQLite3-settings (journal mode is persistent and set when creating
+    # or migrating an index, the others are applied per connection)
+    DB_JOURNAL_MODE = "WAL"
+    DB_BUSY_TIMEOUT = 5000  # ms
+    DB_SYNCHRONOUS = "NORMAL"
+    DB_MMAP_SIZE = 2**28  # ~ 256MB
+    DB_CACHE_SIZE = -(2**14)  # negative values in KiB (~ 16MB)
+    # bulk writes (e.g. by `flux index add`) are committed in chunks of at
+    # most this many rows; the chunk size is reduced if a chunk holds the
+    # write lock for longer than the given duration; after every chunk,
+    # the writer pauses so that waiting writers (e.g. the API, retrying
+    # after a busy-timeout backoff of up to 25ms) get the lock
+    DB_WRITE_CHUNK_ROWS = 1000
+    DB_WRITE_CHUNK_DURATION = 0.05  # seconds
+    DB_WRITE_CHUNK_PAUSE = 0.025  # seconds
+    # `flux index backup`: number of database pages that are copied per
+    # step and pause between steps (limits the I/O-load on the index)
+    BACKUP_PAGES = 1024
+    BACKUP_SLEEP = 0.01  # seconds
     THUMBNAILS = Path(".thumbnails")
     THUMBNAILS_SIZE_UPPER_BOUND_UPLOAD = 10 * 2**20  # ~ 10MB
     THUMBNAILS_SIZE_UPPER_BOUND = 2**18  # ~ 256KB
+    # persistent cache for ffprobe-results (number of entries)
+    PROBE_CACHE_FILE = Path("probe-cache.db")
+    PROBE_CACHE_SIZE = 100_000
+    # number of files that are processed and written together when adding
+    # series or collections (progress is checkpointed after each batch)
+    IMPORT_BATCH_SIZE = 100
+    # `flux index watch`: seconds without file events before processing
+    # changes, interval for picking up new records, and delay before
+    # retrying records that failed to synchronize
+    WATCH_DEBOUNCE = 5.0
+    WATCH_RELOAD_INTERVAL = 60.0
+    WATCH_RETRY_INTERVAL = 30.0
+    # interval for summaries of `flux index add --progress json`
+    PROGRESS_INTERVAL = 5.0  # seconds
+    # background jobs of the admin-API (`/api/v0/index/jobs`) are run by a
+    # worker-thread of the server (polling for queued jobs); progress and
+    # cancellation requests are synchronized at the given interval; with
+    # multiple gunicorn-workers, only the worker holding the lock-file in
+    # the index runs jobs
+    JOBS_WORKER = True
+    JOBS_LOCK_FILE = Path("jobs.lock")
+    JOBS_POLL_INTERVAL = 2.0  # seconds
+    JOBS_UPDATE_INTERVAL = 1.0  # seconds
+    # number of parallel jobs for probing files and generating thumbnails
+    # (`None` uses number of CPUs)
+    JOBS_CONCURRENCY = None
+    # number of concurrent jobs per storage device when probing files and
+    # generating thumbnails (files are grouped by device and processed in
+    # order of their inode; `None` runs a single job per rotational disk
+    # and does not limit other devices)
+    JOBS_PER_DEVICE = None
+    # content fingerprints of video files (hash of the size and evenly
+    # spaced blocks; changing these settings invalidates the fingerprints
+    # of indexed tracks)
+    FINGERPRINT_BLOCKS = 4
+    FINGERPRINT_BLOCK_SIZE = 2**16  # ~ 64KB
+    # block size used when streaming video data
+    VIDEO_CHUNK_SIZE = 2**20  # ~ 1MB
+    # upper bound for the size of a single video response (`None` serves
+    # the entire requested range)
+    VIDEO_RANGE_MAX_SIZE = None
 
     MODE = os.environ.get("MODE", "prod")  # "prod" | "dev" | "test"
     DEV_CORS_FRONTEND_URL = os.environ.get(
@@ -37,3 +97,9 @@ class FluxConfig:
     SECRET_KEY = os.environ.get("SECRET_KEY", str(uuid4()))
     PASSWORD = os.environ.get("PASSWORD")
     SESSION_COOKIE_NAME = "fluxSession"
+    # sessions are cached per process; the revision file in the index is
+    # replaced whenever sessions are revoked (logout, password change,
+    # user deletion) so that all processes discard their cached sessions
+    SESSION_CACHE_SIZE = 1024
+    SESSION_CACHE_TTL = 60  # seconds
+    SESSIONS_REVISION_FILE = Path("sessions.revision")
@@ -1,4 +1,4 @@
-from .common import Transaction
+from .common import Transaction, BatchWriter, pool, set_journal_mode
 
 
-__all__ = ["Transaction"]
+__all__ = ["Transaction", "BatchWriter", "pool", "set_journal_mode"]
@@ -1,45 +1,299 @@
 """Common definitions for SQLite3-database."""
 
+import os
 import sys
 from typing import Optional, Any
 from pathlib import Path
+from collections import OrderedDict
+import threading
 import sqlite3
+from time import perf_counter, sleep
+
+
+# number of prepared statements that are cached per connection
+CACHED_STATEMENTS = 256
+
+
+def configure(connection: sqlite3.Connection) -> None:
+    """Applies connection-specific settings from `FluxConfig`."""
+    # pylint: disable=import-outside-toplevel
+    from flux.config import FluxConfig
+
+    for pragma, value in [
+        ("busy_timeout", int(FluxConfig.DB_BUSY_TIMEOUT)),
+        ("synchronous", FluxConfig.DB_SYNCHRONOUS),
+        ("mmap_size", int(FluxConfig.DB_MMAP_SIZE)),
+        ("cache_size", int(FluxConfig.DB_CACHE_SIZE)),
+    ]:
+        connection.execute(f"PRAGMA {pragma} = {value}")
+
+
+def set_journal_mode(path: Path, mode: str) -> str:
+    """
+    Sets the (persistent) journal mode of the database at `path` and
+    returns the resulting mode.
+    """
+    connection = sqlite3.connect(path, isolation_level=None)
+    try:
+        (result,) = connection.execute(
+            f"PRAGMA journal_mode = {mode}"
+        ).fetchone()
+    finally:
+        connection.close()
+    return result
+
+
+def connect(path: Path, readonly: bool = False) -> sqlite3.Connection:
+    """
+    Returns a new and configured connection to the database at `path`.
+
+    The connection is in autocommit mode (transactions are controlled
+    explicitly by `Transaction`), so that it behaves the same for all
+    Python versions and never holds an implicitly opened transaction.
+    """
+    uri = f"file:{path.resolve()}{'?mode=ro' if readonly else ''}"
+    if sys.version_info[1] >= 12:
+        connection = sqlite3.connect(
+            uri,
+            autocommit=True,
+            uri=True,
+            cached_statements=CACHED_STATEMENTS,
+        )
+    else:
+        connection = sqlite3.connect(
+            uri,
+            isolation_level=None,
+            uri=True,
+            cached_statements=CACHED_STATEMENTS,
+        )
+    connection.execute("PRAGMA foreign_keys = ON")
+    configure(connection)
+    return connection
+
+
+def _get_file_identity(path: Path) -> Optional[tuple[int, int]]:
+    """Returns identity of file at `path` or `None` if not available."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_dev, stat.st_ino
+
+
+class ConnectionPool:
+    """
+    Per-thread pool of SQLite3-connections with one connection per
+    database and mode (read-only or read-write).
+
+    Connections are not handed out twice at the same time (nested
+    transactions use an additional connection) and are replaced if the
+    database file has been replaced in the meantime. At most `maxsize`
+    connections are kept per thread (least recently used connections
+    are closed first).
+    """
+
+    def __init__(self, maxsize: int = 8) -> None:
+        self.maxsize = maxsize
+        self._local = threading.local()
+        self._pid = os.getpid()
+
+    def _get_connections(self) -> OrderedDict:
+        """Returns the current thread's connections."""
+        if self._pid != os.getpid():
+            # do not reuse connections across forks
+            self._local = threading.local()
+            self._pid = os.getpid()
+        connections = getattr(self._local, "connections", None)
+        if connections is None:
+            connections = OrderedDict()
+            self._local.connections = connections
+        return connections
+
+    def acquire(self, path: Path, readonly: bool) -> sqlite3.Connection:
+        """Returns (pooled or new) connection for exclusive use."""
+        connections = self._get_connections()
+        entry = connections.pop((os.path.abspath(path), readonly), None)
+        if entry is not None:
+            connection, identity = entry
+            if identity is not None and identity == _get_file_identity(path):
+                return connection
+            connection.close()
+        return connect(path, readonly)
+
+    def release(
+        self, path: Path, readonly: bool, connection: sqlite3.Connection
+    ) -> None:
+        """Returns `connection` to the pool."""
+        connections = self._get_connections()
+        key = (os.path.abspath(path), readonly)
+        previous = connections.pop(key, None)
+        if previous is not None:
+            previous[0].close()
+        connections[key] = (
+            connection,
+            _get_file_identity(path),
+        )
+        while len(connections) > self.maxsize:
+            connections.popitem(last=False)[1][0].close()
+
+    def close(self) -> None:
+        """Closes all pooled connections of the current thread."""
+        connections = self._get_connections()
+        while connections:
+            connections.popitem()[1][0].close()
+
+
+pool = ConnectionPool()
 
 
 class Transaction:
-    """SQLite3-database transaction."""
+    """
+    SQLite3-database transaction.
+
+    By default, connections are taken from and returned to the
+    per-thread `pool`. Read-write transactions acquire the write lock
+    when they begin (waiting up to `FluxConfig.DB_BUSY_TIMEOUT`), since
+    upgrading a read snapshot (e.g. from loading the schema) to a write
+    fails immediately if another connection has written in the
+    meantime.
+    """
 
-    def __init__(self, path: Path, *, readonly: bool = False) -> None:
+    def __init__(
+        self, path: Path, *, readonly: bool = False, pooled: bool = True
+    ) -> None:
         self.path = path
         self.readonly = readonly
+        self.pooled = pooled
         self.connection: Optional[sqlite3.Connection] = None
         self.cursor: Optional[sqlite3.Cursor] = None
         self.data: Optional[list[Any]] = None
 
     def __enter__(self):
-        uri = (
-            f"file:{self.path.resolve()}{'?mode=ro' if self.readonly else ''}"
-        )
-        if sys.version_info[1] >= 12:
-            self.connection = sqlite3.connect(uri, autocommit=True, uri=True)
-        else:
-            self.connection = sqlite3.connect(
-                uri, isolation_level=None, uri=True
-            )
-        self.connection.execute("PRAGMA foreign_keys = ON")
-        if sys.version_info[1] >= 12:
-            self.connection.autocommit = False
+        if self.pooled:
+            self.connection = pool.acquire(self.path, self.readonly)
         else:
-            self.connection.isolation_level = ""
+            self.connection = connect(self.path, self.readonly)
         self.cursor = self.connection.cursor()
+        self.cursor.execute("BEGIN" if self.readonly else "BEGIN IMMEDIATE")
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        ok = False
+        try:
+            if exc_type is None:
+                # rows of the last statement are fetched while the
+                # transaction is still open (`executescript` commits
+                # before running the script with Python < 3.12)
+                self.data = self.cursor.fetchall()
+                if self.connection.in_transaction:
+                    self.cursor.execute("COMMIT")
+            elif self.connection.in_transaction:
+                self.cursor.execute("ROLLBACK")
+            ok = True
+        finally:
+            self.cursor.close()
+            # connections are only pooled outside of transactions
+            if self.pooled and ok and not self.connection.in_transaction:
+                pool.release(self.path, self.readonly, self.connection)
+            else:
+                self.connection.close()
+
+
+class BatchWriter:
+    """
+    Collects rows for write-statements and writes them with
+    `executemany` in short transactions (chunks) to bound the time that
+    other writers have to wait for the write lock.
+
+    Rows are only written at checkpoints (see `checkpoint`) once at
+    least `chunk_rows` rows are pending. If `chunk_duration` (seconds)
+    is given, the number of rows per chunk is adapted so that the write
+    lock is held for about that duration at most. The durations for
+    which the write lock has been held are recorded in `hold_times`.
+    After every chunk that is written at a checkpoint, the writer pauses
+    for `chunk_pause` seconds so that other connections waiting for the
+    write lock (which are only retried after a backoff) can acquire it
+    before the next chunk.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        *,
+        chunk_rows: int,
+        chunk_duration: Optional[float] = None,
+        chunk_pause: float = 0,
+    ) -> None:
+        self.path = path
+        self.max_chunk_rows = chunk_rows
+        self.chunk_rows = chunk_rows
+        self.chunk_duration = chunk_duration
+        self.chunk_pause = chunk_pause
+        self.hold_times: list[float] = []
+        self.rows_written = 0
+        self._pending: dict[str, list[tuple]] = {}
+        self._pending_rows = 0
+        self._checkpoint: Optional[tuple[str, tuple]] = None
+
+    def __enter__(self):
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
         if exc_type is None:
-            self.connection.commit()
-            self.data = self.cursor.fetchall()
-        else:
-            self.connection.rollback()
+            self.flush()
+
+    def add(self, statement: str, rows: list[tuple]) -> None:
+        """Adds `rows` for `statement`."""
+        self._pending.setdefault(statement, []).extend(rows)
+        self._pending_rows += len(rows)
+
+    def checkpoint(
+        self, statement: Optional[str] = None, row: tuple = ()
+    ) -> None:
+        """
+        Marks a consistent state of the pending rows. If given,
+        `statement` (with `row`) is written in the same transaction as
+        the rows up to this point (e.g. to record progress; replaces
+        previous checkpoint-statements). Writes pending rows if at
+        least `chunk_rows` rows are pending.
+        """
+        if statement is not None:
+            self._checkpoint = (statement, row)
+        if self._pending_rows >= self.chunk_rows:
+            self.flush()
+            if self.chunk_pause > 0:
+                sleep(self.chunk_pause)
+
+    def flush(self) -> None:
+        """Writes all pending rows in a single transaction."""
+        if self._pending_rows == 0 and self._checkpoint is None:
+            return
+        with Transaction(self.path) as t:
+            # rows are grouped by statement
+            t.cursor.execute("PRAGMA defer_foreign_keys = ON")
+            start = perf_counter()
+            for statement, rows in self._pending.items():
+                t.cursor.executemany(statement, rows)
+            if self._checkpoint is not None:
+                t.cursor.execute(*self._checkpoint)
+        duration = perf_counter() - start
+        self.hold_times.append(duration)
+        self.rows_written += self._pending_rows
+
+        # adapt chunk size
+        if self.chunk_duration is not None and self._pending_rows > 0:
+            self.chunk_rows = max(
+                1,
+                min(
+                    self.max_chunk_rows,
+                    int(
+                        self._pending_rows
+                        * self.chunk_duration
+                        / max(duration, 1e-6)
+                    ),
+                ),
+            )
 
-        self.cursor.close()
-        self.connection.close()
+        self._pending = {}
+        self._pending_rows = 0
+        self._checkpoint = None
@@ -0,0 +1,141 @@
+"""Persistent cache for ffprobe-results."""
+
+from typing import Optional
+import os
+import sys
+import sqlite3
+from pathlib import Path
+from time import time
+
+from .common import Transaction, set_journal_mode
+from .tracks import compress_metadata, decompress_metadata
+
+
+class ProbeCache:
+    """
+    Persistent cache for ffprobe-results of files (stored in a separate
+    SQLite3-database so that probing does not interfere with the
+    index-database).
+
+    Entries are keyed by the resolved path of a file and are only valid
+    while size and modification time of that file match; stale entries
+    are replaced when a file is probed again. At most `maxsize` entries
+    are kept (see `evict`).
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS probes (
+        path TEXT NOT NULL PRIMARY KEY,
+        size INTEGER NOT NULL,
+        mtime_ns INTEGER NOT NULL,
+        metadata BLOB NOT NULL,
+        accessed INTEGER NOT NULL
+    );
+
+    CREATE INDEX IF NOT EXISTS probes_accessed
+    ON probes (accessed);
+    """
+
+    def __init__(self, path: Path, maxsize: int) -> None:
+        self.path = path
+        self.maxsize = maxsize
+        with Transaction(self.path) as t:
+            t.cursor.executescript(self.SCHEMA)
+        set_journal_mode(self.path, "WAL")
+
+    def get(self, file: Path, stat: os.stat_result) -> Optional[dict]:
+        """
+        Returns cached metadata for `file` with `stat` or `None` if not
+        available (also if the cache cannot be read).
+        """
+        path = str(file.resolve())
+        # the lookup is read-only so that parallel lookups do not need
+        # to upgrade to a write-transaction (which fails immediately
+        # instead of waiting if another connection has written since)
+        try:
+            with Transaction(self.path, readonly=True) as t:
+                t.cursor.execute(
+                    """
+                    SELECT size, mtime_ns, metadata FROM probes
+                    WHERE path = ?
+                    """,
+                    (path,),
+                )
+        except sqlite3.Error as exc_info:
+            self._warn(exc_info)
+            return None
+        if len(t.data) == 0:
+            return None
+        row = t.data[0]
+        stale = row[:2] != (stat.st_size, stat.st_mtime_ns)
+        try:
+            with Transaction(self.path) as t:
+                if stale:
+                    t.cursor.execute(
+                        """
+                        DELETE FROM probes
+                        WHERE path = ? AND size = ? AND mtime_ns = ?
+                        """,
+                        (path,) + row[:2],
+                    )
+                else:
+                    t.cursor.execute(
+                        "UPDATE probes SET accessed = ? WHERE path = ?",
+                        (int(time()), path),
+                    )
+        except sqlite3.Error as exc_info:
+            # only affects eviction
+            self._warn(exc_info)
+        if stale:
+            return None
+        return decompress_metadata(row[2])
+
+    def put(self, file: Path, stat: os.stat_result, metadata: dict) -> None:
+        """
+        Stores `metadata` for `file` with `stat` (errors are reported but
+        not raised).
+        """
+        try:
+            with Transaction(self.path) as t:
+                t.cursor.execute(
+                    "INSERT OR REPLACE INTO probes VALUES (?, ?, ?, ?, ?)",
+                    (
+                        str(file.resolve()),
+                        stat.st_size,
+                        stat.st_mtime_ns,
+                        compress_metadata(metadata),
+                        int(time()),
+                    ),
+                )
+        except sqlite3.Error as exc_info:
+            self._warn(exc_info)
+
+    @staticmethod
+    def _warn(exc_info: Exception) -> None:
+        """Reports error when accessing the cache."""
+        print(
+            "\033[1;33m"
+            + f"Failed to access probe cache: {exc_info}"
+            + "\033[0m",
+            file=sys.stderr,
+        )
+
+    def evict(self) -> int:
+        """
+        Removes least recently used entries exceeding `maxsize` and
+        returns the number of removed entries.
+        """
+        with Transaction(self.path) as t:
+            t.cursor.execute(
+                """
+                DELETE FROM probes
+                WHERE path IN (
+                    SELECT path FROM probes
+                    ORDER BY accessed DESC
+                    LIMIT -1 OFFSET ?
+                )
+                """,
+                (self.maxsize,),
+            )
+            removed = t.cursor.rowcount
+        return removed
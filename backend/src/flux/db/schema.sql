@@ -37,11 +37,17 @@ CREATE TABLE user_secrets (
     password TEXT NOT NULL
 );
 
+CREATE INDEX user_secrets_username
+ON user_secrets (username);
+
 CREATE TABLE sessions (
     id TEXT NOT NULL PRIMARY KEY,
     username TEXT NOT NULL REFERENCES users (name) ON DELETE CASCADE
 );
 
+CREATE INDEX sessions_username
+ON sessions (username);
+
 -- index tables
 CREATE TABLE thumbnails (
     id TEXT NOT NULL PRIMARY KEY,
@@ -53,9 +59,29 @@ CREATE TABLE records (
     thumbnail_id TEXT NOT NULL REFERENCES thumbnails (id) ON DELETE SET NULL,
     type TEXT NOT NULL CHECK( type IN ('series','movie','collection') ),
     name TEXT NOT NULL,
-    description TEXT NOT NULL
+    description TEXT NOT NULL,
+    -- unix timestamp of when the record was added to the index
+    added INTEGER NOT NULL DEFAULT 0,
+    -- source (file or directory) of the record; used by `flux index sync`
+    path TEXT
 );
 
+-- sort orders for listing records (optionally filtered by type)
+CREATE INDEX records_name
+ON records (name COLLATE NOCASE, id);
+
+CREATE INDEX records_added
+ON records (added, id);
+
+CREATE INDEX records_type_name
+ON records (type, name COLLATE NOCASE, id);
+
+CREATE INDEX records_type_added
+ON records (type, added, id);
+
+CREATE INDEX records_thumbnail_id
+ON records (thumbnail_id);
+
 CREATE TABLE seasons (
     id TEXT NOT NULL PRIMARY KEY,
     record_id TEXT NOT NULL REFERENCES records (id) ON DELETE CASCADE,
@@ -79,14 +105,93 @@ CREATE TABLE videos (
 CREATE UNIQUE INDEX unique_video_position
 ON videos (record_id, season_id, position);
 
+CREATE INDEX videos_season_id
+ON videos (season_id);
+
+CREATE INDEX videos_thumbnail_id
+ON videos (thumbnail_id);
+
+-- full text search (trigram-tokenizer for case-insensitive substring
+-- matching) on record and video names/descriptions; these tables are
+-- kept in sync with their content tables via triggers
+CREATE VIRTUAL TABLE records_search USING fts5 (
+    name,
+    description,
+    content='records',
+    content_rowid='rowid',
+    tokenize='trigram'
+);
+
+CREATE TRIGGER records_search_insert AFTER INSERT ON records BEGIN
+    INSERT INTO records_search (rowid, name, description)
+    VALUES (new.rowid, new.name, new.description);
+END;
+
+CREATE TRIGGER records_search_delete AFTER DELETE ON records BEGIN
+    INSERT INTO records_search (records_search, rowid, name, description)
+    VALUES ('delete', old.rowid, old.name, old.description);
+END;
+
+CREATE TRIGGER records_search_update
+AFTER UPDATE OF name, description ON records BEGIN
+    INSERT INTO records_search (records_search, rowid, name, description)
+    VALUES ('delete', old.rowid, old.name, old.description);
+    INSERT INTO records_search (rowid, name, description)
+    VALUES (new.rowid, new.name, new.description);
+END;
+
+CREATE VIRTUAL TABLE videos_search USING fts5 (
+    name,
+    description,
+    content='videos',
+    content_rowid='rowid',
+    tokenize='trigram'
+);
+
+CREATE TRIGGER videos_search_insert AFTER INSERT ON videos BEGIN
+    INSERT INTO videos_search (rowid, name, description)
+    VALUES (new.rowid, new.name, new.description);
+END;
+
+CREATE TRIGGER videos_search_delete AFTER DELETE ON videos BEGIN
+    INSERT INTO videos_search (videos_search, rowid, name, description)
+    VALUES ('delete', old.rowid, old.name, old.description);
+END;
+
+CREATE TRIGGER videos_search_update
+AFTER UPDATE OF name, description ON videos BEGIN
+    INSERT INTO videos_search (videos_search, rowid, name, description)
+    VALUES ('delete', old.rowid, old.name, old.description);
+    INSERT INTO videos_search (rowid, name, description)
+    VALUES (new.rowid, new.name, new.description);
+END;
+
 -- this distinction from videos-table is made to prepare for future support
 -- of multiple tracks per video
 CREATE TABLE tracks (
     id TEXT NOT NULL PRIMARY KEY,
     video_id TEXT NOT NULL REFERENCES videos (id) ON DELETE CASCADE,
     path TEXT NOT NULL,
-    metadata_json text NOT NULL,
-    is_primary_track INTEGER NOT NULL DEFAULT 1
+    is_primary_track INTEGER NOT NULL DEFAULT 1,
+    -- selected ffprobe-metadata (see `flux.db.tracks`)
+    duration REAL,
+    format_name TEXT,
+    format_long_name TEXT,
+    bit_rate INTEGER,
+    width INTEGER,
+    height INTEGER,
+    codec_name TEXT,
+    -- full ffprobe-metadata as zlib-compressed JSON
+    metadata_compressed BLOB,
+    -- file identity at the time of indexing (used to detect changes)
+    size INTEGER,
+    mtime_ns INTEGER,
+    inode INTEGER,
+    -- whether the file has been found during the last sync
+    available INTEGER NOT NULL DEFAULT 1,
+    -- content fingerprint (used to detect indexed and moved files; see
+    -- `flux.cli.index.fingerprints`)
+    fingerprint TEXT
 );
 
 -- only one track must be marked as primary
@@ -94,6 +199,55 @@ CREATE UNIQUE INDEX unique_primary_track
 ON tracks (video_id)
 WHERE is_primary_track = 1;
 
+CREATE INDEX tracks_video_id
+ON tracks (video_id);
+
+CREATE INDEX tracks_fingerprint
+ON tracks (fingerprint);
+
+-- journal of imports that have not been completed yet (see
+-- `flux index add --resume`)
+CREATE TABLE imports (
+    record_id TEXT NOT NULL PRIMARY KEY
+        REFERENCES records (id) ON DELETE CASCADE,
+    -- number of files of the record source that have been processed
+    processed INTEGER NOT NULL DEFAULT 0,
+    -- unix timestamp of when the import has been started
+    started INTEGER NOT NULL
+);
+
+-- background jobs of the admin-API (see `flux.app.jobs`)
+CREATE TABLE jobs (
+    id TEXT NOT NULL PRIMARY KEY,
+    -- 'add' or 'sync'
+    action TEXT NOT NULL,
+    -- source location ('add') or record-id ('sync'; NULL for all)
+    target TEXT,
+    -- record type ('add'; NULL for heuristic detection)
+    type TEXT,
+    name TEXT,
+    description TEXT,
+    username TEXT REFERENCES users (name) ON DELETE SET NULL,
+    -- 'queued', 'running', 'completed', 'failed', or 'cancelled'
+    status TEXT NOT NULL DEFAULT 'queued',
+    -- set to request cancellation of a running job
+    cancel INTEGER NOT NULL DEFAULT 0,
+    -- progress counters (files)
+    processed INTEGER NOT NULL DEFAULT 0,
+    total INTEGER NOT NULL DEFAULT 0,
+    -- JSON-encoded result and error message
+    result TEXT,
+    error TEXT,
+    -- unix timestamps
+    created INTEGER NOT NULL,
+    started INTEGER,
+    finished INTEGER
+);
+
+-- queue order
+CREATE INDEX jobs_status_created ON jobs (status, created);
+CREATE INDEX jobs_username ON jobs (username);
+
 -- user playbacks
 CREATE TABLE playbacks (
     username TEXT NOT NULL REFERENCES users (name) ON DELETE CASCADE,
@@ -106,3 +260,12 @@ CREATE TABLE playbacks (
 -- only one playback per user and record
 CREATE UNIQUE INDEX unique_record_playback
 ON playbacks (username, record_id);
+
+CREATE INDEX playbacks_username_changed
+ON playbacks (username, changed, record_id);
+
+CREATE INDEX playbacks_record_id
+ON playbacks (record_id);
+
+CREATE INDEX playbacks_video_id
+ON playbacks (video_id);
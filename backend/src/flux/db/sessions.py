@@ -0,0 +1,34 @@
+"""Revision of the sessions in an index (invalidation of cached sessions)."""
+
+from typing import Optional
+import os
+from pathlib import Path
+from uuid import uuid4
+
+
+def get_sessions_revision(path: Path) -> Optional[tuple[int, int]]:
+    """
+    Returns the current revision of the sessions as recorded in the file
+    `path` (inode and modification time; `None` if there is no revision
+    yet). This only requires a `stat` of the file.
+    """
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return stat.st_ino, stat.st_mtime_ns
+
+
+def revoke_sessions(path: Path) -> None:
+    """
+    Advances the revision of the sessions in the file `path`. Has to be
+    called after sessions (or users) have been deleted from the database
+    so that every process discards its cached sessions.
+
+    The file is replaced (instead of modified in place) so that the
+    revision changes even if the modification time does not.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f"{path.name}.{uuid4()}")
+    tmp.write_text(str(uuid4()), encoding="utf-8")
+    os.replace(tmp, path)
@@ -0,0 +1,105 @@
+"""Definitions for storing track-metadata in the database."""
+
+from typing import Optional, Any, Callable, Mapping
+import os
+from pathlib import Path
+import json
+import zlib
+
+
+# selected ffprobe-metadata that is stored in separate columns of the
+# tracks-table
+TRACK_METADATA_COLUMNS = (
+    "duration",
+    "format_name",
+    "format_long_name",
+    "bit_rate",
+    "width",
+    "height",
+    "codec_name",
+)
+# file identity of a track (used to detect changes when syncing)
+TRACK_STAT_COLUMNS = ("size", "mtime_ns", "inode")
+INSERT_TRACK = f"""
+INSERT INTO tracks (
+    id, video_id, path, is_primary_track, {', '.join(TRACK_METADATA_COLUMNS)},
+    metadata_compressed, {', '.join(TRACK_STAT_COLUMNS)}, fingerprint
+)
+VALUES ({', '.join('?' * (len(TRACK_METADATA_COLUMNS) + 9))})
+"""
+
+
+def _convert(value: Any, type_: Callable) -> Optional[Any]:
+    """Returns `value` converted to `type_` or `None` if not possible."""
+    if value is None:
+        return None
+    try:
+        return type_(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def get_track_metadata(metadata: Mapping) -> tuple:
+    """
+    Returns tuple of values for `TRACK_METADATA_COLUMNS` from ffprobe-
+    `metadata` (video-properties are taken from the first video stream).
+    """
+    format_ = metadata.get("format", {})
+    video = next(
+        (
+            stream
+            for stream in metadata.get("streams", [])
+            if stream.get("codec_type") == "video"
+        ),
+        {},
+    )
+    return (
+        _convert(format_.get("duration"), float),
+        _convert(format_.get("format_name"), str),
+        _convert(format_.get("format_long_name"), str),
+        _convert(format_.get("bit_rate"), int),
+        _convert(video.get("width"), int),
+        _convert(video.get("height"), int),
+        _convert(video.get("codec_name"), str),
+    )
+
+
+def compress_metadata(metadata: Mapping) -> bytes:
+    """Returns compressed JSON-representation of `metadata`."""
+    return zlib.compress(
+        json.dumps(metadata, separators=(",", ":")).encode("utf-8")
+    )
+
+
+def decompress_metadata(data: bytes) -> dict:
+    """Returns metadata from its compressed representation."""
+    return json.loads(zlib.decompress(data))
+
+
+def get_track_stat(stat: Optional[os.stat_result]) -> tuple:
+    """
+    Returns tuple of values for `TRACK_STAT_COLUMNS` from `stat` (or
+    `None`s if not available).
+    """
+    if stat is None:
+        return (None,) * len(TRACK_STAT_COLUMNS)
+    return (stat.st_size, stat.st_mtime_ns, stat.st_ino)
+
+
+def get_track_row(
+    track_id: str,
+    video_id: str,
+    path: Path,
+    metadata: Mapping,
+    stat: Optional[os.stat_result] = None,
+    is_primary_track: bool = True,
+    fingerprint: Optional[str] = None,
+) -> tuple:
+    """Returns tuple of values for the statement `INSERT_TRACK`."""
+    return (
+        (track_id, video_id, str(path), int(is_primary_track))
+        + get_track_metadata(metadata)
+        + (compress_metadata(metadata),)
+        + get_track_stat(stat)
+        + (fingerprint,)
+    )
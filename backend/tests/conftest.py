@@ -8,6 +8,7 @@ import pytest
 
 from flux.cli.index.create import CreateIndex
 from flux.config import FluxConfig
+from flux.db import pool
 
 
 @pytest.fixture(scope="session", name="tmp")
@@ -16,6 +17,7 @@ def _tmp(request) -> Path:
     __tmp = Path("tests/tmp")
 
     def _tmp_cleanup(target):
+        pool.close()
         if target.is_dir():
             rmtree(target)
 
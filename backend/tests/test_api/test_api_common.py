@@ -0,0 +1,97 @@
+"""Test common API-definitions."""
+
+from pathlib import Path
+from time import sleep
+from uuid import uuid4
+
+from flux.api.common import SessionCache
+from flux.db.sessions import get_sessions_revision, revoke_sessions
+
+
+def test_session_cache():
+    """Test basic `SessionCache`-operations."""
+    cache = SessionCache(2, 60)
+
+    assert cache.get("s0") is None
+    cache.put("s0", "user0")
+    cache.put("s1", "user1")
+    assert cache.get("s0") == "user0"
+    assert cache.get("s1") == "user1"
+    assert cache.stats() == {
+        "size": 2,
+        "hits": 2,
+        "misses": 1,
+        "invalidations": 0,
+    }
+
+    # invalidation
+    cache.invalidate("s0")
+    assert cache.get("s0") is None
+    cache.put("s0", "user1")
+    cache.invalidate_user("user1")
+    assert cache.get("s0") is None
+    assert cache.get("s1") is None
+    assert cache.stats()["size"] == 0
+
+    cache.clear()
+    assert cache.stats() == {
+        "size": 0,
+        "hits": 0,
+        "misses": 0,
+        "invalidations": 0,
+    }
+
+
+def test_session_cache_bounded():
+    """Test eviction of least recently used entries in `SessionCache`."""
+    cache = SessionCache(2, 60)
+
+    cache.put("s0", "user0")
+    cache.put("s1", "user1")
+    assert cache.get("s0") == "user0"
+    cache.put("s2", "user2")
+    assert cache.get("s1") is None
+    assert cache.get("s0") == "user0"
+    assert cache.get("s2") == "user2"
+
+    # disabled cache
+    cache = SessionCache(0, 60)
+    cache.put("s0", "user0")
+    assert cache.get("s0") is None
+
+
+def test_session_cache_ttl():
+    """Test expiration of entries in `SessionCache`."""
+    cache = SessionCache(2, 0.01)
+
+    cache.put("s0", "user0")
+    assert cache.get("s0") == "user0"
+    sleep(0.02)
+    assert cache.get("s0") is None
+    assert cache.stats()["size"] == 0
+
+
+def test_session_cache_revision(tmp: Path):
+    """Test invalidation of `SessionCache` via shared revision."""
+    cache = SessionCache(2, 60)
+    path = tmp / str(uuid4())
+    revision = get_sessions_revision(path)
+    assert revision is None
+
+    cache.put("s0", "user0", revision)
+    assert cache.get("s0", revision) == "user0"
+
+    # revoked by another process
+    revoke_sessions(path)
+    revision = get_sessions_revision(path)
+    assert revision is not None
+    assert cache.get("s0", revision) is None
+    assert cache.stats()["invalidations"] == 1
+
+    # entries loaded for an outdated revision are not added
+    cache.put("s0", "user0", None)
+    assert cache.get("s0", revision) is None
+    cache.put("s0", "user0", revision)
+    assert cache.get("s0", revision) == "user0"
+    revoke_sessions(path)
+    assert get_sessions_revision(path) != revision
@@ -0,0 +1,173 @@
+"""Test static API."""
+
+from pathlib import Path
+from shutil import copy
+from uuid import uuid4
+
+import pytest
+from werkzeug.wsgi import FileWrapper
+
+from flux.config import FluxConfig
+from flux.cli import cli
+from flux.app.app import app_factory
+
+
+def _get_track_id(client) -> str:
+    record_id = client.get("/api/v0/index/records").json["content"][
+        "records"
+    ][0]["id"]
+    return client.get(f"/api/v0/index/record/{record_id}").json["content"][
+        "content"
+    ]["trackId"]
+
+
+# pylint: disable=unused-argument
+def test_video(patch_config, tmp_movie: Path, login):
+    """Test streaming video data."""
+    # setup (create index and app)
+    cli(["index", "create", "-i", str(FluxConfig.INDEX_LOCATION)])
+    cli(["index", "add", "-i", str(FluxConfig.INDEX_LOCATION), str(tmp_movie)])
+    client = app_factory().test_client()
+
+    login(client)
+    track_id = _get_track_id(client)
+    data = tmp_movie.read_bytes()
+
+    # missing range
+    assert client.get(f"/video/{track_id}").status_code == 400
+
+    # without wsgi.file_wrapper
+    response = client.get(f"/video/{track_id}", headers={"Range": "bytes=0-"})
+    assert response.status_code == 206
+    assert int(response.headers["Content-Length"]) == len(response.data)
+    assert response.data == data
+
+    # with wsgi.file_wrapper
+    response = client.get(
+        f"/video/{track_id}",
+        headers={"Range": "bytes=10-"},
+        environ_overrides={"wsgi.file_wrapper": FileWrapper},
+    )
+    assert response.status_code == 206
+    assert int(response.headers["Content-Length"]) == len(response.data)
+    assert response.data == data[10:]
+
+
+# pylint: disable=unused-argument
+def test_video_ranges(patch_config, tmp_movie: Path, login):
+    """Test range-handling of video endpoint."""
+    # setup (create index and app)
+    cli(["index", "create", "-i", str(FluxConfig.INDEX_LOCATION)])
+    cli(["index", "add", "-i", str(FluxConfig.INDEX_LOCATION), str(tmp_movie)])
+    client = app_factory().test_client()
+
+    login(client)
+    track_id = _get_track_id(client)
+    data = tmp_movie.read_bytes()
+    size = len(data)
+
+    for range_, expected in [
+        ("bytes=100-199", (100, 199)),
+        ("bytes=100-", (100, size - 1)),
+        ("bytes=-100", (size - 100, size - 1)),
+        (f"bytes=100-{10 * size}", (100, size - 1)),
+    ]:
+        response = client.get(f"/video/{track_id}", headers={"Range": range_})
+        assert response.status_code == 206, range_
+        assert (
+            response.headers["Content-Range"]
+            == f"bytes {expected[0]}-{expected[1]}/{size}"
+        ), range_
+        assert response.data == data[expected[0] : expected[1] + 1], range_
+
+    for range_ in [
+        "bytes=200-100",
+        f"bytes={size}-",
+        "bytes=0-1,5-6",
+        "items=0-1",
+        "bytes=a-b",
+    ]:
+        response = client.get(f"/video/{track_id}", headers={"Range": range_})
+        assert response.status_code == 416, range_
+        assert response.headers["Content-Range"] == f"bytes */{size}", range_
+
+    # limited response size
+    FluxConfig.VIDEO_RANGE_MAX_SIZE = 100
+    try:
+        response = client.get(
+            f"/video/{track_id}", headers={"Range": "bytes=10-"}
+        )
+    finally:
+        FluxConfig.VIDEO_RANGE_MAX_SIZE = None
+    assert response.status_code == 206
+    assert response.headers["Content-Range"] == f"bytes 10-109/{size}"
+    assert response.data == data[10:110]
+
+
+# pylint: disable=unused-argument
+def test_video_unavailable(patch_config, tmp: Path, tmp_movie: Path, login):
+    """Test that unavailable videos are not served."""
+    # setup (create index and app)
+    movie = (tmp / f"{uuid4()}.mp4").resolve()
+    copy(tmp_movie, movie)
+    cli(["index", "create", "-i", str(FluxConfig.INDEX_LOCATION)])
+    cli(["index", "add", "-i", str(FluxConfig.INDEX_LOCATION), str(movie)])
+    client = app_factory().test_client()
+
+    login(client)
+    record_id = client.get("/api/v0/index/records").json["content"][
+        "records"
+    ][0]["id"]
+    track_id = _get_track_id(client)
+    assert (
+        client.get(f"/video/{track_id}", headers={"Range": "bytes=0-"})
+    ).status_code == 206
+
+    # file is gone
+    movie.unlink()
+    response = client.get(f"/video/{track_id}", headers={"Range": "bytes=0-"})
+    assert response.json["meta"]["error"]["code"] == 404
+
+    # marked as unavailable
+    with pytest.raises(SystemExit):
+        cli(
+            [
+                "index",
+                "verify",
+                "-i",
+                str(FluxConfig.INDEX_LOCATION),
+                "--mark",
+            ]
+        )
+    assert (
+        client.get("/api/v0/index/records").json["content"]["count"] == 0
+    )
+    response = client.get(f"/api/v0/index/record/{record_id}")
+    assert response.json["meta"]["error"]["code"] == 404
+    response = client.get(f"/video/{track_id}", headers={"Range": "bytes=0-"})
+    assert response.json["meta"]["error"]["code"] == 404
+
+    # file has reappeared
+    copy(tmp_movie, movie)
+    cli(
+        ["index", "verify", "-i", str(FluxConfig.INDEX_LOCATION), "--mark"]
+    )
+    assert (
+        client.get(f"/video/{track_id}", headers={"Range": "bytes=0-"})
+    ).status_code == 206
+
+    # marked as unavailable while the file still exists
+    with open(movie, "ab") as file:
+        file.write(b"\x00")
+    with pytest.raises(SystemExit):
+        cli(
+            [
+                "index",
+                "verify",
+                "-i",
+                str(FluxConfig.INDEX_LOCATION),
+                "--mark",
+            ]
+        )
+    response = client.get(f"/video/{track_id}", headers={"Range": "bytes=0-"})
+    assert response.json["meta"]["error"]["code"] == 404
@@ -3,8 +3,12 @@
 from urllib.parse import quote
 
 from pathlib import Path
+from shutil import copy
+from uuid import uuid4
 
 from flux.config import FluxConfig
+from flux.db import Transaction
+from flux.db.tracks import TRACK_METADATA_COLUMNS
 from flux.cli import cli
 from flux.app.app import app_factory
 
@@ -91,6 +95,13 @@ def test_index_list_records_series(patch_config, tmp_series: Path, login):
     response = client.get("/api/v0/index/records?range=1-2").json
     assert response["content"]["count"] == 1
     assert len(response["content"]["records"]) == 0
+    # * empty and inverted ranges
+    for range_ in ["0-0", "1-1", "1-0"]:
+        response = client.get(f"/api/v0/index/records?range={range_}")
+        assert response.status_code == 200
+        assert response.json["content"]["count"] == 1
+        assert response.json["content"]["records"] == []
+        assert response.json["content"]["next"] is None
 
     # get record
     response = client.get(f"/api/v0/index/record/{record_id}")
@@ -119,6 +130,11 @@ def test_index_list_records_series(patch_config, tmp_series: Path, login):
                 assert key in episode
                 assert episode[key] is not None
 
+    assert [
+        (season["name"], len(season["episodes"]))
+        for season in response.json["content"]["content"]["seasons"]
+    ] == [("s1", 2), ("s2", 1)]
+
     assert isinstance(response.json["content"]["content"]["specials"], list)
     assert len(response.json["content"]["content"]["specials"]) == 1
     for special in response.json["content"]["content"]["specials"]:
@@ -219,6 +235,24 @@ def test_index_list_records_movie(patch_config, tmp_movie: Path, login):
     ]:
         assert key in response.json["content"]["content"]
         assert response.json["content"]["content"][key] is not None
+    metadata = response.json["content"]["content"]["metadata"]
+    assert set(metadata) == set(TRACK_METADATA_COLUMNS)
+    assert metadata["duration"] > 0
+    assert metadata["width"] > 0
+    assert metadata["height"] > 0
+
+    # get full track metadata
+    track_id = response.json["content"]["content"]["trackId"]
+    response_metadata = client.get(
+        f"/api/v0/index/track/{track_id}/metadata"
+    ).json
+    assert response_metadata["meta"]["ok"]
+    assert float(response_metadata["content"]["format"]["duration"]) == (
+        metadata["duration"]
+    )
+    assert len(response_metadata["content"]["streams"]) > 0
+    response_metadata = client.get("/api/v0/index/track/unknown/metadata")
+    assert response_metadata.json["meta"]["error"]["code"] == 404
 
     # get current video
     response_current_video = client.get(
@@ -305,3 +339,190 @@ def test_index_list_records_collection(
         response_current_video.json["content"]["video"]
         == response.json["content"]["content"][0]
     )
+
+
+# pylint: disable=unused-argument
+def test_index_list_records_search(
+    patch_config, tmp_series: Path, tmp_movie: Path, login
+):
+    """Test full text search when listing records in index."""
+    # setup (create index and app)
+    cli(["index", "create", "-i", str(FluxConfig.INDEX_LOCATION)])
+    for type_, name, description, path in [
+        ("series", "test series", "about a movie", tmp_series),
+        ("movie", "test movie", "about 100% of a_series", tmp_movie),
+    ]:
+        cli(
+            [
+                "index",
+                "add",
+                "-i",
+                str(FluxConfig.INDEX_LOCATION),
+                "--type",
+                type_,
+                "--name",
+                name,
+                "--description",
+                description,
+                str(path),
+            ]
+        )
+    client = app_factory().test_client()
+
+    login(client)
+
+    def search(query):
+        response = client.get(f"/api/v0/index/records?search={quote(query)}")
+        assert response.json["meta"]["ok"]
+        assert response.json["content"]["count"] == len(
+            response.json["content"]["records"]
+        )
+        return [r["name"] for r in response.json["content"]["records"]]
+
+    # case-insensitive substring
+    assert search("SERIES") == ["test series", "test movie"]
+    assert search("movie") == ["test movie", "test series"]
+    assert search("est") == ["test series", "test movie"]
+    assert search("nothing") == []
+
+    # short and special patterns
+    assert sorted(search("t ")) == ["test movie", "test series"]
+    assert search("%") == ["test movie"]
+    assert search("a_") == ["test movie"]
+    assert search('"') == []
+    assert search('"test') == []
+
+    # match in videos
+    with Transaction(
+        FluxConfig.INDEX_LOCATION / FluxConfig.INDEX_DB_FILE
+    ) as t:
+        t.cursor.execute(
+            "UPDATE videos SET name = 'pilot episode' WHERE record_id IN "
+            + "(SELECT id FROM records WHERE type = 'series')"
+        )
+    assert search("pilot") == ["test series"]
+    assert search("episode") == ["test series"]
+
+    # updates and removal of records
+    with Transaction(
+        FluxConfig.INDEX_LOCATION / FluxConfig.INDEX_DB_FILE
+    ) as t:
+        t.cursor.execute(
+            "UPDATE records SET name = 'other name' WHERE type = 'movie'"
+        )
+        t.cursor.execute("SELECT id FROM records WHERE type = 'movie'")
+    movie_id = t.data[0][0]
+    assert search("test movie") == []
+    assert search("other name") == ["other name"]
+    cli(["index", "rm", "-i", str(FluxConfig.INDEX_LOCATION), movie_id])
+    assert search("other name") == []
+    assert search("series") == ["test series"]
+
+
+# pylint: disable=unused-argument
+def test_index_list_records_pagination(
+    patch_config, tmp: Path, tmp_movie: Path, login
+):
+    """Test sorting and keyset pagination when listing records."""
+    # setup (create index and app)
+    cli(["index", "create", "-i", str(FluxConfig.INDEX_LOCATION)])
+    names = ["b", "D", "a", "c", "E"]
+    movies = tmp / str(uuid4())
+    movies.mkdir()
+    for name in names:
+        # (files that are already indexed are skipped)
+        copy(tmp_movie, movies / f"{name}.mp4")
+        cli(
+            [
+                "index",
+                "add",
+                "-i",
+                str(FluxConfig.INDEX_LOCATION),
+                "--name",
+                name,
+                str(movies / f"{name}.mp4"),
+            ]
+        )
+    # fake order of insertion
+    with Transaction(
+        FluxConfig.INDEX_LOCATION / FluxConfig.INDEX_DB_FILE
+    ) as t:
+        for added, name in enumerate(names):
+            t.cursor.execute(
+                "UPDATE records SET added = ? WHERE name = ?", (added, name)
+            )
+    client = app_factory().test_client()
+
+    login(client)
+
+    def list_all(query, limit, count=len(names)):
+        records = []
+        cursor = None
+        while True:
+            response = client.get(
+                f"/api/v0/index/records?{query}&limit={limit}"
+                + (f"&cursor={cursor}" if cursor else "")
+            )
+            assert response.json["meta"]["ok"]
+            assert response.json["content"]["count"] == count
+            assert len(response.json["content"]["records"]) <= limit
+            records += [r["name"] for r in response.json["content"]["records"]]
+            cursor = response.json["content"]["next"]
+            if cursor is None:
+                return records
+
+    # sort orders
+    for limit in [1, 2, 5, 10]:
+        assert list_all("sort=name", limit) == ["a", "b", "c", "D", "E"]
+        assert list_all("sort=added-at", limit) == names[::-1]
+    assert list_all("", 2) == ["a", "b", "c", "D", "E"]
+
+    # ranges can be combined with sort orders
+    response = client.get("/api/v0/index/records?sort=name&range=1-3")
+    assert [r["name"] for r in response.json["content"]["records"]] == [
+        "b",
+        "c",
+    ]
+    assert response.json["content"]["next"] is not None
+    response = client.get(
+        "/api/v0/index/records?sort=name&limit=5"
+        + f"&cursor={response.json['content']['next']}"
+    )
+    assert [r["name"] for r in response.json["content"]["records"]] == [
+        "D",
+        "E",
+    ]
+    assert response.json["content"]["next"] is None
+
+    # last watched
+    records = client.get("/api/v0/index/records").json["content"]["records"]
+    assert client.get("/api/v0/index/records?sort=last-watched").json[
+        "content"
+    ] == {"count": 0, "records": [], "next": None}
+    for record in records[:3]:
+        assert client.post(
+            f"/api/v0/playback/{record['id']}",
+            json={"content": {"videoId": record["id"], "timestamp": 1}},
+        ).json["meta"]["ok"]
+    assert len(set(list_all("sort=last-watched", 1, 3))) == 3
+    assert list_all("continue=true&sort=name", 1, 3) == ["a", "b", "c"]
+
+    # bad requests
+    next_ = client.get("/api/v0/index/records?sort=name&limit=1").json[
+        "content"
+    ]["next"]
+    for query in [
+        "sort=unknown",
+        "sort=relevance",
+        "limit=0",
+        "limit=a",
+        "range=0-1&limit=1",
+        f"range=0-1&cursor={next_}",
+        "cursor=bad",
+        f"cursor={next_[:-2]}",
+        f"sort=added-at&cursor={next_}",
+        f"sort=name&type=series&cursor={next_}",
+    ]:
+        response = client.get(f"/api/v0/index/records?{query}")
+        assert not response.json["meta"]["ok"], query
+        assert response.json["meta"]["error"]["code"] == 400, query
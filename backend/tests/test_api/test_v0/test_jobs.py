@@ -0,0 +1,221 @@
+"""Test index-jobs API."""
+
+import sqlite3
+import threading
+from pathlib import Path
+from time import sleep
+from uuid import uuid4
+
+from flux.config import FluxConfig
+from flux.db import Transaction
+from flux.cli import cli
+from flux.app.app import app_factory
+from flux.app.jobs import JobWorker, JobProgress
+from flux.cli.index.add import AddToIndex
+
+
+def setup_client(login):
+    """Returns test-client with logged-in admin."""
+    cli(["index", "create", "-i", str(FluxConfig.INDEX_LOCATION)])
+    client = app_factory().test_client()
+    login(client)
+    cli(["user", "promote", "-i", str(FluxConfig.INDEX_LOCATION), "user0"])
+    return client
+
+
+# pylint: disable=unused-argument
+def test_index_jobs_add(patch_config, tmp_series: Path, login):
+    """Test adding a record via background job."""
+    client = setup_client(login)
+
+    response = client.post(
+        "/api/v0/index/jobs",
+        json={
+            "content": {
+                "action": "add",
+                "path": str(tmp_series.resolve()),
+                "name": "job series",
+            }
+        },
+    )
+    assert response.json["meta"]["ok"]
+    job = response.json["content"]
+    assert job["status"] == "queued"
+    assert job["target"] == str(tmp_series.resolve())
+
+    # nothing is processed by the request
+    with Transaction(
+        FluxConfig.INDEX_LOCATION / FluxConfig.INDEX_DB_FILE
+    ) as t:
+        t.cursor.execute("SELECT COUNT(*) FROM records")
+    assert t.data == [(0,)]
+
+    worker = JobWorker(FluxConfig.INDEX_LOCATION, 2)
+    assert worker.run_next()
+    assert not worker.run_next()
+
+    job = client.get(f"/api/v0/index/jobs/{job['id']}").json["content"]
+    assert job["status"] == "completed"
+    assert job["progress"] == {"processed": 4, "total": 4}
+    assert job["result"]["type"] == "series"
+    record = client.get(
+        f"/api/v0/index/record/{job['result']['recordId']}"
+    ).json["content"]
+    assert record["name"] == "job series"
+
+    # listing
+    response = client.get("/api/v0/index/jobs?status=completed")
+    assert [j["id"] for j in response.json["content"]["jobs"]] == [job["id"]]
+    assert (
+        client.get("/api/v0/index/jobs?status=queued").json["content"]["jobs"]
+        == []
+    )
+
+
+def test_index_jobs_sync_and_cancel(
+    monkeypatch, patch_config, tmp_movie: Path, login
+):
+    """Test synchronizing via background job and cancelling jobs."""
+    client = setup_client(login)
+
+    # queued jobs are cancelled immediately
+    job = client.post(
+        "/api/v0/index/jobs", json={"content": {"action": "sync"}}
+    ).json["content"]
+    response = client.delete(f"/api/v0/index/jobs/{job['id']}")
+    assert response.json["content"]["status"] == "cancelled"
+    assert not JobWorker(FluxConfig.INDEX_LOCATION, 1).run_next()
+    # finished jobs cannot be cancelled
+    response = client.delete(f"/api/v0/index/jobs/{job['id']}")
+    assert response.json["meta"]["error"]["code"] == 409
+
+    # running jobs are cancelled by the worker
+    job = client.post(
+        "/api/v0/index/jobs",
+        json={"content": {"action": "add", "path": str(tmp_movie.resolve())}},
+    ).json["content"]
+    worker = JobWorker(FluxConfig.INDEX_LOCATION, 1)
+    worker.claim()
+    response = client.delete(f"/api/v0/index/jobs/{job['id']}")
+    assert response.json["content"]["status"] == "running"
+    assert response.json["content"]["cancelRequested"]
+
+    # (simulate cancellation after interruption)
+    worker.recover()
+    assert not worker.run_next()
+    job = client.get(f"/api/v0/index/jobs/{job['id']}").json["content"]
+    assert job["status"] == "cancelled"
+
+    # cancellation during processing
+    job = client.post(
+        "/api/v0/index/jobs",
+        json={"content": {"action": "add", "path": str(tmp_movie.resolve())}},
+    ).json["content"]
+    with Transaction(
+        FluxConfig.INDEX_LOCATION / FluxConfig.INDEX_DB_FILE
+    ) as t:
+        t.cursor.execute("UPDATE jobs SET cancel = 1")
+    monkeypatch.setattr(FluxConfig, "JOBS_UPDATE_INTERVAL", 0.01)
+    monkeypatch.setattr(
+        AddToIndex, "is_video_file", lambda _: sleep(0.1) or True
+    )
+    assert worker.run_next()
+    job = client.get(f"/api/v0/index/jobs/{job['id']}").json["content"]
+    assert job["status"] == "cancelled"
+    monkeypatch.undo()
+
+    # sync
+    cli(["index", "add", "-i", str(FluxConfig.INDEX_LOCATION), str(tmp_movie)])
+    job = client.post(
+        "/api/v0/index/jobs", json={"content": {"action": "sync"}}
+    ).json["content"]
+    assert worker.run_next()
+    job = client.get(f"/api/v0/index/jobs/{job['id']}").json["content"]
+    assert job["status"] == "completed"
+    assert job["result"]["records"] == 1
+
+
+def test_index_jobs_validation(patch_config, login):
+    """Test validation of job-requests."""
+    client = setup_client(login)
+
+    for content, code in [
+        ({"action": "remove"}, 400),
+        ({"action": "add"}, 400),
+        ({"action": "add", "path": "relative/path"}, 400),
+        ({"action": "add", "path": "/does/not/exist"}, 404),
+        ({"action": "add", "path": "/", "type": "other"}, 400),
+        ({"action": "sync", "recordId": "unknown"}, 404),
+    ]:
+        response = client.post("/api/v0/index/jobs", json={"content": content})
+        assert response.json["meta"]["error"]["code"] == code
+    assert (
+        client.get("/api/v0/index/jobs/unknown").json["meta"]["error"]["code"]
+        == 404
+    )
+
+    # admin only
+    cli(["user", "demote", "-i", str(FluxConfig.INDEX_LOCATION), "user0"])
+    assert not client.get("/api/v0/index/jobs").json["meta"]["ok"]
+
+
+def test_index_jobs_worker_exclusive(monkeypatch, tmp: Path):
+    """
+    Test that only one of multiple workers that share a lock-file runs
+    jobs (e.g., in different gunicorn-workers).
+    """
+    running = []
+
+    def run(self, stop=None):
+        running.append(self)
+        stop.wait()
+
+    monkeypatch.setattr(JobWorker, "run", run)
+    lock = tmp / f"{uuid4()}.lock"
+    workers = [JobWorker(tmp, 1) for _ in range(2)]
+    stops = [threading.Event() for _ in workers]
+    threads = [
+        worker.start(stop, lock=lock) for worker, stop in zip(workers, stops)
+    ]
+    sleep(0.1)
+    assert len(running) == 1
+
+    # other worker takes over
+    stops[workers.index(running[0])].set()
+    sleep(0.1)
+    assert len(running) == 2
+    assert running[0] is not running[1]
+
+    for stop in stops:
+        stop.set()
+    for thread in threads:
+        thread.join()
+
+
+def test_index_jobs_progress_locked(monkeypatch, patch_config, login):
+    """
+    Test that progress updates of jobs continue if the index is locked
+    temporarily.
+    """
+    client = setup_client(login)
+    job = client.post(
+        "/api/v0/index/jobs", json={"content": {"action": "sync"}}
+    ).json["content"]
+    monkeypatch.setattr(FluxConfig, "DB_BUSY_TIMEOUT", 0)
+    monkeypatch.setattr(FluxConfig, "JOBS_UPDATE_INTERVAL", 0.01)
+
+    index_db = FluxConfig.INDEX_LOCATION / FluxConfig.INDEX_DB_FILE
+    connection = sqlite3.connect(index_db, isolation_level=None)
+    with JobProgress(index_db, job["id"], workers=1) as progress:
+        connection.execute("BEGIN IMMEDIATE")
+        connection.execute("UPDATE jobs SET cancel = 1")
+        progress.add_total(1)
+        sleep(0.1)
+        assert not progress.cancelled
+        # cancellation is picked up once the lock is released
+        connection.execute("COMMIT")
+        sleep(0.1)
+        assert progress.cancelled
+    connection.close()
+    job = client.get(f"/api/v0/index/jobs/{job['id']}").json["content"]
+    assert job["progress"] == {"processed": 0, "total": 1}
@@ -1,6 +1,7 @@
 """Test user API."""
 
 from flux.db import Transaction
+from flux.db.sessions import revoke_sessions
 from flux.config import FluxConfig
 from flux.cli import cli
 from flux.app.app import app_factory
@@ -69,14 +70,65 @@ def test_user_api_workflow(patch_config):
     ] == {"volume": 50, "muted": True, "autoplay": True}
 
     # delete session
+    session_id = client.get_cookie(FluxConfig.SESSION_COOKIE_NAME).value
     # * logout
     assert client.delete("/api/v0/user/session").json["meta"]["ok"]
     # * not logged in
     assert (
         client.get("/api/v0/user/session").json["meta"]["error"]["code"] == 401
     )
+    # * old session is not valid anymore
+    client.set_cookie(FluxConfig.SESSION_COOKIE_NAME, session_id)
+    assert (
+        client.get("/api/v0/user/session").json["meta"]["error"]["code"] == 401
+    )
+    client.delete_cookie(FluxConfig.SESSION_COOKIE_NAME)
     # * not logged in
     assert (
         client.delete("/api/v0/user/session").json["meta"]["error"]["code"]
         == 401
     )
+
+
+def test_user_api_session_revoked_elsewhere(patch_config, login):
+    """
+    Test that sessions that are revoked by other processes (e.g., other
+    gunicorn-workers or the cli) are not accepted from the cache.
+    """
+    cli(["index", "create", "-i", str(FluxConfig.INDEX_LOCATION)])
+    client = app_factory().test_client()
+    login(client)
+    cli(["user", "promote", "-i", str(FluxConfig.INDEX_LOCATION), "user0"])
+    session_id = client.get_cookie(FluxConfig.SESSION_COOKIE_NAME).value
+
+    # session is cached
+    assert client.get("/api/v0/user/session").json["meta"]["ok"]
+    stats = client.get("/api/v0/user/session/cache").json["content"]
+    assert stats["size"] == 1
+    assert stats["hits"] > 0
+
+    # logout in another worker
+    with Transaction(
+        FluxConfig.INDEX_LOCATION / FluxConfig.INDEX_DB_FILE
+    ) as t:
+        t.cursor.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+    revoke_sessions(
+        FluxConfig.INDEX_LOCATION / FluxConfig.SESSIONS_REVISION_FILE
+    )
+    assert (
+        client.get("/api/v0/user/session").json["meta"]["error"]["code"] == 401
+    )
+
+    # user deleted via cli
+    assert client.post(
+        "/api/v0/user/session",
+        json={"content": {"username": "user0", "password": "password0"}},
+    ).json["meta"]["ok"]
+    assert client.get("/api/v0/user/session").json["meta"]["ok"]
+    cli(
+        ["user", "delete", "-i", str(FluxConfig.INDEX_LOCATION), "-y"]
+        + ["user0"]
+    )
+    assert (
+        client.get("/api/v0/user/session").json["meta"]["error"]["code"] == 401
+    )
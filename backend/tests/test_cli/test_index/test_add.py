@@ -1,8 +1,21 @@
 """Test subcommand `flux index add`."""
 
+import os
+import json
+import threading
+from collections import Counter
 from pathlib import Path
+from shutil import copy
+from uuid import uuid4
+from time import sleep
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
 
 from flux.cli import cli
+from flux.cli.index.add import AddToIndex, VideoFile
+from flux.cli.index.walk import scan, walk
+from flux.cli.index.devices import map_by_device
 from flux.config import FluxConfig
 from flux.db import Transaction
 
@@ -190,3 +203,517 @@ def test_index_add_auto(
         with Transaction(tmp_index / FluxConfig.INDEX_DB_FILE) as t:
             t.cursor.execute("SELECT * FROM records WHERE type = ?", (type_,))
         assert len(t.data) == 1, type_
+
+
+def test_index_add_jobs(
+    tmp_index: Path, tmp_movie: Path, tmp_series: Path, tmp_collection: Path
+):
+    """Test adding multiple targets to index with parallel jobs."""
+    cli(
+        [
+            "index",
+            "add",
+            "-i",
+            str(tmp_index),
+            "--jobs",
+            "4",
+            str(tmp_collection),
+            str(tmp_movie),
+            str(tmp_series),
+            str(tmp_movie),
+        ]
+    )
+
+    with Transaction(tmp_index / FluxConfig.INDEX_DB_FILE) as t:
+        t.cursor.execute("SELECT type FROM records ORDER BY type")
+    # duplicate targets are skipped
+    assert [row[0] for row in t.data] == [
+        "collection",
+        "movie",
+        "series",
+    ]
+
+    # videos are positioned in order of files
+    with Transaction(tmp_index / FluxConfig.INDEX_DB_FILE) as t:
+        t.cursor.execute(
+            """
+            SELECT videos.name, tracks.path
+            FROM
+                records
+                JOIN videos ON records.id = videos.record_id
+                JOIN tracks ON videos.id = tracks.video_id
+            WHERE records.type = 'collection'
+            ORDER BY videos.position
+            """
+        )
+    assert [row[1] for row in t.data] == sorted(
+        str(p) for p in tmp_collection.resolve().glob("**/*") if p.is_file()
+    )
+    assert [row[0] for row in t.data] == ["04", "01", "02", "03"]
+    with Transaction(tmp_index / FluxConfig.INDEX_DB_FILE) as t:
+        t.cursor.execute(
+            """
+            SELECT seasons.name, videos.name
+            FROM
+                videos
+                JOIN seasons ON seasons.id = videos.season_id
+            ORDER BY seasons.position, videos.position
+            """
+        )
+    assert t.data == [("s1", "e01"), ("s1", "e02"), ("s2", "e01")]
+
+    # every video has its thumbnail
+    with Transaction(tmp_index / FluxConfig.INDEX_DB_FILE) as t:
+        t.cursor.execute("SELECT path FROM thumbnails")
+    assert len(t.data) == 4 + 1 + 4
+    for row in t.data:
+        assert (tmp_index / FluxConfig.THUMBNAILS / row[0]).is_file()
+
+
+def test_index_add_probe_cache(
+    monkeypatch, tmp_index: Path, tmp_collection: Path
+):
+    """Test that ffprobe-results are reused when adding again."""
+    calls = []
+    get_metadata = AddToIndex.get_metadata
+
+    def _get_metadata(file):
+        calls.append(file)
+        return get_metadata(file)
+
+    monkeypatch.setattr(AddToIndex, "get_metadata", _get_metadata)
+
+    cli(
+        [
+            "index",
+            "add",
+            "-i",
+            str(tmp_index),
+            "--dry-run",
+            str(tmp_collection),
+        ]
+    )
+    assert len(calls) == 4
+    assert (tmp_index / FluxConfig.PROBE_CACHE_FILE).is_file()
+
+    cli(["index", "add", "-i", str(tmp_index), str(tmp_collection)])
+    assert len(calls) == 4
+    with Transaction(tmp_index / FluxConfig.INDEX_DB_FILE) as t:
+        t.cursor.execute("SELECT COUNT(*) FROM tracks")
+    assert t.data == [(4,)]
+
+
+
+def test_index_add_progress(
+    capsys, tmp_index: Path, tmp_movie: Path, tmp_series: Path
+):
+    """Test machine-readable progress of `flux index add`."""
+    cli(
+        [
+            "index",
+            "add",
+            "-i",
+            str(tmp_index),
+            "--progress",
+            "json",
+            str(tmp_movie),
+            str(tmp_series),
+        ]
+    )
+
+    events = [
+        json.loads(line) for line in capsys.readouterr().out.splitlines()
+    ]
+    files = [event for event in events if event["event"] == "file"]
+    assert sorted(event["path"] for event in files) == sorted(
+        [str(tmp_movie.resolve())]
+        + [str(p) for p in tmp_series.resolve().glob("**/*") if p.is_file()]
+    )
+    for event in files:
+        assert event["outcome"] == "added"
+        assert event["bytes"] > 0
+        assert "probe_ms" in event and "thumbnail_ms" in event
+
+    assert events[-1]["event"] == "summary"
+    assert events[-1]["files"] == events[-1]["total"] == 5
+    assert set(events[-1]["stages"]) == {
+        "inspect",
+        "probe",
+        "thumbnail",
+        "write",
+    }
+    assert events[-1]["stages"]["probe"]["count"] == 5
+
+
+def test_index_add_manifest(
+    monkeypatch, tmp: Path, tmp_index: Path, tmp_series: Path, fixtures: Path
+):
+    """Test adding records from a manifest (without probing)."""
+
+    def fail(*args, **kwargs):
+        raise AssertionError("File has been probed.")
+
+    monkeypatch.setattr(AddToIndex, "is_video_file", fail)
+    monkeypatch.setattr(AddToIndex, "get_metadata", fail)
+
+    series = tmp_series.resolve()
+    # actual duration of the fixture (thumbnails are generated at 10%)
+    metadata = {
+        "format": {"duration": "1.0", "format_name": "mp4"},
+        "streams": [{"codec_type": "video", "codec_name": "h264"}],
+    }
+    thumbnail = tmp / f"{uuid4()}.png"
+    thumbnail.write_bytes(b"thumbnail")
+    manifest = tmp / f"{uuid4()}.jsonl"
+    manifest.write_text(
+        "\n".join(
+            [
+                json.dumps(
+                    {
+                        "type": "series",
+                        "path": str(series),
+                        "name": "manifest series",
+                        "thumbnail": str(thumbnail),
+                        "videos": [
+                            {
+                                "path": str(series / "s2" / "e01.mp4"),
+                                "season": "s2",
+                                "name": "episode",
+                                "thumbnail": str(thumbnail),
+                                "metadata": metadata,
+                            },
+                            {
+                                "path": str(series / "s1" / "e01.mp4"),
+                                "season": "s1",
+                                "metadata": metadata,
+                            },
+                            {
+                                "path": str(series / "a.mp4"),
+                                "metadata": metadata,
+                            },
+                            {
+                                "path": str(series / "missing.mp4"),
+                                "metadata": metadata,
+                            },
+                        ],
+                    }
+                ),
+                "",
+                "not json",
+                json.dumps({"type": "movie", "path": str(series / "a.mp4")}),
+                json.dumps(
+                    {
+                        "type": "movie",
+                        "path": str(series / "a.mp4"),
+                        "videos": [
+                            {
+                                "path": str(series / "a.mp4"),
+                                "thumbnail": str(tmp / "missing.png"),
+                                "metadata": metadata,
+                            }
+                        ],
+                    }
+                ),
+            ]
+        ),
+        encoding="utf-8",
+    )
+
+    # dry-run
+    cli(
+        ["index", "add", "-i", str(tmp_index), "--manifest", str(manifest)]
+        + ["--dry-run"]
+    )
+    with Transaction(tmp_index / FluxConfig.INDEX_DB_FILE) as t:
+        t.cursor.execute("SELECT COUNT(*) FROM records")
+    assert t.data == [(0,)]
+
+    cli(["index", "add", "-i", str(tmp_index), "--manifest", str(manifest)])
+
+    with Transaction(tmp_index / FluxConfig.INDEX_DB_FILE) as t:
+        t.cursor.execute(
+            "SELECT type, name, path, thumbnail_id FROM records ORDER BY type"
+        )
+    assert [row[:3] for row in t.data] == [
+        ("movie", "a", str(series / "a.mp4")),
+        ("series", "manifest series", str(series)),
+    ]
+    with Transaction(tmp_index / FluxConfig.INDEX_DB_FILE) as t:
+        t.cursor.execute(
+            """
+            SELECT seasons.name, seasons.position, videos.name,
+                videos.position, tracks.duration, tracks.codec_name,
+                tracks.size IS NOT NULL
+            FROM
+                records
+                JOIN videos ON videos.record_id = records.id
+                JOIN tracks ON tracks.video_id = videos.id
+                LEFT JOIN seasons ON seasons.id = videos.season_id
+            WHERE records.type = 'series'
+            ORDER BY videos.name
+            """
+        )
+    # seasons in order of appearance, missing files are skipped
+    assert t.data == [
+        (None, None, "a", 0, 1.0, "h264", 1),
+        ("s1", 1, "e01", 0, 1.0, "h264", 1),
+        ("s2", 0, "episode", 0, 1.0, "h264", 1),
+    ]
+
+    # every thumbnail exists (copied or generated)
+    with Transaction(tmp_index / FluxConfig.INDEX_DB_FILE) as t:
+        t.cursor.execute("SELECT path FROM thumbnails")
+    assert len(t.data) == 1 + 3 + 1
+    for row in t.data:
+        assert (tmp_index / FluxConfig.THUMBNAILS / row[0]).is_file()
+    assert sum(row[0].endswith(".png") for row in t.data) == 2
+
+
+def test_index_add_generate_thumbnail(tmp: Path, fixtures: Path):
+    """
+    Test generating a thumbnail with a position beyond the end of the
+    video (e.g. from inaccurate metadata).
+    """
+    video = VideoFile(
+        fixtures / "sample.mp4",
+        "sample",
+        {"format": {"duration": "100.0"}, "streams": []},
+    )
+    destination = tmp / f"{uuid4()}.jpg"
+    assert AddToIndex.generate_thumbnail(video, destination)
+    assert destination.is_file()
+
+
+def test_index_add_is_video_file(tmp: Path, fixtures: Path):
+    """Test classification of video files."""
+    directory = tmp / str(uuid4())
+    directory.mkdir()
+    # extension fast-path (file is not read)
+    (directory / "a.mkv").touch()
+    (directory / "a.srt").write_bytes((fixtures / "sample.mp4").read_bytes())
+    assert AddToIndex.is_video_file(directory / "a.mkv")
+    assert not AddToIndex.is_video_file(directory / "a.srt")
+    # file signature
+    copy(fixtures / "sample.mp4", directory / "a")
+    (directory / "b").write_text("text", encoding="utf-8")
+    assert AddToIndex.is_video_file(directory / "a")
+    assert not AddToIndex.is_video_file(directory / "b")
+
+
+def test_index_add_fingerprints(tmp: Path, tmp_index: Path, fixtures: Path):
+    """Test detection of indexed and moved files by their content."""
+    series = (tmp / str(uuid4())).resolve()
+    for i, path in enumerate(["s1/e01.mp4", "s1/e02.mp4", "a.mp4"]):
+        (series / path).parent.mkdir(parents=True, exist_ok=True)
+        (series / path).write_bytes(
+            (fixtures / "sample.mp4").read_bytes() + bytes(i)
+        )
+
+    def get_tracks():
+        with Transaction(tmp_index / FluxConfig.INDEX_DB_FILE) as t:
+            t.cursor.execute(
+                "SELECT id, path, fingerprint FROM tracks ORDER BY path"
+            )
+        return t.data
+
+    cli(["index", "add", "-i", str(tmp_index), str(series)])
+    before = get_tracks()
+    assert len(before) == 3
+    assert len({row[2] for row in before}) == 3
+
+    # adding again does not create duplicates
+    cli(["index", "add", "-i", str(tmp_index), str(series)])
+    assert get_tracks() == before
+
+    # moved files are updated in place
+    moved = series.parent / str(uuid4())
+    series.rename(moved)
+    cli(["index", "add", "-i", str(tmp_index), str(moved)])
+    assert get_tracks() == [
+        (id_, str(moved / Path(path).relative_to(series)), fingerprint)
+        for id_, path, fingerprint in before
+    ]
+    with Transaction(tmp_index / FluxConfig.INDEX_DB_FILE) as t:
+        t.cursor.execute("SELECT path FROM records")
+    assert t.data == [(str(moved),)]
+
+
+def test_index_add_walk(tmp: Path):
+    """Test directory traversal (same order as sorted glob)."""
+    directory = tmp / str(uuid4())
+    for file in ["a/b", "a/c/d", "a-c", "a.txt", "b", "c/e"]:
+        (directory / file).parent.mkdir(parents=True, exist_ok=True)
+        (directory / file).touch()
+    (directory / "link").symlink_to("a")
+
+    assert list(walk(directory, recursive=True)) == sorted(
+        filter(lambda p: p.is_file(), directory.glob("**/*")), key=str
+    )
+    assert scan(directory) == (
+        [directory / "a-c", directory / "a.txt", directory / "b"],
+        [directory / "a", directory / "c", directory / "link"],
+    )
+    assert list(walk(directory / "a", directories=True)) == [
+        directory / "a" / "c"
+    ]
+    assert list(walk(directory / "missing")) == []
+
+
+def test_index_add_map_by_device(monkeypatch):
+    """Test scheduling of file-operations per device."""
+    monkeypatch.setattr(FluxConfig, "JOBS_PER_DEVICE", 1)
+    # items as tuples of device and inode
+    items = [(1, 3), (2, 2), (1, 1), (2, 1), (1, 2), (None, None)]
+    stats = [
+        (
+            None
+            if device is None
+            else os.stat_result((0, inode, device, 0, 0, 0, 0, 0, 0, 0))
+        )
+        for device, inode in items
+    ]
+    lock = threading.Lock()
+    active = Counter()
+    order = []
+
+    def func(item):
+        with lock:
+            active[item[0]] += 1
+            order.append(item)
+            # at most one job per device
+            assert item[0] is None or active[item[0]] == 1
+        sleep(0.01)
+        with lock:
+            active[item[0]] -= 1
+        return item
+
+    # sequential
+    assert map_by_device(None, func, items, stats) == items
+    assert [item for item in order if item[0] == 1] == [(1, 1), (1, 2), (1, 3)]
+
+    # parallel
+    order.clear()
+    with ThreadPoolExecutor(4) as executor:
+        assert map_by_device(executor, func, items, stats) == items
+    assert [item for item in order if item[0] == 1] == [(1, 1), (1, 2), (1, 3)]
+    assert [item for item in order if item[0] == 2] == [(2, 1), (2, 2)]
+    # devices are processed in parallel
+    assert {item[0] for item in order[:3]} == {1, 2, None}
+
+
+def test_index_add_map_by_device_concurrent(monkeypatch):
+    """
+    Test that limits per device apply across concurrent calls of
+    `map_by_device` (e.g. for targets that are processed concurrently).
+    """
+    monkeypatch.setattr(FluxConfig, "JOBS_PER_DEVICE", 1)
+    stats = [
+        os.stat_result((0, inode, 1, 0, 0, 0, 0, 0, 0, 0))
+        for inode in range(4)
+    ]
+    lock = threading.Lock()
+    active = Counter()
+    maximum = Counter()
+
+    def func(item):
+        with lock:
+            active[item] += 1
+            maximum[item] = max(maximum[item], active[item])
+        sleep(0.01)
+        with lock:
+            active[item] -= 1
+        return item
+
+    with ThreadPoolExecutor(4) as executor, ThreadPoolExecutor(
+        4
+    ) as target_executor:
+        assert list(
+            target_executor.map(
+                lambda _: map_by_device(executor, func, [1] * 4, stats),
+                range(4),
+            )
+        ) == [[1] * 4] * 4
+    # at most one job on the device at a time
+    assert maximum[1] == 1
+
+
+def test_index_add_resume(
+    monkeypatch, tmp_index: Path, tmp_collection: Path
+):
+    """Test resuming an interrupted import."""
+    monkeypatch.setattr(FluxConfig, "IMPORT_BATCH_SIZE", 1)
+    monkeypatch.setattr(FluxConfig, "DB_WRITE_CHUNK_ROWS", 1)
+    calls = []
+    process_video_file = AddToIndex.process_video_file
+
+    def interrupted_process_video_file(file, *args, **kwargs):
+        calls.append(file)
+        if len(calls) > 2:
+            raise KeyboardInterrupt()
+        return process_video_file(file, *args, **kwargs)
+
+    monkeypatch.setattr(
+        AddToIndex, "process_video_file", interrupted_process_video_file
+    )
+    with pytest.raises(KeyboardInterrupt):
+        cli(["index", "add", "-i", str(tmp_index), str(tmp_collection)])
+
+    # progress after two files
+    with Transaction(tmp_index / FluxConfig.INDEX_DB_FILE) as t:
+        t.cursor.execute("SELECT processed FROM imports")
+    assert t.data == [(2,)]
+
+    # interrupted import is not added again
+    monkeypatch.setattr(AddToIndex, "process_video_file", process_video_file)
+    cli(["index", "add", "-i", str(tmp_index), str(tmp_collection)])
+    with Transaction(tmp_index / FluxConfig.INDEX_DB_FILE) as t:
+        t.cursor.execute("SELECT COUNT(*) FROM records")
+    assert t.data == [(1,)]
+
+    # resume
+    cli(["index", "add", "-i", str(tmp_index), "--resume"])
+    with Transaction(tmp_index / FluxConfig.INDEX_DB_FILE) as t:
+        t.cursor.execute("SELECT name FROM videos ORDER BY position")
+    assert [row[0] for row in t.data] == ["04", "01", "02", "03"]
+    with Transaction(tmp_index / FluxConfig.INDEX_DB_FILE) as t:
+        t.cursor.execute("SELECT COUNT(*) FROM imports")
+    assert t.data == [(0,)]
+    with Transaction(tmp_index / FluxConfig.INDEX_DB_FILE) as t:
+        t.cursor.execute("SELECT path FROM thumbnails")
+    assert len(t.data) == 4
+    for row in t.data:
+        assert (tmp_index / FluxConfig.THUMBNAILS / row[0]).is_file()
+
+
+def test_index_add_resume_thumbnails(
+    monkeypatch, tmp_index: Path, tmp_collection: Path
+):
+    """
+    Test that rows are written after every batch of an import (not only
+    once a chunk is complete) so that all thumbnails are recorded.
+    """
+    monkeypatch.setattr(FluxConfig, "IMPORT_BATCH_SIZE", 2)
+    calls = []
+    process_video_file = AddToIndex.process_video_file
+
+    def interrupted_process_video_file(file, *args, **kwargs):
+        calls.append(file)
+        if len(calls) > 2:
+            raise KeyboardInterrupt()
+        return process_video_file(file, *args, **kwargs)
+
+    monkeypatch.setattr(
+        AddToIndex, "process_video_file", interrupted_process_video_file
+    )
+    with pytest.raises(KeyboardInterrupt):
+        cli(["index", "add", "-i", str(tmp_index), str(tmp_collection)])
+
+    with Transaction(tmp_index / FluxConfig.INDEX_DB_FILE) as t:
+        t.cursor.execute("SELECT processed FROM imports")
+        processed = t.cursor.fetchall()
+        t.cursor.execute("SELECT path FROM thumbnails")
+    assert processed == [(2,)]
+    assert sorted(row[0] for row in t.data) == sorted(
+        p.name for p in (tmp_index / FluxConfig.THUMBNAILS).iterdir()
+    )
+    assert len(t.data) == 2
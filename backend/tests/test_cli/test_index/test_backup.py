@@ -0,0 +1,127 @@
+"""Test subcommands `flux index backup` and `flux index restore`."""
+
+import sqlite3
+import threading
+from time import sleep, perf_counter
+from pathlib import Path
+from shutil import rmtree
+from uuid import uuid4
+
+from flux.cli import cli
+from flux.config import FluxConfig
+from flux.db import Transaction
+from flux.cli.index.backup import BackupIndex, snapshot
+
+
+def get_records(index: Path) -> list:
+    """Returns list of record-ids and names."""
+    with Transaction(index / FluxConfig.INDEX_DB_FILE, readonly=True) as t:
+        t.cursor.execute("SELECT id, name FROM records ORDER BY id")
+    return t.data
+
+
+def get_thumbnails(index: Path) -> set:
+    """Returns set of thumbnail filenames."""
+    return {p.name for p in (index / FluxConfig.THUMBNAILS).glob("*")}
+
+
+def test_index_backup_restore(
+    tmp: Path, tmp_index: Path, tmp_series: Path, tmp_movie: Path
+):
+    """Test creating and restoring backups."""
+    backup = tmp / str(uuid4())
+    cli(["index", "add", "-i", str(tmp_index), str(tmp_series)])
+    records = get_records(tmp_index)
+    thumbnails = get_thumbnails(tmp_index)
+    assert len(thumbnails) > 0
+
+    cli(["index", "backup", "-i", str(tmp_index), str(backup)])
+    assert get_records(backup) == records
+    assert get_thumbnails(backup) == thumbnails
+    assert not (backup / "index.db.partial").exists()
+
+    # incremental (only new or modified thumbnails are copied)
+    (backup / FluxConfig.THUMBNAILS / sorted(thumbnails)[0]).unlink()
+    cli(["index", "add", "-i", str(tmp_index), str(tmp_movie)])
+    assert BackupIndex.backup(tmp_index, backup) == (
+        len(get_thumbnails(tmp_index)) - len(thumbnails) + 1
+    )
+    assert get_records(backup) == get_records(tmp_index)
+    assert get_thumbnails(backup) == get_thumbnails(tmp_index)
+    assert BackupIndex.backup(tmp_index, backup) == 0
+
+    # destination wiped
+    rmtree(backup / FluxConfig.THUMBNAILS)
+    assert BackupIndex.backup(tmp_index, backup) == len(
+        get_thumbnails(tmp_index)
+    )
+    assert get_thumbnails(backup) == get_thumbnails(tmp_index)
+
+    # full
+    cli(["index", "backup", "-i", str(tmp_index), "--full", str(backup)])
+    assert get_thumbnails(backup) == get_thumbnails(tmp_index)
+    assert BackupIndex.backup(tmp_index, backup, full=True) == len(
+        get_thumbnails(tmp_index)
+    )
+
+    # restore into existing index
+    cli(["index", "rm", "-i", str(tmp_index), records[0][0]])
+    (tmp_index / FluxConfig.THUMBNAILS / sorted(thumbnails)[0]).unlink()
+    cli(["index", "restore", "-i", str(tmp_index), str(backup)])
+    assert get_records(tmp_index) == get_records(backup)
+    assert get_thumbnails(tmp_index) == get_thumbnails(backup)
+
+    # restore into new index
+    index = tmp / str(uuid4())
+    cli(["index", "restore", "-i", str(index), str(backup)])
+    assert get_records(index) == get_records(backup)
+    assert get_thumbnails(index) == get_thumbnails(backup)
+
+
+def test_index_backup_snapshot(tmp: Path):
+    """
+    Test that snapshots are paced and are neither blocking nor
+    restarted by concurrent writes.
+    """
+    source = tmp / f"{uuid4()}.db"
+    target = tmp / f"{uuid4()}.db"
+    connection = sqlite3.connect(source, isolation_level=None)
+    connection.execute("PRAGMA journal_mode = WAL")
+    connection.execute("CREATE TABLE data (value BLOB)")
+    connection.executemany(
+        "INSERT INTO data VALUES (randomblob(4096))", [()] * 100
+    )
+    connection.close()
+
+    stop = threading.Event()
+    # times of committed writes
+    writes = []
+
+    def write():
+        connection = sqlite3.connect(source, isolation_level=None)
+        while not stop.is_set():
+            connection.execute("INSERT INTO data VALUES (randomblob(16))")
+            writes.append(perf_counter())
+            sleep(0.001)
+        connection.close()
+
+    writer = threading.Thread(target=write)
+    writer.start()
+    try:
+        start = perf_counter()
+        steps = snapshot(source, target, pages=10, sleep=0.01)
+        end = perf_counter()
+    finally:
+        stop.set()
+        writer.join()
+
+    # paced and not restarted
+    connection = sqlite3.connect(target)
+    assert connection.execute("PRAGMA integrity_check").fetchone() == ("ok",)
+    pages = connection.execute("PRAGMA page_count").fetchone()[0]
+    assert steps == (pages + 9) // 10
+    assert end - start >= (steps - 1) * 0.01
+    # writes have been committed while the snapshot was taken
+    assert len([t for t in writes if start < t < end]) > steps
+    assert connection.execute("SELECT COUNT(*) FROM data").fetchone()[0] >= 100
+    connection.close()
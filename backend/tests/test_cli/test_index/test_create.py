@@ -23,6 +23,11 @@ def test_create_index(tmp: Path):
     # schema-version
     assert (version("flux"), None) in t.data
 
+    # journal mode
+    with Transaction(index / FluxConfig.INDEX_DB_FILE, readonly=True) as t:
+        t.cursor.execute("PRAGMA journal_mode")
+    assert t.data[0][0].lower() == FluxConfig.DB_JOURNAL_MODE.lower()
+
 
 def test_fixture_tmp_index(tmp_index: Path):
     """Test fixture for pre-initialized index."""
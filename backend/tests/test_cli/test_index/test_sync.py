@@ -0,0 +1,209 @@
+"""Test subcommand `flux index sync`."""
+
+import sqlite3
+from pathlib import Path
+from shutil import copy, copytree
+from uuid import uuid4
+
+from flux.cli import cli
+from flux.cli.index.add import AddToIndex
+from flux.config import FluxConfig
+from flux.db import Transaction
+
+
+def get_state(index: Path) -> dict:
+    """Returns mapping of track paths to video-info."""
+    with Transaction(index / FluxConfig.INDEX_DB_FILE, readonly=True) as t:
+        t.cursor.execute(
+            """
+            SELECT tracks.path, videos.id, seasons.name, videos.position,
+                tracks.available
+            FROM tracks
+            JOIN videos ON videos.id = tracks.video_id
+            LEFT JOIN seasons ON seasons.id = videos.season_id
+            """
+        )
+    return {row[0]: row[1:] for row in t.data}
+
+
+def test_index_sync_series(
+    tmp: Path, tmp_index: Path, tmp_series: Path, fixtures: Path
+):
+    """Test synchronizing a series with the filesystem."""
+    series = (tmp / str(uuid4())).resolve()
+    copytree(tmp_series, series)
+    cli(["index", "add", "-i", str(tmp_index), str(series)])
+    before = get_state(tmp_index)
+
+    # unchanged
+    cli(["index", "sync", "-i", str(tmp_index)])
+    assert get_state(tmp_index) == before
+
+    # modify filesystem (new files with different content)
+    for i, path in enumerate(["s1/e00.mp4", "s3/e01.mp4"]):
+        (series / path).parent.mkdir(exist_ok=True)
+        (series / path).write_bytes(
+            (fixtures / "sample.mp4").read_bytes() + bytes(i + 1)
+        )
+    (series / "s2" / "e01.mp4").unlink()
+    (series / "a.mp4").rename(series / "b.mp4")
+    with open(series / "s1" / "e02.mp4", "ab") as f:
+        f.write(b"\x00")
+
+    # dry-run
+    cli(["index", "sync", "-i", str(tmp_index), "--dry-run"])
+    assert get_state(tmp_index) == before
+
+    cli(["index", "sync", "-v", "-i", str(tmp_index)])
+    after = get_state(tmp_index)
+
+    # existing videos are kept (positions follow file names)
+    for path in ["s1/e01.mp4", "s1/e02.mp4", "s2/e01.mp4"]:
+        assert after[str(series / path)][0] == before[str(series / path)][0]
+    assert after[str(series / "s1" / "e01.mp4")][1:] == ("s1", 1, 1)
+    # changed video
+    assert after[str(series / "s1" / "e02.mp4")][1:] == ("s1", 2, 1)
+    # new videos
+    assert after[str(series / "s1" / "e00.mp4")][1:] == ("s1", 0, 1)
+    assert after[str(series / "s3" / "e01.mp4")][1:] == ("s3", 0, 1)
+    # missing video
+    assert after[str(series / "s2" / "e01.mp4")][1:] == ("s2", 0, 0)
+    # moved video
+    assert str(series / "a.mp4") not in after
+    assert after[str(series / "b.mp4")] == (
+        before[str(series / "a.mp4")][0],
+        None,
+        0,
+        1,
+    )
+
+    # new season and thumbnails
+    with Transaction(tmp_index / FluxConfig.INDEX_DB_FILE) as t:
+        t.cursor.execute("SELECT name, position FROM seasons ORDER BY name")
+    assert t.data == [("s1", 0), ("s2", 1), ("s3", 2)]
+    with Transaction(tmp_index / FluxConfig.INDEX_DB_FILE) as t:
+        t.cursor.execute("SELECT path FROM thumbnails")
+    assert len(t.data) == 6
+    for row in t.data:
+        assert (tmp_index / FluxConfig.THUMBNAILS / row[0]).is_file()
+
+    # file reappears
+    copy(fixtures / "sample.mp4", series / "s2" / "e01.mp4")
+    cli(["index", "sync", "-i", str(tmp_index)])
+    assert get_state(tmp_index)[str(series / "s2" / "e01.mp4")][1:] == (
+        "s2",
+        0,
+        1,
+    )
+
+
+def test_index_sync_season_positions(
+    tmp: Path, tmp_index: Path, fixtures: Path
+):
+    """
+    Test that seasons are positioned like in `flux index add` (by
+    directory, e.g. 's1 extra/' before 's1/').
+    """
+    series = (tmp / str(uuid4())).resolve()
+    for path in ["s1/e01.mp4", "s1 extra/e01.mp4"]:
+        (series / path).parent.mkdir(parents=True, exist_ok=True)
+        copy(fixtures / "sample.mp4", series / path)
+    cli(["index", "add", "-i", str(tmp_index), str(series)])
+
+    def get_seasons():
+        with Transaction(tmp_index / FluxConfig.INDEX_DB_FILE) as t:
+            t.cursor.execute(
+                "SELECT name, position FROM seasons ORDER BY position"
+            )
+        return t.data
+
+    assert get_seasons() == [("s1 extra", 0), ("s1", 1)]
+
+    # new season
+    (series / "s0").mkdir()
+    copy(fixtures / "sample.mp4", series / "s0" / "e01.mp4")
+    cli(["index", "sync", "-i", str(tmp_index)])
+    assert get_seasons() == [("s0", 0), ("s1 extra", 1), ("s1", 2)]
+
+
+def test_index_sync_movie(tmp: Path, tmp_index: Path, tmp_movie: Path):
+    """Test synchronizing a movie with the filesystem."""
+    movie = (tmp / f"{uuid4()}.mp4").resolve()
+    copy(tmp_movie, movie)
+    cli(["index", "add", "-i", str(tmp_index), str(movie)])
+    movie.unlink()
+
+    cli(["index", "sync", "-i", str(tmp_index)])
+    assert get_state(tmp_index)[str(movie)][3] == 0
+
+
+def test_index_sync_fingerprints(tmp: Path, tmp_index: Path, fixtures: Path):
+    """Test detecting moved files by their content."""
+    collection = (tmp / str(uuid4())).resolve()
+    collection.mkdir()
+    for i in range(2):
+        (collection / f"{i}.mp4").write_bytes(
+            (fixtures / "sample.mp4").read_bytes() + bytes(i)
+        )
+    cli(["index", "add", "-i", str(tmp_index), str(collection)])
+    before = get_state(tmp_index)
+
+    # missing fingerprints are filled
+    with Transaction(tmp_index / FluxConfig.INDEX_DB_FILE) as t:
+        t.cursor.execute("SELECT fingerprint FROM tracks ORDER BY path")
+        fingerprints = t.cursor.fetchall()
+        t.cursor.execute("UPDATE tracks SET fingerprint = NULL")
+    cli(["index", "sync", "-i", str(tmp_index)])
+    with Transaction(tmp_index / FluxConfig.INDEX_DB_FILE) as t:
+        t.cursor.execute("SELECT fingerprint FROM tracks ORDER BY path")
+    assert t.data == fingerprints
+
+    # copied and deleted (new file identity)
+    (collection / "a").mkdir()
+    copy(collection / "0.mp4", collection / "a" / "2.mp4")
+    (collection / "0.mp4").unlink()
+    cli(["index", "sync", "-i", str(tmp_index)])
+    after = get_state(tmp_index)
+    assert str(collection / "0.mp4") not in after
+    assert (
+        after[str(collection / "a" / "2.mp4")][0]
+        == before[str(collection / "0.mp4")][0]
+    )
+    assert len(after) == 2
+
+
+def test_index_sync_no_transaction_while_probing(
+    monkeypatch, tmp: Path, tmp_index: Path, tmp_series: Path, fixtures: Path
+):
+    """
+    Test that files are probed without holding a read-transaction (which
+    would prevent checkpoints of the WAL).
+    """
+    series = (tmp / str(uuid4())).resolve()
+    copytree(tmp_series, series)
+    cli(["index", "add", "-i", str(tmp_index), str(series)])
+    (series / "s1" / "e00.mp4").write_bytes(
+        (fixtures / "sample.mp4").read_bytes() + b"\x01"
+    )
+
+    index_db = tmp_index / FluxConfig.INDEX_DB_FILE
+    checkpoints = []
+    get_metadata = AddToIndex.get_metadata
+
+    def _get_metadata(file):
+        with Transaction(index_db) as t:
+            t.cursor.execute("UPDATE records SET name = name")
+        connection = sqlite3.connect(index_db)
+        try:
+            checkpoints.append(
+                connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+                .fetchone()[0]
+            )
+        finally:
+            connection.close()
+        return get_metadata(file)
+
+    monkeypatch.setattr(AddToIndex, "get_metadata", _get_metadata)
+    cli(["index", "sync", "-i", str(tmp_index)])
+    # not blocked by readers
+    assert checkpoints == [0]
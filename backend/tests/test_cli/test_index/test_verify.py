@@ -0,0 +1,130 @@
+"""Test subcommand `flux index verify`."""
+
+import json
+from pathlib import Path
+from uuid import uuid4
+
+from flux.cli import cli
+from flux.config import FluxConfig
+from flux.db import Transaction
+
+
+def get_availability(index: Path) -> dict:
+    """Returns mapping of track paths to availability."""
+    with Transaction(index / FluxConfig.INDEX_DB_FILE, readonly=True) as t:
+        t.cursor.execute("SELECT path, available FROM tracks")
+    return dict(t.data)
+
+
+def verify(capsys, index: Path, *args: str) -> tuple[dict, dict]:
+    """
+    Runs `flux index verify` and returns the reported tracks (mapping
+    of paths to reports) and the summary.
+    """
+    try:
+        cli(["index", "verify", "-i", str(index), *args])
+    except SystemExit as exc_info:
+        assert exc_info.code == 1
+    events = [
+        json.loads(line) for line in capsys.readouterr().out.splitlines()
+    ]
+    assert events[-1]["event"] == "summary"
+    return {
+        event["path"]: event for event in events if event["event"] == "track"
+    }, events[-1]
+
+
+def test_index_verify(capsys, tmp: Path, tmp_index: Path, fixtures: Path):
+    """Test verifying indexed files."""
+    collection = (tmp / str(uuid4())).resolve()
+    collection.mkdir()
+    data = (fixtures / "sample.mp4").read_bytes()
+    for i in range(4):
+        (collection / f"{i}.mp4").write_bytes(data + bytes(i))
+    cli(["index", "add", "-i", str(tmp_index), str(collection)])
+    capsys.readouterr()
+
+    # everything ok
+    cli(["index", "verify", "-i", str(tmp_index)])
+    events = [
+        json.loads(line) for line in capsys.readouterr().out.splitlines()
+    ]
+    assert len(events) == 1
+    assert events[0]["tracks"] == 4
+    assert events[0]["ok"] == 4
+
+    # modify files (missing, resized, and changed with same size)
+    (collection / "0.mp4").unlink()
+    (collection / "1.mp4").write_bytes(data)
+    (collection / "2.mp4").write_bytes(data + b"ab")
+
+    tracks, summary = verify(capsys, tmp_index)
+    assert set(tracks) == {
+        str(collection / "0.mp4"),
+        str(collection / "1.mp4"),
+    }
+    assert tracks[str(collection / "0.mp4")]["status"] == "missing"
+    assert tracks[str(collection / "0.mp4")]["actual_size"] is None
+    assert tracks[str(collection / "1.mp4")]["status"] == "resized"
+    assert tracks[str(collection / "1.mp4")]["size"] == len(data) + 1
+    assert tracks[str(collection / "1.mp4")]["actual_size"] == len(data)
+    assert not tracks[str(collection / "1.mp4")]["marked"]
+    assert summary["ok"] == 2
+    assert summary["marked"] == 0
+    assert set(get_availability(tmp_index).values()) == {1}
+
+    # with fingerprints and marking
+    tracks, summary = verify(
+        capsys, tmp_index, "--fingerprint", "--mark", "-j", "2"
+    )
+    assert tracks[str(collection / "2.mp4")]["status"] == "changed"
+    assert all(track["marked"] for track in tracks.values())
+    assert summary["ok"] == 1
+    assert summary["marked"] == 3
+    assert get_availability(tmp_index) == {
+        str(collection / "0.mp4"): 0,
+        str(collection / "1.mp4"): 0,
+        str(collection / "2.mp4"): 0,
+        str(collection / "3.mp4"): 1,
+    }
+
+    # restored files are marked as available again
+    for i in range(3):
+        (collection / f"{i}.mp4").write_bytes(data + bytes(i))
+    tracks, summary = verify(capsys, tmp_index, "--fingerprint", "--mark")
+    assert len(tracks) == 3
+    assert all(
+        track["status"] == "ok" and track["marked"]
+        for track in tracks.values()
+    )
+    assert summary["ok"] == 4
+    assert set(get_availability(tmp_index).values()) == {1}
+
+
+def test_index_verify_target(
+    capsys, tmp: Path, tmp_index: Path, fixtures: Path
+):
+    """Test verifying only selected records."""
+    movies = []
+    for i in range(2):
+        movies.append((tmp / f"{uuid4()}.mp4").resolve())
+        movies[-1].write_bytes(
+            (fixtures / "sample.mp4").read_bytes() + bytes(i)
+        )
+        cli(["index", "add", "-i", str(tmp_index), str(movies[-1])])
+        movies[-1].unlink()
+    with Transaction(
+        tmp_index / FluxConfig.INDEX_DB_FILE, readonly=True
+    ) as t:
+        t.cursor.execute(
+            "SELECT id FROM records WHERE path = ?", (str(movies[0]),)
+        )
+    capsys.readouterr()
+
+    tracks, summary = verify(capsys, tmp_index, "--mark", t.data[0][0])
+    assert list(tracks) == [str(movies[0])]
+    assert summary["tracks"] == 1
+    assert get_availability(tmp_index) == {
+        str(movies[0]): 0,
+        str(movies[1]): 1,
+    }
@@ -0,0 +1,146 @@
+"""Test subcommand `flux index watch`."""
+
+from pathlib import Path
+from shutil import copy, copytree
+from threading import Thread, Event
+from time import sleep
+from uuid import uuid4
+
+from flux.cli import cli
+from flux.cli.index.inotify import Inotify
+from flux.cli.index.sync import SyncIndex
+from flux.cli.index.watch import WatchIndex, Watcher
+from flux.config import FluxConfig
+from flux.db import Transaction
+
+
+def get_paths(index: Path) -> dict[str, int]:
+    """Returns availability of tracks by path."""
+    with Transaction(index / FluxConfig.INDEX_DB_FILE, readonly=True) as t:
+        t.cursor.execute("SELECT path, available FROM tracks")
+    return dict(t.data)
+
+
+def wait_for(condition, timeout: float = 10) -> bool:
+    """Returns whether `condition` is met within `timeout` seconds."""
+    for _ in range(int(timeout / 0.1)):
+        if condition():
+            return True
+        sleep(0.1)
+    return False
+
+
+def test_index_watch(
+    tmp: Path, tmp_index: Path, tmp_collection: Path, fixtures: Path
+):
+    """Test watching a collection for changes."""
+    collection = (tmp / str(uuid4())).resolve()
+    copytree(tmp_collection, collection)
+    cli(["index", "add", "-i", str(tmp_index), str(collection)])
+    assert len(get_paths(tmp_index)) == 4
+
+    stop = Event()
+    ready = Event()
+    watcher = Thread(
+        target=WatchIndex.watch,
+        args=(tmp_index,),
+        kwargs={"debounce": 0.2, "stop": stop, "ready": ready},
+    )
+    watcher.start()
+    try:
+        assert ready.wait(10)
+
+        # new file in existing directory
+        copy(fixtures / "sample.mp4", collection / "a" / "05.mp4")
+        assert wait_for(
+            lambda: str(collection / "a" / "05.mp4") in get_paths(tmp_index)
+        )
+
+        # new directory
+        (collection / "c" / "y").mkdir(parents=True)
+        copy(fixtures / "sample.mp4", collection / "c" / "y" / "06.mp4")
+        assert wait_for(
+            lambda: str(collection / "c" / "y" / "06.mp4")
+            in get_paths(tmp_index)
+        )
+
+        # removed file
+        (collection / "04.mp4").unlink()
+        assert wait_for(
+            lambda: get_paths(tmp_index)[str(collection / "04.mp4")] == 0
+        )
+    finally:
+        stop.set()
+        watcher.join()
+
+    assert len(get_paths(tmp_index)) == 6
+
+
+def test_index_watch_retry(
+    monkeypatch,
+    tmp: Path,
+    tmp_index: Path,
+    tmp_collection: Path,
+    fixtures: Path,
+):
+    """Test that changes are synchronized again after a failure."""
+    collection = (tmp / str(uuid4())).resolve()
+    copytree(tmp_collection, collection)
+    cli(["index", "add", "-i", str(tmp_index), str(collection)])
+
+    monkeypatch.setattr(FluxConfig, "WATCH_RETRY_INTERVAL", 0.2)
+    sync = SyncIndex.sync
+    failures = []
+
+    def fail_once(*args, **kwargs):
+        if not failures:
+            failures.append(args)
+            raise RuntimeError("failure")
+        return sync(*args, **kwargs)
+
+    monkeypatch.setattr(SyncIndex, "sync", fail_once)
+
+    stop = Event()
+    ready = Event()
+    watcher = Thread(
+        target=WatchIndex.watch,
+        args=(tmp_index,),
+        kwargs={"debounce": 0.2, "stop": stop, "ready": ready},
+    )
+    watcher.start()
+    try:
+        assert ready.wait(10)
+        copy(fixtures / "sample.mp4", collection / "a" / "05.mp4")
+        assert wait_for(
+            lambda: str(collection / "a" / "05.mp4") in get_paths(tmp_index)
+        )
+    finally:
+        stop.set()
+        watcher.join()
+    assert len(failures) == 1
+
+
+def test_index_watch_removed_record(
+    tmp: Path, tmp_index: Path, tmp_collection: Path
+):
+    """Test that watches of removed records are removed."""
+    collection = (tmp / str(uuid4())).resolve()
+    copytree(tmp_collection, collection)
+    cli(["index", "add", "-i", str(tmp_index), str(collection)])
+
+    with Inotify() as inotify:
+        watcher = Watcher(inotify)
+        watcher.load(tmp_index)
+        assert len(watcher.records) == 1
+        assert len(watcher.directories) == 4
+
+        cli(["index", "rm", "-i", str(tmp_index), *watcher.records])
+        watcher.load(tmp_index)
+        assert not watcher.records
+        assert not watcher.directories
+        assert not watcher.owners
+
+        # events of removed watches are ignored
+        (collection / "05.mp4").touch()
+        assert not watcher.process(0.2)
+        assert not watcher.pending
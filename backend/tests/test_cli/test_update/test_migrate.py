@@ -0,0 +1,195 @@
+"""Test subcommand `flux update migrate`."""
+
+from pathlib import Path
+from uuid import uuid4
+from importlib.metadata import version
+import json
+
+from flux.cli.index.create import create_index
+from flux.cli.update import migrate
+from flux.config import FluxConfig
+from flux.db import Transaction
+from flux.db.tracks import TRACK_METADATA_COLUMNS, decompress_metadata
+
+
+def get_schema(index_db: Path) -> set:
+    """Returns set of schema objects and table columns in database."""
+    schema = set()
+    with Transaction(index_db, readonly=True) as t:
+        t.cursor.execute(
+            """
+            SELECT type, name, tbl_name FROM sqlite_master
+            WHERE name NOT LIKE 'sqlite_%'
+            """
+        )
+        objects = t.cursor.fetchall()
+        for type_, name, table in objects:
+            schema.add((type_, name, table))
+            if type_ != "table":
+                continue
+            t.cursor.execute(f"PRAGMA table_xinfo('{name}')")
+            for column in t.cursor.fetchall():
+                schema.add((name,) + tuple(column[1:]))
+    return schema
+
+
+def test_migrate_schema(tmp: Path, fixtures: Path, monkeypatch):
+    """
+    Test that migrating an index from the oldest supported schema
+    results in the current schema.
+    """
+    # create index with old schema
+    index = tmp / str(uuid4())
+    index.mkdir()
+    with Transaction(index / FluxConfig.INDEX_DB_FILE) as t:
+        t.cursor.executescript(
+            (fixtures / "schema-0.3.0.sql").read_text(encoding="utf-8")
+        )
+        t.cursor.execute(
+            "INSERT INTO index_metadata (schema_version) VALUES ('0.3.0')"
+        )
+        t.cursor.execute("INSERT INTO index_metadata (initialized) VALUES (1)")
+
+    # migrate to latest version
+    latest = max(
+        migrate.CATALOGUE, key=lambda v: tuple(map(int, v.split(".")))
+    )
+    monkeypatch.setattr(migrate, "version", lambda _: latest)
+    migrate.Migrate.migrate_database(index, False)
+
+    with Transaction(index / FluxConfig.INDEX_DB_FILE, readonly=True) as t:
+        t.cursor.execute(
+            """
+            SELECT schema_version FROM index_metadata
+            WHERE schema_version IS NOT NULL
+            """
+        )
+    assert t.data == [(latest,)]
+
+    # compare with new index
+    reference = tmp / str(uuid4())
+    create_index(reference, False)
+    assert get_schema(index / FluxConfig.INDEX_DB_FILE) == get_schema(
+        reference / FluxConfig.INDEX_DB_FILE
+    )
+
+
+def test_migrate_app_version(tmp: Path, fixtures: Path):
+    """
+    Test that the app version includes all migrations, i.e., that
+    existing indices are migrated by `flux update migrate` and that new
+    indices are stamped with the version of their schema.
+    """
+    latest = max(
+        migrate.CATALOGUE, key=lambda v: tuple(map(int, v.split(".")))
+    )
+    assert version("flux") == latest or migrate.compare_versions(
+        version("flux"), latest
+    )
+
+    # new index
+    reference = tmp / str(uuid4())
+    create_index(reference, False)
+    with Transaction(
+        reference / FluxConfig.INDEX_DB_FILE, readonly=True
+    ) as t:
+        t.cursor.execute(
+            """
+            SELECT schema_version FROM index_metadata
+            WHERE schema_version IS NOT NULL
+            """
+        )
+    assert t.data == [(version("flux"),)]
+
+    # migrate existing index (without patching the app version)
+    index = tmp / str(uuid4())
+    index.mkdir()
+    with Transaction(index / FluxConfig.INDEX_DB_FILE) as t:
+        t.cursor.executescript(
+            (fixtures / "schema-0.3.0.sql").read_text(encoding="utf-8")
+        )
+        t.cursor.execute(
+            "INSERT INTO index_metadata (schema_version) VALUES ('0.3.0')"
+        )
+        t.cursor.execute("INSERT INTO index_metadata (initialized) VALUES (1)")
+    migrate.Migrate.migrate_database(index, False)
+    assert get_schema(index / FluxConfig.INDEX_DB_FILE) == get_schema(
+        reference / FluxConfig.INDEX_DB_FILE
+    )
+
+
+def test_get_migrations():
+    """Test selection of migrations."""
+    assert migrate.get_migrations("0.3.0", "0.3.0") == []
+    assert migrate.get_migrations("0.3.0", "0.4.0") == migrate.CATALOGUE[
+        "0.4.0"
+    ]
+    assert migrate.get_migrations("0.4.0", "0.4.0") == []
+
+
+def test_migrate_track_metadata(tmp: Path, fixtures: Path, monkeypatch):
+    """Test migration of track metadata into separate columns."""
+    metadata = {
+        "streams": [
+            {"codec_type": "audio", "codec_name": "aac"},
+            {
+                "codec_type": "video",
+                "codec_name": "h264",
+                "width": 1280,
+                "height": 720,
+            },
+        ],
+        "format": {
+            "duration": "10.5",
+            "format_name": "mov,mp4,m4a,3gp,3g2,mj2",
+            "format_long_name": "QuickTime / MOV",
+            "bit_rate": "N/A",
+        },
+    }
+    index = tmp / str(uuid4())
+    index.mkdir()
+    with Transaction(index / FluxConfig.INDEX_DB_FILE) as t:
+        t.cursor.executescript(
+            (fixtures / "schema-0.3.0.sql").read_text(encoding="utf-8")
+        )
+        t.cursor.execute(
+            "INSERT INTO index_metadata (schema_version) VALUES ('0.3.0')"
+        )
+        t.cursor.execute("INSERT INTO index_metadata (initialized) VALUES (1)")
+        t.cursor.execute("INSERT INTO thumbnails VALUES ('t', 't.jpg')")
+        t.cursor.execute(
+            "INSERT INTO records VALUES ('r', 't', 'movie', 'name', '')"
+        )
+        t.cursor.execute(
+            "INSERT INTO videos VALUES ('r', 'r', NULL, NULL, NULL, NULL, 0)"
+        )
+        t.cursor.execute(
+            "INSERT INTO tracks VALUES ('a', 'r', 'a.mp4', ?, 1)",
+            (json.dumps(metadata),),
+        )
+
+    monkeypatch.setattr(migrate, "version", lambda _: "0.4.0")
+    migrate.Migrate.migrate_database(index, False)
+
+    with Transaction(index / FluxConfig.INDEX_DB_FILE, readonly=True) as t:
+        t.cursor.execute(
+            f"""
+            SELECT {', '.join(TRACK_METADATA_COLUMNS)}, metadata_compressed
+            FROM tracks
+            """
+        )
+    assert t.data[0][:-1] == (
+        10.5,
+        "mov,mp4,m4a,3gp,3g2,mj2",
+        "QuickTime / MOV",
+        None,
+        1280,
+        720,
+        "h264",
+    )
+    assert decompress_metadata(t.data[0][-1]) == metadata
+
+    # source paths are inferred from tracks
+    with Transaction(index / FluxConfig.INDEX_DB_FILE, readonly=True) as t:
+        t.cursor.execute("SELECT path FROM records")
+    assert t.data == [("a.mp4",)]
@@ -2,11 +2,13 @@
 
 from pathlib import Path
 from uuid import uuid4
+from time import perf_counter, sleep
+import threading
 from sqlite3 import OperationalError
 
 import pytest
 
-from flux.db import Transaction
+from flux.db import Transaction, BatchWriter
 from flux.config import FluxConfig
 
 
@@ -97,3 +99,189 @@ def test_schema(tmp: Path):
         t.cursor.executescript(
             FluxConfig.SCHEMA_LOCATION.read_text(encoding="utf-8")
         )
+
+
+def test_pooled_connections(tmp: Path):
+    """Test reuse of pooled connections in `Transaction`s."""
+    db = tmp / str(uuid4())
+    with Transaction(db) as t:
+        t.cursor.execute("CREATE TABLE a (id TEXT)")
+        connection = t.connection
+
+    # read-write connection is reused
+    with Transaction(db) as t:
+        t.cursor.execute("INSERT INTO a VALUES ('id')")
+        assert t.connection is connection
+
+    # read-only connection is separate
+    with Transaction(db, readonly=True) as t:
+        t.cursor.execute("SELECT * FROM a")
+        assert t.connection is not connection
+    assert len(t.data) == 1
+
+    # nested transactions do not share connections (nested read-write
+    # transactions would wait for each other's write lock)
+    with Transaction(db, readonly=True) as t:
+        with Transaction(db, readonly=True) as t2:
+            assert t2.connection is not t.connection
+
+    # unpooled connection
+    with Transaction(db, pooled=False) as t:
+        t.cursor.execute("SELECT * FROM a")
+        assert t.connection is not connection
+    assert len(t.data) == 1
+
+
+def test_pooled_connections_not_in_transaction(tmp: Path):
+    """
+    Test that pooled connections do not hold a transaction (and thereby
+    a lock or snapshot) after a `Transaction`.
+    """
+    db = tmp / str(uuid4())
+    with Transaction(db) as t:
+        t.cursor.execute("CREATE TABLE a (id TEXT)")
+        t.cursor.execute("INSERT INTO a VALUES ('id')")
+    assert not t.connection.in_transaction
+
+    with Transaction(db, readonly=True) as t:
+        t.cursor.execute("SELECT * FROM a")
+    assert not t.connection.in_transaction
+    assert t.data == [("id",)]
+
+    # other connections can write (no shared lock is held) and the
+    # change is visible to the pooled connection (no stale snapshot)
+    with Transaction(db, pooled=False) as t2:
+        t2.cursor.execute("INSERT INTO a VALUES ('id2')")
+    with Transaction(db, readonly=True) as t3:
+        t3.cursor.execute("SELECT COUNT(*) FROM a")
+    assert t3.connection is t.connection
+    assert t3.data == [(2,)]
+
+    # failed transactions
+    with pytest.raises(OperationalError):
+        with Transaction(db) as t:
+            t.cursor.execute("INSERT INTO a VALUES ('id3')")
+            t.cursor.execute("SELECT * FROM b")
+    assert not t.connection.in_transaction
+    with Transaction(db, readonly=True) as t:
+        t.cursor.execute("SELECT COUNT(*) FROM a")
+    assert t.data == [(2,)]
+
+
+def test_pooled_connections_replaced_file(tmp: Path):
+    """Test pooled connections for database files that are replaced."""
+    db = tmp / str(uuid4())
+    with Transaction(db) as t:
+        t.cursor.execute("CREATE TABLE a (id TEXT)")
+
+    db.unlink()
+    with Transaction(db) as t:
+        t.cursor.execute("CREATE TABLE a (id TEXT)")
+        t.cursor.execute("INSERT INTO a VALUES ('id')")
+
+    with Transaction(db, readonly=True) as t:
+        t.cursor.execute("SELECT * FROM a")
+    assert len(t.data) == 1
+
+
+def test_connection_settings(tmp: Path):
+    """Test connection-settings from `FluxConfig` in `Transaction`s."""
+    db = tmp / str(uuid4())
+    with Transaction(db) as t:
+        t.cursor.execute("PRAGMA busy_timeout")
+        assert t.cursor.fetchone()[0] == FluxConfig.DB_BUSY_TIMEOUT
+        t.cursor.execute("PRAGMA synchronous")
+        assert t.cursor.fetchone()[0] == 1  # NORMAL
+        t.cursor.execute("PRAGMA cache_size")
+        assert t.cursor.fetchone()[0] == FluxConfig.DB_CACHE_SIZE
+
+
+def test_batch_writer(tmp: Path):
+    """Test writing rows in chunks with `BatchWriter`."""
+    db = tmp / str(uuid4())
+    with Transaction(db) as t:
+        t.cursor.execute("CREATE TABLE a (id INTEGER)")
+        t.cursor.execute("CREATE TABLE progress (value INTEGER)")
+        t.cursor.execute("INSERT INTO progress VALUES (0)")
+
+    with BatchWriter(db, chunk_rows=3) as writer:
+        for i in range(5):
+            writer.add("INSERT INTO a VALUES (?)", [(i,)])
+            writer.checkpoint("UPDATE progress SET value = ?", (i + 1,))
+            # rows and checkpoint are written together
+            with Transaction(db, readonly=True) as t:
+                t.cursor.execute("SELECT COUNT(*) FROM a")
+                t.cursor.execute("SELECT value FROM progress")
+            assert t.data == [(3 if i >= 2 else 0,)]
+
+    with Transaction(db, readonly=True) as t:
+        t.cursor.execute("SELECT COUNT(*) FROM a")
+    assert t.data == [(5,)]
+    assert writer.rows_written == 5
+    assert len(writer.hold_times) == 2
+
+
+def test_batch_writer_exception(tmp: Path):
+    """Test that `BatchWriter` discards pending rows on exceptions."""
+    db = tmp / str(uuid4())
+    with Transaction(db) as t:
+        t.cursor.execute("CREATE TABLE a (id INTEGER)")
+
+    with pytest.raises(ValueError):
+        with BatchWriter(db, chunk_rows=10) as writer:
+            writer.add("INSERT INTO a VALUES (?)", [(0,), (1,)])
+            raise ValueError()
+
+    with Transaction(db, readonly=True) as t:
+        t.cursor.execute("SELECT COUNT(*) FROM a")
+    assert t.data == [(0,)]
+
+
+def test_batch_writer_chunk_duration(tmp: Path):
+    """Test adaptive chunk size of `BatchWriter`."""
+    db = tmp / str(uuid4())
+    with Transaction(db) as t:
+        t.cursor.execute("CREATE TABLE a (id INTEGER)")
+
+    writer = BatchWriter(db, chunk_rows=1000, chunk_duration=1e-9)
+    writer.add("INSERT INTO a VALUES (?)", [(i,) for i in range(1000)])
+    writer.flush()
+    assert writer.chunk_rows < 1000
+
+
+def test_batch_writer_chunk_pause(tmp: Path):
+    """
+    Test that `BatchWriter` pauses after chunks so that other writers
+    get the write lock in between.
+    """
+    db = tmp / str(uuid4())
+    with Transaction(db) as t:
+        t.cursor.execute("CREATE TABLE a (id INTEGER)")
+        t.cursor.execute("CREATE TABLE b (count INTEGER)")
+
+    done = threading.Event()
+
+    def write():
+        while not done.is_set():
+            with Transaction(db, pooled=False) as t:
+                t.cursor.execute("INSERT INTO b SELECT COUNT(*) FROM a")
+            sleep(0.001)
+
+    thread = threading.Thread(target=write)
+    thread.start()
+    try:
+        start = perf_counter()
+        with BatchWriter(db, chunk_rows=1, chunk_pause=0.05) as writer:
+            for i in range(4):
+                writer.add("INSERT INTO a VALUES (?)", [(i,)])
+                writer.checkpoint()
+        end = perf_counter()
+    finally:
+        done.set()
+        thread.join()
+
+    assert end - start >= 4 * 0.05
+    # other writer has written during every pause
+    with Transaction(db, readonly=True) as t:
+        t.cursor.execute("SELECT DISTINCT count FROM b WHERE count > 0")
+    assert sorted(row[0] for row in t.data) == [1, 2, 3, 4]
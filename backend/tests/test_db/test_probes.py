@@ -0,0 +1,53 @@
+"""Test persistent cache for ffprobe-results."""
+
+from pathlib import Path
+from uuid import uuid4
+from concurrent.futures import ThreadPoolExecutor
+
+from flux.db.probes import ProbeCache
+
+
+def test_probe_cache(tmp: Path):
+    """Test lookup, invalidation, and eviction of `ProbeCache`."""
+    cache = ProbeCache(tmp / str(uuid4()), 2)
+    files = [tmp / str(uuid4()) for _ in range(3)]
+    for file in files:
+        file.write_bytes(b"data")
+
+    # miss and hit
+    assert cache.get(files[0], files[0].stat()) is None
+    cache.put(files[0], files[0].stat(), {"format": {"size": "4"}})
+    assert cache.get(files[0], files[0].stat()) == {"format": {"size": "4"}}
+
+    # stale entry
+    files[0].write_bytes(b"changed data")
+    assert cache.get(files[0], files[0].stat()) is None
+    cache.put(files[0], files[0].stat(), {"format": {"size": "12"}})
+
+    # eviction of least recently used entries
+    for file in files[1:]:
+        cache.put(file, file.stat(), {})
+    assert cache.evict() == 1
+    assert cache.evict() == 0
+
+
+def test_probe_cache_concurrent(tmp: Path):
+    """Test parallel lookups and errors of `ProbeCache`."""
+    cache = ProbeCache(tmp / str(uuid4()), 1000)
+    files = [tmp / str(uuid4()) for _ in range(200)]
+    for i, file in enumerate(files):
+        file.write_bytes(b"data")
+        cache.put(file, file.stat(), {"i": i})
+
+    # lookups (with writes for the access time) in parallel
+    with ThreadPoolExecutor(16) as executor:
+        results = list(
+            executor.map(lambda file: cache.get(file, file.stat()), files)
+        )
+    assert results == [{"i": i} for i in range(len(files))]
+
+    # unreadable cache is treated as miss
+    cache.path.unlink()
+    cache.path.mkdir()
+    assert cache.get(files[0], files[0].stat()) is None
+    cache.put(files[0], files[0].stat(), {})
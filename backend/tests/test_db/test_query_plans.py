@@ -0,0 +1,348 @@
+"""
+Test query plans of the queries issued by the API and `flux run` on a
+large index.
+"""
+
+from typing import Optional
+from pathlib import Path
+from uuid import uuid4
+import re
+
+import pytest
+
+from flux.config import FluxConfig
+from flux.db import Transaction, pool
+from flux.db.tracks import INSERT_TRACK, get_track_row
+from flux.db import common as db_common
+from flux.cli.index.create import create_index
+from flux.cli.run import Run
+from flux.app.app import app_factory
+
+
+NUMBER_OF_RECORDS = 100_000
+
+METADATA = {
+    "format": {
+        "duration": "10.0",
+        "format_name": "mov,mp4,m4a,3gp,3g2,mj2",
+        "format_long_name": "QuickTime / MOV",
+        "bit_rate": "1000",
+    },
+    "streams": [
+        {
+            "codec_type": "video",
+            "codec_name": "h264",
+            "width": 1920,
+            "height": 1080,
+        }
+    ],
+}
+
+
+def _seed(index_db: Path) -> dict:
+    """
+    Seeds database with `NUMBER_OF_RECORDS` records (mostly movies,
+    some collections and series) and returns a selection of ids.
+    """
+    rows = {
+        "thumbnails": [],
+        "records": [],
+        "seasons": [],
+        "videos": [],
+        "tracks": [],
+    }
+
+    def add_video(record_id, season_id, position, name):
+        video_id = str(uuid4())
+        thumbnail_id = str(uuid4())
+        rows["thumbnails"].append((thumbnail_id, thumbnail_id + ".jpg"))
+        rows["videos"].append(
+            (
+                video_id,
+                record_id,
+                season_id,
+                thumbnail_id,
+                name,
+                "description",
+                position,
+            )
+        )
+        rows["tracks"].append(
+            get_track_row(
+                str(uuid4()), video_id, f"/videos/{video_id}.mp4", METADATA
+            )
+        )
+        return video_id, thumbnail_id
+
+    ids = {}
+    for i in range(NUMBER_OF_RECORDS):
+        record_id = str(uuid4())
+        if i % 100 == 0:
+            type_ = "series"
+            video_ids = []
+            for season_position in range(3):
+                season_id = str(uuid4())
+                rows["seasons"].append(
+                    (
+                        season_id,
+                        record_id,
+                        f"s{season_position}",
+                        season_position,
+                    )
+                )
+                for position in range(10):
+                    video_ids.append(
+                        add_video(
+                            record_id, season_id, position, f"e{position}"
+                        )
+                    )
+            video_ids.append(add_video(record_id, None, 0, "special"))
+        elif i % 10 == 0:
+            type_ = "collection"
+            video_ids = [
+                add_video(record_id, None, position, f"v{position}")
+                for position in range(3)
+            ]
+        else:
+            type_ = "movie"
+            video_ids = [add_video(record_id, None, 0, None)]
+            # movies use record-id as video-id
+            rows["videos"][-1] = (record_id,) + rows["videos"][-1][1:]
+            rows["tracks"][-1] = rows["tracks"][-1][:1] + (
+                (record_id,) + rows["tracks"][-1][2:]
+            )
+            video_ids = [(record_id, video_ids[0][1])]
+        rows["records"].append(
+            (
+                record_id,
+                video_ids[0][1],
+                type_,
+                f"record {i}",
+                f"description of record {i}",
+                i,
+                None,
+            )
+        )
+        ids.setdefault(type_, (record_id, video_ids[-1][0]))
+
+    with Transaction(index_db) as t:
+        for table, values in rows.items():
+            t.cursor.executemany(
+                (
+                    INSERT_TRACK
+                    if table == "tracks"
+                    else f"INSERT INTO {table} VALUES "
+                    + f"({', '.join('?' * len(values[0]))})"
+                ),
+                values,
+            )
+    return ids
+
+
+@pytest.fixture(scope="module", name="large_index")
+def _large_index(tmp: Path) -> tuple[Path, dict]:
+    """Returns a large pre-seeded index and a selection of ids."""
+    index = tmp / str(uuid4())
+    create_index(index, False)
+    return index, _seed(index / FluxConfig.INDEX_DB_FILE)
+
+
+@pytest.fixture(name="trace")
+def _trace(monkeypatch) -> list[str]:
+    """Returns list that collects all statements issued via `flux.db`."""
+    statements = []
+    connect = db_common.connect
+
+    def traced_connect(*args, **kwargs):
+        connection = connect(*args, **kwargs)
+        connection.set_trace_callback(statements.append)
+        return connection
+
+    pool.close()
+    monkeypatch.setattr(db_common, "connect", traced_connect)
+    yield statements
+    pool.close()
+
+
+def get_full_scans(
+    index_db: Path,
+    statements: list[str],
+    allowed: Optional[list[str]] = None,
+) -> list[tuple[str, str]]:
+    """
+    Returns list of tuples of statement and plan detail for all full
+    table scans (also via index) of ordinary tables that are not
+    `allowed`.
+    """
+    scans = []
+    with Transaction(index_db, readonly=True, pooled=False) as t:
+        t.cursor.execute(
+            """
+            SELECT name FROM sqlite_master
+            WHERE type = 'table' AND sql NOT LIKE 'CREATE VIRTUAL%'
+            """
+        )
+        tables = [row[0] for row in t.cursor.fetchall()]
+        for statement in statements:
+            if not re.match(
+                r"\s*(SELECT|INSERT|UPDATE|DELETE|WITH)",
+                statement,
+                flags=re.IGNORECASE,
+            ):
+                continue
+            t.cursor.execute("EXPLAIN QUERY PLAN " + statement)
+            for row in t.cursor.fetchall():
+                match = re.match(r"SCAN (?:TABLE )?(\w+)", row[3])
+                if (
+                    match
+                    and match.group(1) in tables
+                    and match.group(1) not in (allowed or [])
+                ):
+                    scans.append((statement, row[3]))
+    return scans
+
+
+def test_query_plans_api(patch_config, large_index, trace, login):
+    """Test query plans for queries issued by the API."""
+    index, ids = large_index
+    index_db = index / FluxConfig.INDEX_DB_FILE
+    FluxConfig.INDEX_LOCATION = index
+    client = app_factory().test_client()
+    login(client)
+
+    requests = [
+        # listing all records requires a scan of records
+        ("get", "/api/v0/index/records?range=0-20", None, ["records"]),
+        ("get", "/api/v0/index/records?type=series&range=0-20", None, None),
+        ("get", "/api/v0/index/records?search=record%201", None, None),
+        ("get", "/api/v0/index/records?search=e1&range=0-20", None, None),
+        ("get", "/api/v0/index/records?continue=true&range=0-20", None, None),
+    ]
+    for type_, (record_id, video_id) in ids.items():
+        requests += [
+            ("get", f"/api/v0/index/record/{record_id}", None, None),
+            ("get", f"/api/v0/index/record/{video_id}", None, None),
+            ("get", f"/api/v0/index/video/{video_id}", None, None),
+            (
+                "get",
+                f"/api/v0/index/record/{record_id}/current-video",
+                None,
+                None,
+            ),
+            (
+                "post",
+                f"/api/v0/playback/{record_id}",
+                {"content": {"videoId": video_id, "timestamp": 1}},
+                None,
+            ),
+            (
+                "get",
+                f"/api/v0/index/record/{record_id}/current-video",
+                None,
+                None,
+            ),
+        ]
+    requests += [
+        ("get", "/api/v0/index/records?continue=true&range=0-20", None, None),
+    ] + [
+        ("delete", f"/api/v0/playback/{record_id}", None, None)
+        for record_id, _ in ids.values()
+    ]
+
+    for method, url, json_, allowed in requests:
+        trace.clear()
+        response = getattr(client, method)(url, json=json_)
+        assert response.json["meta"]["ok"], url
+        assert len(trace) > 0
+        assert get_full_scans(index_db, trace, allowed) == [], url
+
+
+def test_query_plans_api_keyset_pagination(patch_config, large_index, trace):
+    """
+    Test query plans for queries issued by the API when paginating
+    through records (pages after the first one).
+    """
+    index, ids = large_index
+    index_db = index / FluxConfig.INDEX_DB_FILE
+    FluxConfig.INDEX_LOCATION = index
+    client = app_factory().test_client()
+    # user may already exist in module-scoped index
+    client.post(
+        "/api/v0/user/register",
+        json={"content": {"username": "user1", "password": "password1"}},
+    )
+    assert client.post(
+        "/api/v0/user/session",
+        json={"content": {"username": "user1", "password": "password1"}},
+    ).json["meta"]["ok"]
+    for record_id, video_id in ids.values():
+        assert client.post(
+            f"/api/v0/playback/{record_id}",
+            json={"content": {"videoId": video_id, "timestamp": 1}},
+        ).json["meta"]["ok"]
+
+    for query in [
+        "sort=name",
+        "sort=added-at",
+        "sort=last-watched",
+        "type=series&sort=name",
+        "type=series&sort=added-at",
+        "search=record%201",
+        "search=record%201&sort=name",
+        "continue=true&sort=name",
+    ]:
+        url = f"/api/v0/index/records?{query}&limit=1"
+        response = client.get(url)
+        assert response.json["meta"]["ok"], url
+        assert response.json["content"]["next"] is not None, url
+        trace.clear()
+        response = client.get(
+            url + f"&cursor={response.json['content']['next']}"
+        )
+        assert response.json["meta"]["ok"], url
+        assert len(trace) > 0
+        assert get_full_scans(index_db, trace) == [], url
+
+
+def test_query_plans_run(large_index, trace):
+    """Test query plans for queries issued by `flux run`."""
+    index, _ = large_index
+    index_db = index / FluxConfig.INDEX_DB_FILE
+
+    Run("").cleanup_thumbnails(index, False)
+    assert len(trace) > 0
+    # cleanup needs to visit every thumbnail once
+    assert get_full_scans(index_db, trace, ["thumbnails"]) == []
+
+    # version check (single-row metadata table)
+    assert (
+        get_full_scans(
+            index_db,
+            ["SELECT schema_version FROM index_metadata"],
+            ["index_metadata"],
+        )
+        == []
+    )
+
+
+def test_foreign_key_indices(tmp_index: Path):
+    """Test that every foreign key is covered by an index."""
+    with Transaction(
+        tmp_index / FluxConfig.INDEX_DB_FILE, readonly=True
+    ) as t:
+        t.cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table'"
+        )
+        tables = [row[0] for row in t.cursor.fetchall()]
+        for table in tables:
+            t.cursor.execute(f"PRAGMA foreign_key_list('{table}')")
+            foreign_keys = [row[3] for row in t.cursor.fetchall()]
+            t.cursor.execute(f"PRAGMA index_list('{table}')")
+            # only use non-partial indices
+            indices = [row[1] for row in t.cursor.fetchall() if not row[4]]
+            leading_columns = set()
+            for index in indices:
+                t.cursor.execute(f"PRAGMA index_info('{index}')")
+                leading_columns.add(t.cursor.fetchone()[2])
+            for column in foreign_keys:
+                assert column in leading_columns, f"{table}.{column}"
@@ -44,7 +44,8 @@ export default function Content({ title, url, params, options }: ContentProps) {
         "?" +
         new URLSearchParams({
           ...Object.fromEntries(params ?? []),
-          range: `${records?.records.length ?? 0}-${range}`,
+          limit: `${range - (records?.records.length ?? 0)}`,
+          ...(records?.next ? { cursor: records.next } : {}),
         }).toString(),
     )
       .then((response) => {
@@ -100,7 +101,7 @@ export default function Content({ title, url, params, options }: ContentProps) {
           <RecordDisplay />
         )}
       </div>
-      {records && records?.count > range ? (
+      {records?.next ? (
         <div className="relative flex items-center justify-center">
           <div className="border-t border-2 w-32 border-gray-600" />
           <div className="shrink mx-4 flex flex-row text-gray-500 space-x-2 items-center">
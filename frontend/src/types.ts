@@ -56,6 +56,7 @@ export interface RecordMetadata {
 export interface Records {
   count: number;
   records: RecordMetadata[];
+  next: string | null;
 }
 
 export interface VideoInfo {